@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+"""PCQNG throughput / latency benchmark suite.
+
+Run from the repository root::
+
+    python -m benchmarks.pcqng_bench                      # print JSON
+    python -m benchmarks.pcqng_bench --out results.json
+    python -m benchmarks.pcqng_bench --compare benchmarks/baseline.json
+    python -m benchmarks.pcqng_bench --update-baseline    # after a deliberate change
+
+Micro benchmarks drive the pipeline from a synthetic timestamp trace, so
+they measure code cost, not the 1 ms tick.  The end-to-end benchmark
+starts the mini-app generator thread and pulls ``/api/entropy`` through
+FastAPI's test client in real time (skipped with ``--no-e2e`` or when the
+server's dependencies are missing).
+
+Metric direction is encoded in the key suffix: ``*_ns``/``*_us``/``*_ms``
+and ``*_per_packet`` are lower-is-better, ``*_per_s`` higher-is-better.
+``--compare`` flags any metric worse than the baseline by more than the
+tolerance (default 30 %), or below its acceptance floor in
+``MIN_SPEEDUP`` whatever the baseline says, and exits non-zero.  It refuses (exit 2) when
+the baseline was recorded on another Python / NumPy than the one installed
+– numbers from different stacks say nothing about the code; record a
+baseline on the deployed stack (requirements.txt) first.  Optional
+packages such as SciPy are recorded in ``meta`` but not matched.
+
+Scott Wilber justification: benchmarks call the canonical code paths
+unchanged; nothing here feeds back into generated entropy.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import socket
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from bot.pcqng import PcqngCore, PcqngRng, _LfsrCorrector, _LpFilter, _RobustWindow  # noqa: E402
+from bot.pcqng_lpspeed import LpSpeedFilter  # noqa: E402
+from bot.pcqng_replay import TraceSource  # noqa: E402
+from bot.pcqng_walk import BoundedWalkGen, _walk_reference  # noqa: E402
+from bot.pcqng_zstats import p_to_z, stouffer, z_to_p  # noqa: E402
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_TOLERANCE = 0.30
+_STACK_KEYS = ("python", "numpy")  # pinned; optional packages are informational
+# Acceptance bars of the requests that introduced the vectorised paths
+MIN_SPEEDUP = {"bounded_walk": 50.0}
+
+Result = Dict[str, Any]
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def _trace(n: int, seed: int = 11) -> np.ndarray:
+    """Synthetic timestamps whose deltas keep eBits off the clamp."""
+    rnd = np.random.default_rng(seed)
+    return np.cumsum(rnd.normal(5_000, 1_000, n).astype(np.int64)).astype(np.int64)
+
+
+def _percentiles(samples_ns: np.ndarray, prefix: str = "") -> Result:
+    p50, p90, p99 = np.percentile(samples_ns, [50, 90, 99])
+    return {
+        f"{prefix}p50_ns": round(float(p50), 1),
+        f"{prefix}p90_ns": round(float(p90), 1),
+        f"{prefix}p99_ns": round(float(p99), 1),
+    }
+
+
+def _time_calls(fn: Callable[[], Any], calls: int, batch: int = 1) -> np.ndarray:
+    """Per-call latency samples; *batch* calls per sample amortise the clock read."""
+    clock = time.perf_counter_ns
+    out = np.empty(calls // batch, dtype=np.float64)
+    for i in range(len(out)):
+        t0 = clock()
+        for _ in range(batch):
+            fn()
+        out[i] = (clock() - t0) / batch
+    return out
+
+
+def _normal_core(trace: np.ndarray) -> PcqngCore:
+    core = PcqngCore(timestamp_source=TraceSource(trace[:0]))
+    core.step_many(trace)  # INIT + RAMP + a full calibration window
+    return core
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+def bench_core_step(samples: int) -> Result:
+    """Scalar ``PcqngCore.step`` in NORMAL (timestamp source = trace)."""
+    warm = _trace(3000)
+    live = warm[-1] + _trace(samples, seed=12)
+    core = _normal_core(warm)
+    core._read_timestamp = TraceSource(live)
+    lat = _time_calls(core.step, samples)
+    return dict(_percentiles(lat), steps_per_s=round(1e9 / lat.mean(), 1))
+
+
+def bench_lfsr_next_bit(samples: int) -> Result:
+    lfsr = _LfsrCorrector()
+    lat = _time_calls(lambda: lfsr.next_bit(1), samples * 100, batch=100)
+    return dict(_percentiles(lat), bits_per_s=round(1e9 / lat.mean(), 1))
+
+
+def bench_process_e_byte(samples: int) -> Result:
+    """One eBits byte → LFSR block → 4 packets, plus allocation per packet.
+
+    Packets are drained after every call, so ``alloc_bytes_per_packet``
+    (tracemalloc high-water mark of each call) is what one packet costs
+    to produce, and ``retained_blocks_per_packet`` is what stays behind
+    once it has been read – a leak, not a working set.
+    """
+    rng = PcqngRng(timestamp_source=TraceSource(_trace(0)))
+    values = iter(np.random.default_rng(3).integers(0, 256, samples * 2).tolist())
+    lat = _time_calls(lambda: rng._process_e_byte(next(values)), samples)
+    rng.read_packets()
+
+    packets = alloc = 0
+    tracemalloc.start()
+    blocks0 = sys.getallocatedblocks()
+    for _ in range(samples):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        rng._process_e_byte(next(values))
+        alloc += tracemalloc.get_traced_memory()[1] - before
+        packets += len(rng.read_packets())
+    blocks = sys.getallocatedblocks() - blocks0
+    tracemalloc.stop()
+    return dict(
+        _percentiles(lat),
+        packets_per_s=round(4e9 / lat.mean(), 1),
+        alloc_bytes_per_packet=round(alloc / packets, 1),
+        retained_blocks_per_packet=round(max(blocks, 0) / packets, 3),
+    )
+
+
+def bench_calibration(samples: int) -> Result:
+    """Sliding median/MAD recalibration and the batch NORMAL path."""
+    window = _RobustWindow(PcqngCore._CAL_WINDOW)
+    window.extend(np.random.default_rng(5).normal(5_000, 1_000, PcqngCore._CAL_WINDOW).tolist())
+
+    def recalibrate() -> None:
+        window.mad(window.median())
+
+    lat = _time_calls(recalibrate, max(samples // 10, 100))
+    trace = _trace(samples + 3000)
+    core = _normal_core(trace[:3000])
+    t0 = time.perf_counter_ns()
+    core.step_many(trace[3000:])
+    elapsed = time.perf_counter_ns() - t0
+    return dict(
+        _percentiles(lat, prefix="recal_"),
+        step_many_samples_per_s=round(samples * 1e9 / elapsed, 1),
+    )
+
+
+def bench_lp_speed_filter(samples: int) -> Result:
+    """Scalar ``_LpFilter.feed`` per ±1 bit vs the ``LpSpeedFilter`` table."""
+    bits = np.random.default_rng(7).integers(0, 2, samples)
+    lp = _LpFilter()
+    signs = (bits * 2 - 1).tolist()
+    t0 = time.perf_counter_ns()
+    for x in signs:
+        lp.feed(x, 10.508332)
+    scalar_ns = (time.perf_counter_ns() - t0) / samples
+    table = LpSpeedFilter(10.508332)
+    t0 = time.perf_counter_ns()
+    table.filter_bits(bits)
+    table_ns = (time.perf_counter_ns() - t0) / samples
+    return {
+        "scalar_per_bit_ns": round(scalar_ns, 2),
+        "table_per_bit_ns": round(table_ns, 2),
+        "speedup": round(scalar_ns / table_ns, 2),
+    }
+
+
+def bench_bounded_walk(samples: int) -> Result:
+    """Bit-by-bit reference walk vs vectorised ``BoundedWalkGen`` (0.1 s bound).
+
+    Each side is the fastest of several runs, so the gated speedup is
+    not one scheduling hiccup of a run lasting a few milliseconds.
+    """
+    data = np.random.default_rng(8).integers(0, 128, samples, dtype=np.uint8).tobytes()
+    gen = BoundedWalkGen()
+    reference = data[: samples // 10]
+    reference_ns = float(_time_calls(lambda: _walk_reference(reference, gen.bound_steps), 7).min()) / (len(reference) * 7)
+    vector_ns = float(_time_calls(lambda: gen.process(data), 21).min()) / (samples * 7)
+    return {
+        "reference_per_bit_ns": round(reference_ns, 2),
+        "vector_per_bit_ns": round(vector_ns, 2),
+        "speedup": round(reference_ns / vector_ns, 1),
+    }
+
+
+def bench_stream_stats(samples: int) -> Result:
+    """Per-element ``math.erfc`` vs ``pcqng_zstats`` over a 2000-stream z matrix."""
+    z = np.random.default_rng(9).normal(size=(2000, max(1, samples // 2000)))
+    flat = z.ravel().tolist()
+    t0 = time.perf_counter_ns()
+    [0.5 * math.erfc(-v / math.sqrt(2)) for v in flat]
+    scalar_ns = (time.perf_counter_ns() - t0) / z.size
+    t0 = time.perf_counter_ns()
+    p_to_z(z_to_p(z, exact=True), exact=True)
+    exact_ns = (time.perf_counter_ns() - t0) / z.size
+    t0 = time.perf_counter_ns()
+    stouffer(p_to_z(z_to_p(z)))
+    canonical_ns = (time.perf_counter_ns() - t0) / z.size
+    return {
+        "scalar_per_element_ns": round(scalar_ns, 2),
+        "exact_roundtrip_per_element_ns": round(exact_ns, 2),
+        "canonical_combine_per_element_ns": round(canonical_ns, 2),
+    }
+
+
+def bench_end_to_end(duration_s: float) -> Result:
+    """``_pcqng_worker`` production and ``/api/entropy`` delivery in real time."""
+    os.environ.setdefault("PCQNG_WARM_START", "")
+    os.environ.setdefault("PCQNG_HEALTH", "monitor")  # measure flow, not quarantine
+    sys.path.insert(0, str(ROOT / "miniapp"))
+    import server  # type: ignore  # starts the generator thread
+    from fastapi.testclient import TestClient
+
+    # Past INIT/RAMP so the numbers describe steady state
+    deadline = time.monotonic() + 10
+    while server._rng_buffer.stats()["written"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    written0 = server._rng_buffer.stats()["written"]
+    lat: List[float] = []
+    received = 0
+    with TestClient(server.app) as client:
+        t0 = time.monotonic()
+        while time.monotonic() - t0 < duration_s:
+            r0 = time.perf_counter_ns()
+            resp = client.get("/api/entropy", params={"count": 4096, "timeout_ms": 1000})
+            lat.append(time.perf_counter_ns() - r0)
+            received += len(resp.content)
+        elapsed = time.monotonic() - t0
+    produced = server._rng_buffer.stats()["written"] - written0
+    lat_ms = np.asarray(lat) / 1e6
+    p50, p99 = np.percentile(lat_ms, [50, 99])
+    return {
+        "worker_bytes_per_s": round(produced / elapsed, 1),
+        "api_bytes_per_s": round(received / elapsed, 1),
+        "api_request_p50_ms": round(float(p50), 3),
+        "api_request_p99_ms": round(float(p99), 3),
+    }
+
+# ---------------------------------------------------------------------------
+# Runner / comparison
+# ---------------------------------------------------------------------------
+
+def run(samples: int = 20_000, e2e: bool = True, e2e_duration_s: float = 3.0) -> Dict[str, Any]:
+    results: Dict[str, Result] = {
+        "core_step": bench_core_step(samples),
+        "lfsr_next_bit": bench_lfsr_next_bit(samples),
+        "process_e_byte": bench_process_e_byte(samples // 4),
+        "calibration": bench_calibration(samples),
+        "lp_speed_filter": bench_lp_speed_filter(samples * 10),
+        "bounded_walk": bench_bounded_walk(samples * 10),
+        "stream_stats": bench_stream_stats(samples * 10),
+    }
+    if e2e:
+        try:
+            results["end_to_end"] = bench_end_to_end(e2e_duration_s)
+        except ImportError as exc:  # server extras not installed
+            print(f"end_to_end skipped: {exc}", file=sys.stderr)
+    return {"meta": run_meta(), "results": results}
+
+
+def run_meta() -> Dict[str, Any]:
+    """Host and library stack a report was recorded on."""
+    return {
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": _scipy_version(),
+        "timestamp": time.time(),
+    }
+
+
+def _scipy_version() -> str | None:
+    try:
+        import scipy
+    except ImportError:
+        return None
+    return scipy.__version__
+
+
+def stack_mismatch(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Library versions that differ between two reports' ``meta``.
+
+    Keys absent from an older baseline's meta are not checked; a baseline
+    without any meta cannot be matched at all.
+    """
+    base_meta, meta = baseline.get("meta"), current.get("meta", {})
+    if not base_meta:
+        return ["baseline has no meta: stack unknown"]
+    return [
+        f"{key}: baseline {base_meta[key]}, installed {meta.get(key)}"
+        for key in _STACK_KEYS
+        if key in base_meta and base_meta[key] != meta.get(key)
+    ]
+
+
+def _direction(metric: str) -> int:
+    """+1 higher is better, -1 lower is better, 0 informational."""
+    if metric.endswith("_per_s"):
+        return 1
+    if metric.endswith(("_ns", "_us", "_ms", "_per_packet")):
+        return -1
+    return 0
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Human-readable regressions of *current* against *baseline*."""
+    regressions = []
+    for bench, metrics in baseline.get("results", {}).items():
+        for metric, base in metrics.items():
+            now = current.get("results", {}).get(bench, {}).get(metric)
+            sign = _direction(metric)
+            if now is None or not sign or not isinstance(base, (int, float)) or base <= 0:
+                continue
+            change = (now - base) / base * sign  # negative = worse
+            if change < -tolerance:
+                regressions.append(f"{bench}.{metric}: {base} -> {now} ({change:+.0%})")
+    for bench, floor in MIN_SPEEDUP.items():
+        now = current.get("results", {}).get(bench, {}).get("speedup")
+        if now is not None and now < floor:
+            regressions.append(f"{bench}.speedup: {now} below the required {floor}x")
+    return regressions
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser("pcqng benchmark suite")
+    parser.add_argument("--samples", type=int, default=20_000)
+    parser.add_argument("--no-e2e", action="store_true", help="skip the real-time server benchmark")
+    parser.add_argument("--e2e-seconds", type=float, default=3.0)
+    parser.add_argument("--out", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, nargs="?", const=BASELINE_PATH, help="baseline to check against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    if baseline is not None:
+        mismatch = stack_mismatch({"meta": run_meta()}, baseline)
+        if mismatch:
+            for line in mismatch:
+                print(f"STACK MISMATCH {line}", file=sys.stderr)
+            print("not comparing; re-record the baseline on this stack", file=sys.stderr)
+            return 2
+
+    report = run(args.samples, not args.no_e2e, args.e2e_seconds)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n")
+    if args.update_baseline:
+        BASELINE_PATH.write_text(text + "\n")
+    if not args.out and not args.update_baseline:
+        print(text)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
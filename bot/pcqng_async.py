@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+"""asyncio access to PCQNG bytes.
+
+``pcqng_byte_stream()`` blocks its caller for every 1 ms tick and yields
+single ints, which stalls an event loop.  Here one shared background
+thread runs the generator into a ``ByteRing`` and signals an
+``AsyncEntropyFeed``; consumers iterate::
+
+    async for chunk in pcqng_stream(chunk_size=64):
+        ...
+
+Each chunk is a ``bytes`` object of exactly *chunk_size* bytes.  Any
+number of concurrent consumers may iterate; they are served FIFO and each
+receives a distinct slice of the stream – no byte is handed out twice.
+Cancelling a consumer task (or breaking out of the loop) releases its
+place in the queue immediately.
+
+A process that already runs a generator thread (the mini-app's
+``_pcqng_worker``) passes its own feed – ``pcqng_stream(feed=...)`` –
+so consumers share that sampler instead of starting a second 1 ms one.
+
+Scott Wilber justification: consumers read the corrected packets as
+produced; the async layer adds no mixing or whitening.
+"""
+
+import threading
+from typing import Any, AsyncIterator, Callable
+
+from bot.entropy_ring import AsyncEntropyFeed, ByteRing
+from bot.pcqng import PcqngRng
+from bot.pcqng_timer import PCQNG_TICK_S, MilliTimer
+
+__all__ = ["SharedPcqngGenerator", "get_shared_generator", "pcqng_stream"]
+
+
+class SharedPcqngGenerator:
+    """One generator thread feeding any number of asyncio consumers.
+
+    *rng_factory* builds the object to tick (anything with ``step()`` and
+    ``read_packets()``: ``PcqngRng``, ``PcqngPool``); it is called on the
+    generator thread so per-thread timing sources bind to that thread.
+    """
+
+    def __init__(
+        self,
+        rng_factory: Callable[[], Any] = PcqngRng,
+        capacity: int = 1 << 20,
+        period_s: float = PCQNG_TICK_S,
+    ) -> None:
+        self.ring = ByteRing(capacity)
+        self.feed = AsyncEntropyFeed(self.ring.read)
+        self._factory = rng_factory
+        self._period = period_s
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> "SharedPcqngGenerator":
+        """Start the thread if it is not already running (idempotent)."""
+        with self._lock:
+            if not self.running:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="pcqng-shared", daemon=True)
+                self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        rng = self._factory()
+        timer = MilliTimer(period_s=self._period, spin_s=0.0)  # jitter is the signal
+        try:
+            while not self._stop.is_set():
+                rng.step()
+                packets = rng.read_packets()
+                if packets:
+                    self.ring.write(b"".join(packets))
+                    self.feed.notify()
+                timer.wait()
+        finally:
+            stop = getattr(rng, "stop", None)  # PcqngPool owns processes
+            if stop is not None:
+                stop()
+
+
+_shared: SharedPcqngGenerator | None = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_generator() -> SharedPcqngGenerator:
+    """Process-wide generator used by :func:`pcqng_stream` by default."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = SharedPcqngGenerator()
+        return _shared
+
+
+async def pcqng_stream(
+    chunk_size: int = 68,
+    generator: SharedPcqngGenerator | None = None,
+    feed: AsyncEntropyFeed | None = None,
+) -> AsyncIterator[bytes]:
+    """Yield *chunk_size*-byte chunks from the shared PCQNG generator.
+
+    With *feed* the chunks come from that existing feed and no generator
+    thread is started; otherwise from *generator* (default: the
+    process-wide one), started on first use.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if feed is not None and generator is not None:
+        raise ValueError("pass either generator or feed, not both")
+    if feed is None:
+        feed = (generator or get_shared_generator()).start().feed
+    while True:
+        yield await feed.read(chunk_size)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+"""Selectable high-resolution timestamp sources for PCQNG on Linux.
+
+The C++ reference samples ``QueryThreadCycleTime``; on Linux the nearest
+candidates are the POSIX clocks below.  Which one yields the most usable
+jitter depends on the host (TSC vs. HPET/ACPI clocksource, VM steal,
+kernel accounting), so unless ``PCQNG_CLOCK`` names a source a short
+start-up micro-benchmark (~0.5 s, once per process) measures each:
+
+* **call overhead** – mean cost of one back-to-back read;
+* **resolution** – ``clock_getres`` (``get_clock_info`` for
+  ``perf_counter``), else the smallest non-zero step between reads;
+* **delta statistics** – mean / stdev of deltas at the canonical 1 ms
+  tick, i.e. the exact quantity ``PcqngCore`` quantises.  All candidates
+  are read back to back on the *same* ticks, so they see the same wake-up
+  jitter and differ only by their own behaviour.
+
+The source with the highest estimated jitter entropy per tick,
+``log2(σ·√(2πe) / resolution)`` (a Gaussian quantised at the clock's
+resolution), wins; sources within ``_TIE_BITS`` of it count as equal and
+the earlier one in preference order is taken, so reruns agree.  If no
+candidate is usable :data:`DEFAULT_SOURCE` is read.  ``PcqngPool``
+resolves the choice in the parent and hands the chosen name to its
+workers, so they do not benchmark again.  :func:`clock_report` only
+describes a choice this process already made – it never benchmarks, so
+it is safe to call from a request handler.
+
+Scott Wilber justification: the benchmark only chooses *which* counter is
+read; no sample it takes is reused as entropy.
+"""
+
+import functools
+import math
+import os
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+__all__ = [
+    "CLOCK_ENV",
+    "DEFAULT_SOURCE",
+    "available_sources",
+    "benchmark_source",
+    "benchmark_sources",
+    "selected_name",
+    "select_source",
+    "clock_report",
+]
+
+CLOCK_ENV = "PCQNG_CLOCK"
+DEFAULT_SOURCE = "perf_counter"
+
+Reader = Callable[[], int]
+
+# name → POSIX clock id attribute on the time module (None = perf_counter_ns)
+_CANDIDATES = {
+    "monotonic_raw": "CLOCK_MONOTONIC_RAW",
+    "monotonic": "CLOCK_MONOTONIC",
+    "thread_cputime": "CLOCK_THREAD_CPUTIME_ID",
+    "perf_counter": None,
+}
+
+_OVERHEAD_CALLS = 5_000
+_PACED_SAMPLES = 250       # σ of 250 deltas is good to ~4.5 %, i.e. 0.06 bit
+_TIE_BITS = 0.25
+_MAX_OVERHEAD_NS = 20_000  # a reader this slow would dominate the 1 ms tick
+
+_active: Dict[str, Any] | None = None  # selection this process samples from
+
+
+def available_sources() -> Dict[str, Reader]:
+    """Readers usable on this interpreter/kernel, in preference order."""
+    out: Dict[str, Reader] = {}
+    for name, attr in _CANDIDATES.items():
+        if attr is None:
+            out[name] = time.perf_counter_ns
+            continue
+        clk = getattr(time, attr, None)
+        if clk is None or not hasattr(time, "clock_gettime_ns"):
+            continue
+        try:
+            time.clock_gettime_ns(clk)
+        except OSError:
+            continue
+        out[name] = functools.partial(time.clock_gettime_ns, clk)
+    return out
+
+
+def _getres_ns(name: str) -> float | None:
+    if name not in _CANDIDATES:
+        return None
+    attr = _CANDIDATES[name]
+    try:
+        if attr is None:
+            return time.get_clock_info("perf_counter").resolution * 1e9
+        if not hasattr(time, "clock_getres"):
+            return None
+        return time.clock_getres(getattr(time, attr)) * 1e9
+    except OSError:
+        return None
+
+
+def benchmark_sources(
+    readers: Dict[str, Reader],
+    overhead_calls: int = _OVERHEAD_CALLS,
+    paced_samples: int = _PACED_SAMPLES,
+    period_s: float = 0.001,
+) -> List[Dict[str, Any]]:
+    """Measure several readers; see the module docstring for the metrics."""
+    names = list(readers)
+    # Deltas at the PCQNG tick (plain sleep: the wake-up jitter is the
+    # signal), every reader sampled on each tick
+    paced = np.empty((len(names), paced_samples + 1), dtype=np.int64)
+    for i in range(paced_samples + 1):
+        for k, name in enumerate(names):
+            paced[k, i] = readers[name]()
+        time.sleep(period_s)
+
+    results = []
+    for k, name in enumerate(names):
+        reader = readers[name]
+        # Call overhead and smallest step from back-to-back reads
+        back = np.empty(overhead_calls, dtype=np.int64)
+        t0 = time.perf_counter_ns()
+        for i in range(overhead_calls):
+            back[i] = reader()
+        overhead_ns = (time.perf_counter_ns() - t0) / overhead_calls
+        steps = np.diff(back)
+        positive = steps[steps > 0]
+        min_step = float(positive.min()) if len(positive) else None
+        getres = _getres_ns(name)
+        resolution = getres or min_step
+
+        deltas = np.diff(paced[k]).astype(np.float64)
+        mean = float(deltas.mean())
+        std = float(deltas.std(ddof=1)) if len(deltas) > 1 else 0.0
+
+        entropy = None
+        if resolution and std > 0:
+            entropy = max(0.0, math.log2(std * math.sqrt(2 * math.pi * math.e) / resolution))
+        usable = (
+            overhead_ns <= _MAX_OVERHEAD_NS
+            and bool((steps >= 0).all())          # monotonic
+            and bool((deltas > 0).all())          # advances across ticks
+            and entropy is not None
+        )
+        results.append({
+            "name": name,
+            "overhead_ns": round(overhead_ns, 1),
+            "resolution_ns": resolution,
+            "getres_ns": getres,
+            "min_step_ns": min_step,
+            "delta_mean_ns": round(mean, 1),
+            "delta_std_ns": round(std, 1),
+            "delta_cv": round(std / mean, 5) if mean else None,
+            "entropy_bits_est": round(entropy, 3) if entropy is not None else None,
+            "usable": usable,
+        })
+    return results
+
+
+def benchmark_source(name: str, reader: Reader, **kwargs: Any) -> Dict[str, Any]:
+    """:func:`benchmark_sources` for a single reader."""
+    return benchmark_sources({name: reader}, **kwargs)[0]
+
+
+def _rank(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Usable results, best first; near-ties keep preference order."""
+    ok = [r for r in results if r["usable"]]
+    if not ok:
+        return []
+    floor = max(r["entropy_bits_est"] for r in ok) - _TIE_BITS
+    return sorted(ok, key=lambda r: (0.0,) if r["entropy_bits_est"] >= floor else (1.0, -r["entropy_bits_est"]))
+
+
+@functools.lru_cache(maxsize=None)
+def _selection(override: str | None) -> Dict[str, Any]:
+    sources = available_sources()
+    if override and override != "auto":
+        if override not in sources:
+            raise ValueError(
+                f"{CLOCK_ENV}={override!r} is not available here; choose from {sorted(sources)} or 'auto'"
+            )
+        return {"selected": override, "reason": "override", "candidates": []}
+    results = benchmark_sources(sources)
+    ranked = _rank(results)
+    return {
+        "selected": ranked[0]["name"] if ranked else DEFAULT_SOURCE,
+        "reason": "benchmark" if ranked else "fallback",
+        "candidates": results,
+    }
+
+
+def selected_name(override: str | None = None) -> str:
+    """Name of the source :func:`select_source` returns.
+
+    *override* defaults to ``$PCQNG_CLOCK``: a source name forces that
+    source, unset or ``"auto"`` benchmarks (once per process).
+    """
+    global _active
+    if override is None:
+        override = os.environ.get(CLOCK_ENV)
+    _active = _selection(override)
+    return _active["selected"]
+
+
+def select_source(override: str | None = None) -> Reader:
+    """Reader for :func:`selected_name`."""
+    return available_sources()[selected_name(override)]
+
+
+def clock_report() -> Dict[str, Any] | None:
+    """Chosen source, why, and – after a benchmark – every candidate's metrics.
+
+    None until this process has selected a source: an API worker reading
+    a shared ring samples no clock, and reporting one here would mean
+    benchmarking inside its event loop.
+    """
+    if _active is None:
+        return None
+    return dict(_active, host=os.uname().nodename if hasattr(os, "uname") else None)
+
+
+if __name__ == "__main__":
+    import json
+
+    selected_name()
+    print(json.dumps(clock_report(), indent=2))
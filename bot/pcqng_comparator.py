@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+"""Batched PRD-vs-target comparator with psi modes (``PrdComparator``).
+
+Port of ``temporal_rng/PrdComparator.{hpp,cpp}``.  ``GenPrdResult``
+pairs *count* PRD outputs with *count* ±1 targets; which targets depends
+on the psi mode:
+
+* ``PSI_NOTARGETS`` (0) – every target is +1, no target words are read;
+* ``PSI_PSYCHOKINESIS`` (1) – every target is +1, but target words are
+  still drawn (and discarded) so the target generator keeps its pace;
+* ``PSI_CLAIRVOYANCE`` (2) – targets come from a 1000-entry ring filled
+  at construction; each trial reads the oldest entry and replaces it
+  with a fresh target bit, so every target existed 1000 trials before
+  the output it is compared with;
+* ``PSI_PRECOGNITION`` (3) – targets are drawn from the precognition
+  stream, after the outputs they are compared with;
+* ``PSI_COHERENCE`` (4) – the C++ leaves ``targetData`` unwritten and
+  the DLL API never selects it.  Here the target is the sign of the
+  autocorrelation channel's output (``prd_ac``), so a hit means the two
+  channels agree.
+
+Target words carry seven targets, bit 6 first (``2·bit − 1``); as in the
+C++ the bit position restarts at 6 on every call, so a call of *count*
+trials reads ``ceil(count / 7)`` words.  The whole call is array work:
+words are expanded to bits with one table gather, the clairvoyance ring
+shifts by concatenation, and the per-mode hit tallies are updated with
+one sum per call, whatever *count* is.
+
+A trial is a hit when output and target have the same sign; outputs of
+exactly 0 (and coherence targets of 0) are not scored.
+
+Scott Wilber justification: targets are drawn in the original order and
+quantity – no target bit is skipped, reused or read early.
+"""
+
+import math
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from bot.pcqng_zstats import z_to_p
+
+__all__ = [
+    "PSI_NOTARGETS",
+    "PSI_PSYCHOKINESIS",
+    "PSI_CLAIRVOYANCE",
+    "PSI_PRECOGNITION",
+    "PSI_COHERENCE",
+    "PSI_MODES",
+    "TARGET_RING_SIZE",
+    "HitTally",
+    "ArrayTargetSource",
+    "PrdComparator",
+]
+
+# PrdComparator::PsiMode
+PSI_NOTARGETS = 0
+PSI_PSYCHOKINESIS = 1
+PSI_CLAIRVOYANCE = 2
+PSI_PRECOGNITION = 3
+PSI_COHERENCE = 4
+PSI_MODES = {
+    PSI_NOTARGETS: "notargets",
+    PSI_PSYCHOKINESIS: "psychokinesis",
+    PSI_CLAIRVOYANCE: "clairvoyance",
+    PSI_PRECOGNITION: "precognition",
+    PSI_COHERENCE: "coherence",
+}
+
+TARGET_RING_SIZE = 1000   # prdTargets_[1000]
+_TARGET_BITS = 7
+
+# ±1 target for each of the 7 bits of a word, bit 6 first
+_WORD_TARGETS = (((np.arange(256)[:, None] >> np.arange(_TARGET_BITS - 1, -1, -1)) & 1) * 2 - 1).astype(np.int8)
+
+
+def _targets(words: np.ndarray, count: int) -> np.ndarray:
+    """First *count* targets of *words*, seven per word."""
+    return _WORD_TARGETS[np.asarray(words, dtype=np.uint8)].ravel()[:count]
+
+
+def _draw(source: Any, n: int, precog: bool) -> np.ndarray:
+    """*n* target words from *source* – in one call if it supports batches."""
+    batch = getattr(source, "next_precog_targets" if precog else "next_targets", None)
+    if batch is not None:
+        words = np.asarray(batch(n), dtype=np.uint8)
+        if len(words) != n:
+            raise RuntimeError(f"target source returned {len(words)} words, expected {n}")
+        return words
+    single = source.get_next_precog_target if precog else source.get_next_target
+    return np.fromiter((single() for _ in range(n)), dtype=np.uint8, count=n)
+
+
+def _take(prd: Any, count: int) -> np.ndarray:
+    """*count* outputs of a PRD generator (``take(n)`` if it has one)."""
+    take = getattr(prd, "take", None)
+    if take is not None:
+        return np.asarray(take(count), dtype=np.float64)
+    return np.fromiter((prd.generate() for _ in range(count)), dtype=np.float64, count=count)
+
+
+class HitTally:
+    """Running hit count for one psi mode; O(1) state, O(1) per update."""
+
+    __slots__ = ("trials", "hits")
+
+    def __init__(self) -> None:
+        self.trials = 0
+        self.hits = 0
+
+    def add(self, trials: int, hits: int) -> None:
+        self.trials += trials
+        self.hits += hits
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.trials if self.trials else 0.5
+
+    @property
+    def z(self) -> float:
+        """Binomial z-score of the hits against chance (0.5)."""
+        return (self.hits - self.trials / 2) / math.sqrt(self.trials / 4) if self.trials else 0.0
+
+    @property
+    def p(self) -> float:
+        """One-sided p-value of the hit rate exceeding chance."""
+        return float(1.0 - z_to_p(self.z, exact=True))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"trials": self.trials, "hits": self.hits, "hit_rate": self.hit_rate, "z": self.z, "p": self.p}
+
+
+class ArrayTargetSource:
+    """Target source over pre-generated word arrays (replays, tests)."""
+
+    def __init__(self, words: Any, precog_words: Any = None) -> None:
+        self._words = np.asarray(words, dtype=np.uint8)
+        self._precog = self._words if precog_words is None else np.asarray(precog_words, dtype=np.uint8)
+        self._pos = self._precog_pos = 0
+
+    def next_targets(self, n: int) -> np.ndarray:
+        if self._pos + n > len(self._words):
+            raise RuntimeError("target words exhausted")
+        self._pos += n
+        return self._words[self._pos - n:self._pos]
+
+    def next_precog_targets(self, n: int) -> np.ndarray:
+        if self._precog_pos + n > len(self._precog):
+            raise RuntimeError("precognition target words exhausted")
+        self._precog_pos += n
+        return self._precog[self._precog_pos - n:self._precog_pos]
+
+    def get_next_target(self) -> int:
+        return int(self.next_targets(1)[0])
+
+    def get_next_precog_target(self) -> int:
+        return int(self.next_precog_targets(1)[0])
+
+
+class PrdComparator:
+    """Batch ``PrdComparator``: PRD outputs and targets, *count* at a time.
+
+    *prd* (and optional *prd_ac*) are PRD generators – anything with
+    ``generate()``, or ``take(n)`` for whole batches – and are only
+    needed by :meth:`gen_prd_result`; :meth:`compare` scores outputs the
+    caller already has (e.g. from ``BoundedWalkGen.process``).  *targets*
+    provides ``get_next_target()`` / ``get_next_precog_target()``, or
+    ``next_targets(n)`` / ``next_precog_targets(n)`` for batches.
+    """
+
+    def __init__(
+        self,
+        targets: Any,
+        prd: Any = None,
+        psi_mode: int = PSI_PSYCHOKINESIS,
+        prd_ac: Any = None,
+    ) -> None:
+        self.targets = targets
+        self.prd = prd
+        self.prd_ac = prd_ac
+        self.set_psi_mode(psi_mode)
+        self.tallies = {mode: HitTally() for mode in PSI_MODES}
+        # Prefill: one continuous bit sequence across words (1001 bits, last unused)
+        n_words = -(-TARGET_RING_SIZE // _TARGET_BITS)
+        self._ring = _targets(_draw(targets, n_words, precog=False), TARGET_RING_SIZE)
+
+    def set_psi_mode(self, psi_mode: int) -> None:
+        if psi_mode not in PSI_MODES:
+            raise ValueError(f"psi_mode must be one of {sorted(PSI_MODES)}")
+        self.psi_mode = psi_mode
+
+    def set_prd_ac_gen(self, prd_ac: Any) -> None:
+        self.prd_ac = prd_ac
+
+    # ------------------------------------------------------------------
+    def _target_data(self, count: int, ac: Optional[np.ndarray]) -> np.ndarray:
+        mode = self.psi_mode
+        n_words = -(-count // _TARGET_BITS)
+        if mode == PSI_NOTARGETS:
+            return np.ones(count)
+        if mode == PSI_PSYCHOKINESIS:
+            _draw(self.targets, n_words, precog=False)
+            return np.ones(count)
+        if mode == PSI_PRECOGNITION:
+            return _targets(_draw(self.targets, n_words, precog=True), count).astype(np.float64)
+        if mode == PSI_CLAIRVOYANCE:
+            fresh = _targets(_draw(self.targets, n_words, precog=False), count)
+            ordered = np.concatenate([self._ring, fresh])
+            self._ring = ordered[count:count + TARGET_RING_SIZE]
+            return ordered[:count].astype(np.float64)
+        if ac is None:
+            raise ValueError("coherence mode needs the autocorrelation channel (prd_ac)")
+        return np.sign(ac)
+
+    def compare(self, psi: Any, ac: Any = None) -> np.ndarray:
+        """Targets for the PRD outputs *psi*; updates the mode's tally.
+
+        *ac* is the autocorrelation channel's outputs for the same trials
+        (required in coherence mode only).  Target words are drawn as
+        ``GenPrdResult`` would for ``len(psi)`` trials.
+        """
+        psi = np.asarray(psi, dtype=np.float64)
+        ac = None if ac is None else np.asarray(ac, dtype=np.float64)
+        if ac is not None and ac.shape != psi.shape:
+            raise ValueError("ac must have one output per psi output")
+        target = self._target_data(len(psi), ac)
+        agree = np.sign(psi) * target
+        self.tallies[self.psi_mode].add(int(np.count_nonzero(agree)), int(np.count_nonzero(agree > 0)))
+        return target
+
+    def gen_prd_result(self, count: int) -> Tuple[np.ndarray, np.ndarray]:
+        """``GenPrdResult``: *count* outputs from the generators and their targets.
+
+        The outputs come back in the C++ layout – bias channel first,
+        followed by the autocorrelation channel when ``prd_ac`` is set.
+        """
+        if count < 0:
+            raise ValueError("count must be non-negative")
+        if self.prd is None:
+            raise RuntimeError("no PRD generator attached; use compare()")
+        psi = _take(self.prd, count)
+        ac = _take(self.prd_ac, count) if self.prd_ac is not None else None
+        target = self.compare(psi, ac)
+        return (psi if ac is None else np.concatenate([psi, ac])), target
+
+    def reset_tallies(self) -> None:
+        for tally in self.tallies.values():
+            tally.trials = tally.hits = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "psi_mode": PSI_MODES[self.psi_mode],
+            "tallies": {PSI_MODES[m]: t.as_dict() for m, t in self.tallies.items()},
+        }
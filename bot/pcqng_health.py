@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+"""Always-on PCQNG health tests (NIST SP 800-90B §4.4 style).
+
+Three continuous tests run on every sample, each O(1) per sample and
+evaluated batch-wise with NumPy so they keep up with ``step_many``:
+
+* **Repetition Count Test** – alarm when one value repeats ``C`` times in
+  a row, ``C = 1 + ⌈α_exp / H⌉`` (false-alarm rate 2^-α_exp at min-entropy
+  *H* bits/sample);
+* **Adaptive Proportion Test** – alarm when the first value of a
+  ``W``-sample window recurs ``C`` times within it, ``C`` the binomial
+  critical value for p = 2^-H;
+* **Bias EWMA** – exponentially weighted mean of a per-sample statistic
+  (parity bit of eBits, popcount of packet bytes) against its ideal value,
+  alarm beyond ``bias_sigma`` EWMA standard deviations.
+
+Any alarm *quarantines* the monitor; it is released after
+``recover_after`` consecutive samples pass every test.  ``PcqngRng``
+withholds packets while its monitor is quarantined, so a stuck or
+degraded timing source stops filling consumer buffers.
+
+Scott Wilber justification: tests only observe the stream – nothing is
+whitened to make a failing source look healthy.
+"""
+
+import math
+from typing import Any, Dict, Iterable
+
+import numpy as np
+
+__all__ = ["HealthMonitor", "PcqngHealth", "HEALTH_MODES", "DEFAULT_HEALTH_MODE", "critical_binomial"]
+
+HEALTH_MODES = ("off", "monitor", "quarantine")
+# Entry-point default: a failing source stops filling consumer buffers
+DEFAULT_HEALTH_MODE = "quarantine"
+
+_PARITY = np.array([bin(v).count("1") & 1 for v in range(256)], dtype=np.float64)
+_POPCOUNT7 = np.array([bin(v & 0x7F).count("1") for v in range(256)], dtype=np.float64)
+
+
+def critical_binomial(n: int, p: float, alpha: float) -> int:
+    """Smallest k with P(X > k) <= alpha for X ~ Binomial(n, p)."""
+    log_p, log_q = math.log(p), math.log1p(-p)
+    cdf = 0.0
+    for k in range(n + 1):
+        cdf += math.exp(
+            math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+            + k * log_p + (n - k) * log_q
+        )
+        if 1.0 - cdf <= alpha:
+            return k
+    return n
+
+
+class HealthMonitor:
+    """RCT + APT + bias EWMA over one stream of byte-valued samples."""
+
+    def __init__(
+        self,
+        name: str,
+        h_min: float,
+        bias_table: np.ndarray,
+        bias_mean: float,
+        bias_std: float,
+        alpha_exp: int = 20,
+        apt_window: int = 512,
+        bias_alpha: float = 1 / 1024,
+        bias_sigma: float = 6.0,
+        recover_after: int = 4096,
+    ) -> None:
+        self.name = name
+        self.h_min = h_min
+        self.rct_cutoff = 1 + math.ceil(alpha_exp / h_min)
+        self.apt_window = apt_window
+        self.apt_cutoff = 1 + critical_binomial(apt_window, 2.0 ** -h_min, 2.0 ** -alpha_exp)
+        self._bias_table = bias_table
+        self._bias_mean = bias_mean
+        self._bias_alpha = bias_alpha
+        self.bias_limit = bias_sigma * bias_std * math.sqrt(bias_alpha / (2 - bias_alpha))
+        self.recover_after = recover_after
+
+        self._rct_value = -1
+        self._rct_run = 0
+        self._apt_ref = -1
+        self._apt_count = 0
+        self._apt_pos = 0
+        self._bias = bias_mean
+
+        self.samples = 0
+        self.quarantined = False
+        self._clean = 0
+        self.alarms = {"rct": 0, "apt": 0, "bias": 0}
+        self.last_alarm: str | None = None
+
+    # ------------------------------------------------------------------
+    @classmethod
+    def for_ebits(cls, h_min: float = 0.5, **kw: Any) -> "HealthMonitor":
+        """Raw eBits; bias is the parity bit that feeds the LFSR corrector."""
+        return cls("ebits", h_min, _PARITY, 0.5, 0.5, **kw)
+
+    @classmethod
+    def for_packets(cls, h_min: float = 4.0, **kw: Any) -> "HealthMonitor":
+        """Corrected 7-bit packet bytes; bias is the per-byte popcount."""
+        kw.setdefault("bias_alpha", 1 / 4096)
+        return cls("packets", h_min, _POPCOUNT7, 3.5, math.sqrt(7) / 2, **kw)
+
+    @property
+    def ok(self) -> bool:
+        return not self.quarantined
+
+    # ------------------------------------------------------------------
+    def feed(self, samples: Any) -> bool:
+        """Run the tests over *samples* (bytes or uint8 array); return ``ok``."""
+        x = np.frombuffer(samples, dtype=np.uint8) if isinstance(samples, (bytes, bytearray)) \
+            else np.asarray(samples, dtype=np.uint8)
+        n = len(x)
+        if not n:
+            return self.ok
+        failed = [name for name, hit in (
+            ("rct", self._rct(x)), ("apt", self._apt(x)), ("bias", self._ewma(x))
+        ) if hit]
+        self.samples += n
+        if failed:
+            for name in failed:
+                self.alarms[name] += 1
+            self.last_alarm = ",".join(failed)
+            self.quarantined = True
+            self._clean = 0
+        elif self.quarantined:
+            self._clean += n
+            if self._clean >= self.recover_after:
+                self.quarantined = False
+        return self.ok
+
+    def _rct(self, x: np.ndarray) -> bool:
+        change = x[1:] != x[:-1]
+        if change.all():  # common case: no repeats inside the batch
+            run = 1 + (self._rct_run if x[0] == self._rct_value else 0)
+            self._rct_value = int(x[-1])
+            self._rct_run = run if len(x) == 1 else 1
+            return run >= self.rct_cutoff
+        starts = np.flatnonzero(change) + 1
+        runs = np.diff(np.concatenate(([0], starts, [len(x)])))
+        if x[0] == self._rct_value:
+            runs[0] += self._rct_run
+        self._rct_value = int(x[-1])
+        self._rct_run = int(runs[-1])
+        return int(runs.max()) >= self.rct_cutoff
+
+    def _apt(self, x: np.ndarray) -> bool:
+        hit = False
+        i, n, w = 0, len(x), self.apt_window
+        while i < n:
+            if self._apt_pos == 0:
+                self._apt_ref = int(x[i])
+            seg = x[i:i + w - self._apt_pos]
+            self._apt_count = (self._apt_count if self._apt_pos else 0) + int(np.count_nonzero(seg == self._apt_ref))
+            hit |= self._apt_count >= self.apt_cutoff
+            self._apt_pos = (self._apt_pos + len(seg)) % w
+            i += len(seg)
+        return hit
+
+    def _ewma(self, x: np.ndarray) -> bool:
+        v = self._bias_table[x]
+        decay = 1.0 - self._bias_alpha
+        weights = self._bias_alpha * decay ** np.arange(len(v) - 1, -1, -1, dtype=np.float64)
+        self._bias = self._bias * decay ** len(v) + float(weights @ v)
+        # Only judge once the EWMA has seen ~its own time constant
+        return self.samples + len(v) >= 1 / self._bias_alpha and abs(self._bias - self._bias_mean) > self.bias_limit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "samples": self.samples,
+            "alarms": dict(self.alarms),
+            "last_alarm": self.last_alarm,
+            "bias": round(self._bias, 5),
+            "bias_expected": self._bias_mean,
+            "bias_limit": round(self.bias_limit, 5),
+            "rct_cutoff": self.rct_cutoff,
+            "apt_cutoff": self.apt_cutoff,
+            "apt_window": self.apt_window,
+        }
+
+
+class PcqngHealth:
+    """eBits + packet monitors for one ``PcqngRng``.
+
+    ``enforce=False`` ("monitor" mode) records alarms without withholding
+    packets.
+    """
+
+    def __init__(
+        self,
+        enforce: bool = True,
+        ebits: HealthMonitor | None = None,
+        packets: HealthMonitor | None = None,
+    ) -> None:
+        self.enforce = enforce
+        self.ebits = ebits or HealthMonitor.for_ebits()
+        self.packets = packets or HealthMonitor.for_packets()
+        self.withheld_packets = 0
+
+    @classmethod
+    def from_mode(cls, mode: str | None) -> "PcqngHealth | None":
+        """``"off"``/None → no monitor, ``"monitor"`` or ``"quarantine"``."""
+        mode = mode or "off"
+        if mode not in HEALTH_MODES:
+            raise ValueError(f"health mode must be one of {HEALTH_MODES}, got {mode!r}")
+        return None if mode == "off" else cls(enforce=mode == "quarantine")
+
+    @property
+    def ok(self) -> bool:
+        return self.ebits.ok and self.packets.ok
+
+    def admit(self, ebits: Any, packets: Iterable[bytes]) -> bool:
+        """Test a batch; True if its packets may be released."""
+        packets = list(packets)
+        self.ebits.feed(ebits)
+        if packets:
+            self.packets.feed(b"".join(packets))
+        if self.enforce and not self.ok:
+            self.withheld_packets += len(packets)
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "enforce": self.enforce,
+            "withheld_packets": self.withheld_packets,
+            "ebits": self.ebits.stats(),
+            "packets": self.packets.stats(),
+        }
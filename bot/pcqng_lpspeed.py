@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+"""Table-driven low-pass filter over ±1 bit streams (``LpSpeedFilter``).
+
+Port of ``temporal_rng/LpSpeedFilter.{hpp,cpp}``.  The C++ feeds every
+17-bit pattern – oldest bit in bit 16, newest in bit 0, each mapped to
+±1 – through a fresh ``LpFilter`` of constant length and stores the final
+value, so a filter over a bit stream becomes one lookup per sample
+instead of a division::
+
+    value(t) = LookUp[word(t) & 0x1FFFF]
+
+where ``word`` is the shift register of the stream's bits.  The result
+equals the exact filter with its history truncated to 17 samples; the
+discarded tail weighs ``(1 - 1/length)**17`` of the older value (≈18 %
+for the canonical ``FilterCoef`` 10.508332).
+
+The table is built with the same float64 operations as the C++ loop –
+vectorised across all 2¹⁷ patterns – and stored as float32, so entries
+are bit-identical to the original.  ``filter_bits`` is the batch path:
+sliding 17-bit words for a whole bit array (or several channels at once)
+and a single fancy-indexing gather.
+
+Note: ``PcqngCore``'s adaptive LPF is *not* table-driven – its input is
+the continuous timing delta and its length depends on its own previous
+output, so the original (and ``bot.pcqng``) keep the scalar recurrence.
+
+Scott Wilber justification: LookUp is the canonical filter, evaluated
+ahead of time; no value differs from what LpFilter would have produced
+over the same 17-bit window.
+"""
+
+from typing import Any
+
+import numpy as np
+
+__all__ = ["LP_WINDOW_BITS", "LP_TABLE_SIZE", "build_lookup", "LpSpeedFilter"]
+
+LP_WINDOW_BITS = 17
+LP_TABLE_SIZE = 1 << LP_WINDOW_BITS
+_WORD_MASK = LP_TABLE_SIZE - 1
+
+
+def build_lookup(filt_const: float) -> np.ndarray:
+    """``LpSpeedFilter::Init``: float32 table of 2¹⁷ filter outputs."""
+    if not filt_const > 0:
+        raise ValueError("filt_const must be positive")
+    idx = np.arange(LP_TABLE_SIZE, dtype=np.int64)
+    value = np.zeros(LP_TABLE_SIZE, dtype=np.float64)   # lpFilter.Init(0)
+    for j in range(LP_WINDOW_BITS - 1, -1, -1):
+        new_val = ((idx >> j) & 1) * 2.0 - 1.0
+        value += (new_val - value) / filt_const          # LpFilter::Feed
+    return value.astype(np.float32)
+
+
+class LpSpeedFilter:
+    """Precomputed constant-length LPF over the last 17 bits of a stream.
+
+    ``filter_amp`` divides every output, as ``BpZAnalogFlipMultiPrd``
+    does with ``filterAmplitude_``: the float entry is promoted to double
+    before the division, so outputs are float64 (exactly the table value
+    when ``filter_amp`` is 1.0).
+    """
+
+    def __init__(self, filt_const: float, filter_amp: float = 1.0) -> None:
+        if not filter_amp > 0:
+            raise ValueError("filter_amp must be positive")
+        self.filt_const = float(filt_const)
+        self.filter_amp = float(filter_amp)
+        self.table = build_lookup(filt_const)
+        self._scaled = self.table.astype(np.float64) / self.filter_amp
+
+    def lookup(self, words: Any) -> Any:
+        """Filter value for shift-register word(s) (newest bit = bit 0)."""
+        if isinstance(words, (int, np.integer)):
+            return float(self._scaled[int(words) & _WORD_MASK])
+        return self._scaled[np.asarray(words, dtype=np.int64) & _WORD_MASK]
+
+    @staticmethod
+    def words(bits: Any, history: Any = 0) -> np.ndarray:
+        """Shift-register word after each bit of *bits* (last axis = time).
+
+        *history* is the register content before the first bit (one int
+        per channel for 2-D input); the C++ starts from zero.
+        """
+        b = np.asarray(bits, dtype=np.int64) & 1
+        hist = np.asarray(history, dtype=np.int64)
+        lead = (hist[..., None] >> np.arange(LP_WINDOW_BITS - 2, -1, -1)) & 1
+        lead = np.broadcast_to(lead, b.shape[:-1] + (LP_WINDOW_BITS - 1,))
+        padded = np.concatenate([lead, b], axis=-1)
+        windows = np.lib.stride_tricks.sliding_window_view(padded, LP_WINDOW_BITS, axis=-1)
+        weights = 1 << np.arange(LP_WINDOW_BITS - 1, -1, -1, dtype=np.int64)
+        return windows @ weights
+
+    def filter_bits(self, bits: Any, history: Any = 0) -> np.ndarray:
+        """Batch path: filter value after every bit, via :meth:`words`."""
+        return self._scaled[self.words(bits, history)]
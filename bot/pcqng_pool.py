@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+"""Multi-core PCQNG generator pool.
+
+Runs N independent ``PcqngRng`` instances, one per process pinned to its
+own CPU core, each paced by its own 1 ms ``MilliTimer``.  Their corrected
+packets are merged with the loss-less alternating-bit interleaver of
+canon.yaml › entropy_and_rng › sources › ``MIXED`` (a1 b1 c1 a2 b2 c2 …)
+rather than XOR, so aggregate throughput scales with the core count and
+every source bit – including its bias – survives into the output.
+
+Scott Wilber justification: XOR-combining would whiten away exactly the
+micro-bias the PCQNG port exists to keep observable; interleaving is
+loss-less and bias preserving.
+"""
+
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Sequence
+
+import numpy as np
+
+from bot.pcqng_clocks import selected_name
+
+__all__ = ["PcqngPool", "interleave_packets"]
+
+_PACKET_BYTES = 17
+_DATA_BITS = 7           # corrected bytes carry 7 bits (MSB always 0)
+_SEND_INTERVAL_S = 0.02  # batch IPC: one message per ~20 ticks
+_HEARTBEAT_S = 1.0       # status report even when no packets are flowing
+_PENDING_PACKETS = 1 << 12  # worker-side hold while the parent queue is full
+
+# ---------------------------------------------------------------------------
+# Loss-less bit interleaver (canon MIXED)
+# ---------------------------------------------------------------------------
+
+def interleave_packets(packets: Sequence[bytes]) -> List[bytes]:
+    """Bit-interleave one packet per source into the same number of packets.
+
+    Source *k*'s i-th data bit lands at position ``i·N + k`` of the merged
+    bit stream, which is then regrouped into 7-bit bytes / 17-byte packets –
+    the same format ``PcqngRng`` produces, with no bit dropped or combined.
+    """
+    n = len(packets)
+    if n == 1:
+        return [bytes(packets[0])]
+    arr = np.frombuffer(b"".join(packets), dtype=np.uint8).reshape(n, -1)
+    bits = np.unpackbits(arr[..., None], axis=-1)[..., 8 - _DATA_BITS:]
+    merged = bits.reshape(n, -1).T.reshape(-1, _DATA_BITS)   # a1 b1 a2 b2 …
+    padded = np.zeros((len(merged), 8), dtype=np.uint8)
+    padded[:, 8 - _DATA_BITS:] = merged
+    out = np.packbits(padded, axis=-1).tobytes()
+    width = arr.shape[1]
+    return [out[i:i + width] for i in range(0, len(out), width)]
+
+# ---------------------------------------------------------------------------
+# Worker process
+# ---------------------------------------------------------------------------
+
+def _pin_to_cpu(cpu: int) -> bool:
+    """Pin the calling thread/process to *cpu*; False if unsupported."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, {cpu})
+            return True
+        if sys.platform == "win32":
+            import ctypes
+
+            k32 = ctypes.WinDLL("kernel32", use_last_error=True)
+            k32.GetCurrentThread.restype = ctypes.c_void_p
+            k32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            k32.SetThreadAffinityMask.restype = ctypes.c_size_t
+            return bool(k32.SetThreadAffinityMask(k32.GetCurrentThread(), 1 << cpu))
+    except (OSError, ValueError):
+        pass
+    return False
+
+
+def _worker_main(
+    worker_id: int,
+    cpu: int | None,
+    out_q: Any,
+    stop: Any,
+    warm_start: str | None = None,
+    health: str | None = None,
+    rt: str | None = None,
+    archive: str | None = None,
+    clock: str | None = None,
+) -> None:
+    """Process entry: tick one PcqngRng and ship packets to the parent."""
+    from bot.pcqng import PcqngRng
+    from bot.pcqng_archive import PcqngArchive
+    from bot.pcqng_clocks import select_source
+    from bot.pcqng_health import PcqngHealth
+    from bot.pcqng_sched import apply_scheduling
+    from bot.pcqng_timer import MilliTimer
+    from bot.pcqng_warmstart import WarmStart
+
+    # Health is tested per worker: a quarantined core withholds its own
+    # packets and its heartbeat takes it out of the interleave groups
+    rng = PcqngRng(
+        timestamp_source=select_source(clock) if clock else None,
+        health=PcqngHealth.from_mode(health),
+        archive=PcqngArchive(os.path.join(archive, f"w{worker_id}")) if archive else None,
+    )
+    # One snapshot per worker: each core has its own jitter profile
+    warm = WarmStart(f"{warm_start}.w{worker_id}") if warm_start else None
+    if warm is not None:
+        warm.load(rng)
+    # After PcqngRng: on win32 the cycle reader pins to CPU 0, override it
+    pinned = _pin_to_cpu(cpu) if cpu is not None else False
+    sched = apply_scheduling(rt, cpu=None) if rt else None  # already pinned
+    timer = MilliTimer(spin_s=0.0)
+
+    pending: List[bytes] = []
+    dropped = 0
+    last_send = last_beat = time.monotonic()
+    while not stop.is_set():
+        rng.step()
+        pending.extend(rng.read_packets())
+        if len(pending) > _PENDING_PACKETS:
+            # Parent far behind: shed the oldest packets, but say so
+            over = len(pending) - _PENDING_PACKETS
+            del pending[:over]
+            dropped += over
+        now = time.monotonic()
+        beat = now - last_beat >= _HEARTBEAT_S
+        if (pending and now - last_send >= _SEND_INTERVAL_S) or beat:
+            status = None
+            if beat:
+                status = dict(timer.stats(), cpu=cpu, pinned=pinned, pid=os.getpid(), dropped=dropped)
+                if rng.health is not None:
+                    status["health"] = rng.health.stats()
+                if sched is not None:
+                    status["sched"] = sched
+            # Never block the 1 ms loop: a stalled put would skew the jitter
+            # being sampled.  If the parent is behind, keep the packets and
+            # leave the heartbeat due so the next tick retries both.
+            try:
+                out_q.put_nowait((worker_id, b"".join(pending), status))
+                pending = []
+                if beat:
+                    last_beat = now
+            except queue.Full:
+                pass
+            last_send = now
+        if warm is not None:
+            warm.tick(rng)
+        timer.wait()
+    if warm is not None:
+        warm.save(rng)
+    if rng.archive is not None:
+        rng.archive.close()
+
+# ---------------------------------------------------------------------------
+# Pool
+# ---------------------------------------------------------------------------
+
+class _WorkerState:
+    def __init__(self, worker_id: int, cpu: int | None, backlog: int) -> None:
+        self.worker_id = worker_id
+        self.cpu = cpu
+        self.packets: Deque[bytes] = deque(maxlen=backlog)
+        self.total_packets = 0
+        self.dropped = 0                 # backlog overflow in the parent
+        self.started = time.monotonic()
+        self.last_seen = 0.0
+        self.status: Dict[str, Any] = {}
+
+
+class PcqngPool:
+    """N pinned PcqngRng processes merged by loss-less bit interleaving.
+
+    Mirrors the ``PcqngRng`` surface: ``step()`` drains worker output that
+    arrived since the last call (non-blocking) and ``read_packets()``
+    returns interleaved packets.  A worker silent for longer than
+    ``stall_s`` is reported unhealthy and left out of interleave groups
+    until it recovers, so one stalled core cannot stop the pool.
+
+    Buffers are bounded on both sides of the queue: a worker holds at most
+    ``_PENDING_PACKETS`` while the parent is behind and the parent keeps
+    ``backlog_packets`` per worker.  Overflow sheds the oldest packets and
+    is counted in :meth:`health` (``dropped_worker`` / ``dropped_backlog``).
+
+    With ``warm_start`` set each worker restores/saves its calibration at
+    ``<warm_start>.w<id>`` (see ``bot.pcqng_warmstart``); ``health`` is a
+    ``bot.pcqng_health`` mode and ``rt`` a ``bot.pcqng_sched`` mode, both
+    applied inside every worker; ``archive`` is a ``bot.pcqng_archive``
+    root, one ``w<id>`` subdirectory per worker.  The timestamp source
+    (``PCQNG_CLOCK``, see ``bot.pcqng_clocks``) is resolved once in
+    :meth:`start` and passed to every worker by name.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        cpus: Sequence[int] | None = None,
+        stall_s: float = 3.0,
+        backlog_packets: int = 1 << 14,
+        warm_start: str | os.PathLike | None = None,
+        health: str | None = None,
+        rt: str | None = None,
+        archive: str | os.PathLike | None = None,
+    ) -> None:
+        if cpus is None and hasattr(os, "sched_getaffinity"):
+            cpus = sorted(os.sched_getaffinity(0))
+        if cpus is None:
+            cpus = list(range(os.cpu_count() or 1))
+        self._cpus = list(cpus)
+        self._n = workers or len(self._cpus)
+        self._stall_s = stall_s
+        self._warm_start = os.fspath(warm_start) if warm_start else None
+        self._health = health
+        self._rt = rt
+        self._archive = os.fspath(archive) if archive else None
+        self._ctx = mp.get_context("spawn")  # no fork of a threaded parent
+        self._queue = self._ctx.Queue(maxsize=4 * self._n)
+        self._stop = self._ctx.Event()
+        self._procs: List[Any] = []
+        self._workers = [
+            _WorkerState(i, self._cpus[i % len(self._cpus)] if self._cpus else None, backlog_packets)
+            for i in range(self._n)
+        ]
+
+    # ------------------------------------------------------------------
+    def start(self) -> "PcqngPool":
+        # Benchmark the clocks here, once, rather than in every worker
+        clock = selected_name() if sys.platform.startswith("linux") else None
+        for w in self._workers:
+            p = self._ctx.Process(
+                target=_worker_main,
+                args=(
+                    w.worker_id, w.cpu, self._queue, self._stop, self._warm_start,
+                    self._health, self._rt, self._archive, clock,
+                ),
+                name=f"pcqng-worker-{w.worker_id}",
+                daemon=True,
+            )
+            p.start()
+            w.started = time.monotonic()
+            self._procs.append(p)
+        return self
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._stop.set()
+        for p in self._procs:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        self._procs = []
+
+    def __enter__(self) -> "PcqngPool":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    # ------------------------------------------------------------------
+    def step(self) -> None:
+        """Move every queued worker message into per-worker backlogs."""
+        now = time.monotonic()
+        while True:
+            try:
+                worker_id, blob, status = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            w = self._workers[worker_id]
+            w.last_seen = now
+            if status:
+                w.status = status
+            n = len(blob) // _PACKET_BYTES
+            w.dropped += max(0, len(w.packets) + n - w.packets.maxlen)
+            for i in range(0, len(blob), _PACKET_BYTES):
+                w.packets.append(blob[i:i + _PACKET_BYTES])
+            w.total_packets += n
+
+    def _healthy(self, w: _WorkerState, now: float) -> bool:
+        seen = w.last_seen or w.started
+        if w.status.get("health", {}).get("ok") is False and w.status["health"]["enforce"]:
+            return False  # quarantined by its own health tests
+        return now - seen <= self._stall_s
+
+    def read_packets(self) -> List[bytes]:
+        """Interleave one packet from each healthy worker per group."""
+        now = time.monotonic()
+        live = [w for w in self._workers if self._healthy(w, now)]
+        out: List[bytes] = []
+        if not live:
+            return out
+        groups = min(len(w.packets) for w in live)
+        for _ in range(groups):
+            out.extend(interleave_packets([w.packets.popleft() for w in live]))
+        return out
+
+    def health(self) -> List[Dict[str, Any]]:
+        """Per-worker liveness, packet rate and latest tick statistics."""
+        now = time.monotonic()
+        report = []
+        for w, p in zip(self._workers, self._procs or [None] * self._n):
+            elapsed = max(now - w.started, 1e-9)
+            report.append({
+                "worker": w.worker_id,
+                "cpu": w.cpu,
+                "alive": bool(p is not None and p.is_alive()),
+                "healthy": self._healthy(w, now),
+                "last_seen_s": round(now - w.last_seen, 3) if w.last_seen else None,
+                "packets": w.total_packets,
+                "bytes_per_s": round(w.total_packets * _PACKET_BYTES / elapsed, 1),
+                "backlog": len(w.packets),
+                # Packets shed by the worker (parent queue full) and by the
+                # parent (backlog full, nobody reading): the merge itself is
+                # loss-less, these are the only places packets are lost
+                "dropped_worker": w.status.get("dropped", 0),
+                "dropped_backlog": w.dropped,
+                "tick": w.status,
+            })
+        return report
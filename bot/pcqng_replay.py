@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+"""PCQNG trace capture & replay ("timestamp injected by host" mode).
+
+A trace is a flat file of little-endian int64 timestamps – exactly the
+values ``PcqngCore`` would have read from its timing source, one per 1 ms
+tick.  Captures taken on production hosts can be replayed through the
+unchanged INIT→RAMP→NORMAL pipeline as fast as the CPU allows, which makes
+calibration and packet output reproducible bit-for-bit (canon.yaml ›
+pcqng_port_plan, Phase C).
+
+Scott Wilber justification: replay only swaps *where* timestamps come
+from; quantisation and the LFSR corrector are the canonical code paths.
+"""
+
+import os
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import numpy as np
+
+from bot.pcqng import PcqngCore, PcqngRng, TimestampSource, _mk_cycles_reader
+from bot.pcqng_timer import MilliTimer
+
+__all__ = [
+    "TRACE_DTYPE",
+    "TraceSource",
+    "load_trace",
+    "record_trace",
+    "replay_ebits",
+    "replay_packets",
+]
+
+TRACE_DTYPE = np.dtype("<i8")
+_DEFAULT_CHUNK = 1 << 16
+_SOURCE_CHUNK = 4096   # TraceSource: ints materialised per refill
+
+TraceLike = Union[str, os.PathLike, np.ndarray]
+
+# ---------------------------------------------------------------------------
+# File helpers
+# ---------------------------------------------------------------------------
+
+def load_trace(path: Union[str, os.PathLike]) -> np.ndarray:
+    """Memory-map a recorded trace (read-only, no copy)."""
+    path = Path(path)
+    if path.stat().st_size % TRACE_DTYPE.itemsize:
+        raise ValueError(f"{path}: size is not a multiple of int64")
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=TRACE_DTYPE)
+    return np.memmap(path, dtype=TRACE_DTYPE, mode="r")
+
+
+def _as_trace(trace: TraceLike) -> np.ndarray:
+    if isinstance(trace, np.ndarray):
+        return trace
+    return load_trace(trace)
+
+
+def record_trace(
+    path: Union[str, os.PathLike],
+    count: int,
+    source: TimestampSource | None = None,
+    interval_s: float = 0.001,
+) -> Path:
+    """Capture *count* live timestamps at the canonical 1 ms cadence.
+
+    Uses the same platform timing source as ``PcqngCore`` unless *source*
+    is given.  Samples are buffered in memory and written once at the end
+    so file I/O never perturbs the jitter being recorded.
+    """
+    read = source or _mk_cycles_reader()
+    timer = MilliTimer(period_s=interval_s, spin_s=0.0)
+    buf = np.empty(count, dtype=TRACE_DTYPE)
+    for i in range(count):
+        buf[i] = read()
+        if interval_s:
+            timer.wait()
+    path = Path(path)
+    buf.tofile(path)
+    return path
+
+# ---------------------------------------------------------------------------
+# Replay
+# ---------------------------------------------------------------------------
+
+class TraceSource:
+    """Per-call timestamp source backed by a trace.
+
+    Drop-in ``timestamp_source`` for ``PcqngCore``/``PcqngRng`` when the
+    scalar ``step()`` path must be exercised (e.g. tests of the state
+    machine).  Raises ``EOFError`` once the trace is exhausted.
+
+    The trace stays an array (a memmap stays on disk); values are turned
+    into Python ints ``_SOURCE_CHUNK`` at a time as calls reach them.
+    """
+
+    def __init__(self, trace: TraceLike) -> None:
+        self._trace = _as_trace(trace)
+        self._start = 0                 # trace index of self._chunk[0]
+        self._chunk: List[int] = []
+        self._pos = 0                   # index into self._chunk
+
+    def __call__(self) -> int:
+        if self._pos >= len(self._chunk):
+            self._start += len(self._chunk)
+            self._chunk = self._trace[self._start:self._start + _SOURCE_CHUNK].tolist()
+            self._pos = 0
+            if not self._chunk:
+                raise EOFError("timestamp trace exhausted")
+        value = self._chunk[self._pos]
+        self._pos += 1
+        return value
+
+    @property
+    def remaining(self) -> int:
+        return len(self._trace) - self._start - self._pos
+
+
+def replay_ebits(
+    trace: TraceLike,
+    core: PcqngCore | None = None,
+    chunk_size: int = _DEFAULT_CHUNK,
+) -> Iterator[np.ndarray]:
+    """Yield eBits arrays for consecutive *chunk_size* slices of *trace*.
+
+    Uses ``PcqngCore.step_many``; concatenating the chunks gives exactly the
+    sequence a live core would have produced from the same timestamps.
+    """
+    ts = _as_trace(trace)
+    # Batch-only core: an empty source makes stray step() calls fail loudly
+    core = core or PcqngCore(timestamp_source=TraceSource(ts[:0]))
+    for start in range(0, len(ts), chunk_size):
+        yield core.step_many(ts[start:start + chunk_size])
+
+
+def replay_packets(
+    trace: TraceLike,
+    rng: PcqngRng | None = None,
+    chunk_size: int = _DEFAULT_CHUNK,
+) -> Iterator[List[bytes]]:
+    """Yield the corrected 17-byte packets produced per trace chunk."""
+    ts = _as_trace(trace)
+    rng = rng or PcqngRng(timestamp_source=TraceSource(ts[:0]))
+    for start in range(0, len(ts), chunk_size):
+        rng.step_many(ts[start:start + chunk_size])
+        yield rng.read_packets()
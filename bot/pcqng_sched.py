@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+"""CPU affinity and real-time scheduling for PCQNG sampling threads (Linux).
+
+Counterpart of ``PcqngCore::Runner`` pinning to CPU 0 and raising itself
+to ``THREAD_PRIORITY_TIME_CRITICAL``.  On Linux, affinity, scheduling
+policy and nice value are all per-thread, so ``tune_sampling_thread`` is
+called *from* the sampler thread and leaves the rest of the process
+(uvicorn workers, asyncio loop) untouched.
+
+Policies, tried in order for ``"auto"``:
+
+* ``fifo`` / ``rr`` – ``SCHED_FIFO`` / ``SCHED_RR`` (needs CAP_SYS_NICE or
+  an RLIMIT_RTPRIO allowance);
+* ``nice`` – a negative nice value (also privileged), else left at the
+  current value.
+
+Every step degrades gracefully: unprivileged containers get a report of
+what was refused instead of an exception.  The report also holds tick
+lateness and delta variance measured before and after, so the effect is
+visible per host.
+
+Scott Wilber justification: scheduling only shapes *when* the sampler
+runs; the jitter that remains is still the entropy, so measurements use
+the spin-free 1 ms pulse exactly like the production loop.
+"""
+
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+import numpy as np
+
+__all__ = ["RT_MODES", "apply_scheduling", "measure_tick_quality", "tune_sampling_thread"]
+
+RT_MODES = ("off", "nice", "rr", "fifo", "auto")
+
+_DEFAULT_RT_PRIORITY = 10   # low end of 1-99: above normal tasks, below kernel RT
+_DEFAULT_NICE = -10
+
+
+def _set_affinity(cpu: int) -> Dict[str, Any]:
+    out: Dict[str, Any] = {"requested": cpu}
+    try:
+        os.sched_setaffinity(0, {cpu})
+        out["applied"] = sorted(os.sched_getaffinity(0))
+    except (OSError, ValueError) as exc:
+        out["error"] = str(exc)
+    return out
+
+
+def _set_policy(name: str, priority: int) -> Dict[str, Any]:
+    policy = os.SCHED_FIFO if name == "fifo" else os.SCHED_RR
+    prio = max(os.sched_get_priority_min(policy), min(priority, os.sched_get_priority_max(policy)))
+    try:
+        os.sched_setscheduler(0, policy, os.sched_param(prio))
+        return {"policy": name, "priority": prio, "applied": True}
+    except OSError as exc:
+        return {"policy": name, "priority": prio, "applied": False, "error": str(exc)}
+
+
+def _set_nice(nice: int) -> Dict[str, Any]:
+    before = os.getpriority(os.PRIO_PROCESS, 0)
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, nice)  # tid 0 → calling thread
+        return {"policy": "nice", "nice": nice, "applied": True}
+    except OSError as exc:
+        return {"policy": "nice", "nice": before, "applied": False, "error": str(exc)}
+
+
+def apply_scheduling(
+    mode: str = "auto",
+    cpu: int | None = 0,
+    priority: int = _DEFAULT_RT_PRIORITY,
+    nice: int = _DEFAULT_NICE,
+) -> Dict[str, Any]:
+    """Pin the calling thread to *cpu* and raise its priority per *mode*."""
+    if mode not in RT_MODES:
+        raise ValueError(f"mode must be one of {RT_MODES}, got {mode!r}")
+    report: Dict[str, Any] = {"mode": mode}
+    if mode == "off":
+        return report
+    if not sys.platform.startswith("linux") or not hasattr(os, "sched_setscheduler"):
+        report["error"] = "unsupported platform"
+        return report
+
+    if cpu is not None:
+        report["affinity"] = _set_affinity(cpu)
+
+    attempts = {"auto": ("fifo", "rr", "nice"), "fifo": ("fifo",), "rr": ("rr",), "nice": ("nice",)}[mode]
+    tried = []
+    for step in attempts:
+        result = _set_nice(nice) if step == "nice" else _set_policy(step, priority)
+        tried.append(result)
+        if result["applied"]:
+            break
+    report["scheduling"] = tried[-1]
+    report["attempts"] = tried
+    return report
+
+
+def measure_tick_quality(
+    ticks: int = 500,
+    reader: Callable[[], int] | None = None,
+    period_s: float = 0.001,
+) -> Dict[str, Any]:
+    """Run a spin-free ``MilliTimer`` for *ticks*; lateness and delta stats."""
+    from bot.pcqng_timer import MilliTimer
+
+    if reader is None:
+        from bot.pcqng import _mk_cycles_reader
+
+        reader = _mk_cycles_reader()
+    timer = MilliTimer(period_s=period_s, spin_s=0.0)
+    stamps = np.empty(ticks, dtype=np.int64)
+    for i in range(ticks):
+        timer.wait()
+        stamps[i] = reader()
+    deltas = np.diff(stamps).astype(np.float64)
+    stats = timer.stats()
+    mean = float(deltas.mean()) if len(deltas) else 0.0
+    std = float(deltas.std(ddof=1)) if len(deltas) > 1 else 0.0
+    return {
+        "ticks": ticks,
+        "late_ticks": stats["late_ticks"],
+        "missed_ticks": stats["missed_ticks"],
+        "lateness_p50_us": stats.get("lateness_p50_us"),
+        "lateness_p99_us": stats.get("lateness_p99_us"),
+        "delta_mean": round(mean, 1),
+        "delta_std": round(std, 1),
+        "delta_cv": round(std / mean, 5) if mean else None,
+    }
+
+
+def tune_sampling_thread(
+    mode: str = "auto",
+    cpu: int | None = 0,
+    measure_ticks: int = 500,
+    **kw: Any,
+) -> Dict[str, Any]:
+    """``apply_scheduling`` bracketed by before/after tick measurements.
+
+    Call from the sampler thread itself.  ``measure_ticks=0`` skips the
+    (≈2 × measure_ticks ms) measurement.
+    """
+    measure = measure_ticks > 0 and mode != "off"
+    before = measure_tick_quality(measure_ticks) if measure else None
+    report = apply_scheduling(mode, cpu, **kw)
+    if measure:
+        report["before"] = before
+        report["after"] = measure_tick_quality(measure_ticks)
+    report["measured_at"] = time.time()
+    return report
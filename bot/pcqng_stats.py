@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+"""Vectorised canonical statistics battery for PCQNG output.
+
+One call runs canon.yaml › ``statistics_tests`` over a buffer – or over
+many sources at once, given a 2-D ``(sources, samples)`` array – using
+only whole-array NumPy operations:
+
+* ``bias`` – z-score of the ones count (first ``eBits_bias`` samples);
+* ``runs`` – Wald–Wolfowitz runs z-score plus a chi-square of the
+  run-length distribution against the geometric law, Bonferroni-combined
+  (first ``run_length`` samples);
+* ``serial`` – lag-1 serial correlation of sample values, z = r·√n;
+* ``spectral`` – log-log slope of the averaged periodogram (first
+  ``spectral_density`` samples; white ≈ 0, 1/f ≈ −1);
+* ``chi2`` – uniformity of the bit stream packed into bytes (256 bins).
+
+Bit-level tests run on the bits the pipeline actually relies on:
+the 7 data bits of each corrected packet byte (``kind="packets"``), or
+the parity bit of each eBit – the LFSR input – (``kind="ebits"``).
+
+Scott Wilber justification: sample counts are the frozen canon values so
+p-values stay comparable across runs; nothing is whitened first.
+"""
+
+import math
+from typing import Any, Dict
+
+import numpy as np
+
+from bot.pcqng_zstats import erfc
+
+__all__ = ["CANON_SAMPLE_COUNTS", "run_battery", "battery_from_archive", "battery_from_trace"]
+
+# canon.yaml › statistics_tests › *.sample_count
+CANON_SAMPLE_COUNTS = {
+    "eBits_bias": 131_072,
+    "run_length": 65_536,
+    "spectral_density": 131_072,
+}
+
+_MAX_RUN = 16        # run lengths ≥ this share the last bin
+_PSD_SEGMENT = 1024  # periodogram segment length (samples)
+_ALPHA = 1e-3
+
+_PARITY = np.array([bin(v).count("1") & 1 for v in range(256)], dtype=np.uint8)
+
+# ---------------------------------------------------------------------------
+# p-value helpers (bot.pcqng_zstats erfc: SciPy if installed, else NumPy)
+# ---------------------------------------------------------------------------
+
+def _p_normal(z: np.ndarray) -> np.ndarray:
+    """Two-sided normal p-value."""
+    return erfc(np.abs(z) / math.sqrt(2))
+
+
+def _p_chi2(chi2: np.ndarray, dof: int) -> np.ndarray:
+    """Upper-tail chi-square p-value (Wilson–Hilferty)."""
+    z = ((chi2 / dof) ** (1 / 3) - (1 - 2 / (9 * dof))) / math.sqrt(2 / (9 * dof))
+    return 0.5 * erfc(z / math.sqrt(2))
+
+
+def _out(values: Dict[str, np.ndarray], p: np.ndarray, single: bool, alpha: float) -> Dict[str, Any]:
+    res = {k: (float(v[0]) if single else v.tolist()) for k, v in values.items()}
+    res["p"] = float(p[0]) if single else p.tolist()
+    passed = p >= alpha
+    res["pass"] = bool(passed[0]) if single else passed.tolist()
+    return res
+
+# ---------------------------------------------------------------------------
+# Individual tests – all operate row-wise on 2-D arrays
+# ---------------------------------------------------------------------------
+
+def _bits(samples: np.ndarray, kind: str) -> np.ndarray:
+    if kind == "ebits":
+        return _PARITY[samples]
+    bits = np.unpackbits(samples[..., None], axis=-1)[..., 1:]  # drop MSB (always 0)
+    return bits.reshape(samples.shape[0], -1)
+
+
+def _bias(bits: np.ndarray) -> Dict[str, np.ndarray]:
+    n = bits.shape[1]
+    ones = bits.sum(axis=1, dtype=np.int64)
+    return {"ones_fraction": ones / n, "z": (ones - n / 2) / math.sqrt(n / 4)}
+
+
+def _runs(bits: np.ndarray) -> Dict[str, np.ndarray]:
+    k, n = bits.shape
+    change = bits[:, 1:] != bits[:, :-1]
+    n_runs = 1 + change.sum(axis=1, dtype=np.int64)
+    p1 = bits.mean(axis=1)
+    mu = 1 + 2 * n * p1 * (1 - p1)
+    var = np.maximum(2 * n * p1 * (1 - p1) * (2 * n * p1 * (1 - p1) - 1) / (n - 1), 1e-12)
+    z = (n_runs - mu) / np.sqrt(var)
+
+    # Run-length histogram for every row at once: run boundaries in the
+    # flattened array (row starts always start a run), lengths by diff
+    starts = np.ones((k, n), dtype=bool)
+    starts[:, 1:] = change
+    pos = np.flatnonzero(np.concatenate([starts.ravel(), [True]]))
+    lengths = np.minimum(np.diff(pos), _MAX_RUN)
+    rows = pos[:-1] // n
+    hist = np.bincount(rows * (_MAX_RUN + 1) + lengths, minlength=k * (_MAX_RUN + 1))
+    hist = hist.reshape(k, _MAX_RUN + 1)[:, 1:]
+    # Geometric law for a fair source: P(L = l) = 2^-l, tail lumped
+    probs = 0.5 ** np.arange(1, _MAX_RUN + 1)
+    probs[-1] = 0.5 ** (_MAX_RUN - 1)
+    expected = hist.sum(axis=1, keepdims=True) * probs
+    chi2 = ((hist - expected) ** 2 / expected).sum(axis=1)
+    return {"runs": n_runs, "z": z, "length_chi2": chi2, "length_p": _p_chi2(chi2, _MAX_RUN - 1)}
+
+
+def _serial(samples: np.ndarray) -> Dict[str, np.ndarray]:
+    x = samples.astype(np.float64)
+    x -= x.mean(axis=1, keepdims=True)
+    denom = (x * x).sum(axis=1)
+    r = np.where(denom > 0, (x[:, 1:] * x[:, :-1]).sum(axis=1) / np.where(denom > 0, denom, 1), 0.0)
+    return {"r": r, "z": r * math.sqrt(samples.shape[1])}
+
+
+def _spectral(samples: np.ndarray) -> Dict[str, np.ndarray]:
+    k, n = samples.shape
+    segs = n // _PSD_SEGMENT
+    x = samples[:, :segs * _PSD_SEGMENT].astype(np.float64).reshape(k, segs, _PSD_SEGMENT)
+    x -= x.mean(axis=2, keepdims=True)
+    power = (np.abs(np.fft.rfft(x, axis=2)) ** 2).mean(axis=1)[:, 1:]  # drop DC
+    logf = np.log10(np.arange(1, power.shape[1] + 1))
+    logp = np.log10(np.maximum(power, 1e-300))
+    # Least-squares slope for every row at once
+    fc = logf - logf.mean()
+    sxx = (fc * fc).sum()
+    lc = logp - logp.mean(axis=1, keepdims=True)
+    slope = (lc * fc).sum(axis=1) / sxx
+    resid = lc - slope[:, None] * fc
+    se = np.sqrt((resid * resid).sum(axis=1) / (len(fc) - 2) / sxx)
+    # Constant rows have no spectrum at all: report them as failing
+    z = np.divide(slope, se, out=np.full_like(slope, np.inf), where=se > 0)
+    return {"slope": slope, "z": z}
+
+
+def _chi2_bytes(bits: np.ndarray) -> Dict[str, np.ndarray]:
+    k, n = bits.shape
+    words = np.packbits(bits[:, : n - n % 8].reshape(k, -1, 8), axis=-1)[..., 0]
+    counts = np.zeros((k, 256), dtype=np.int64)
+    np.add.at(counts, (np.repeat(np.arange(k), words.shape[1]), words.ravel()), 1)
+    expected = words.shape[1] / 256
+    return {"chi2": ((counts - expected) ** 2 / expected).sum(axis=1)}
+
+# ---------------------------------------------------------------------------
+# Battery
+# ---------------------------------------------------------------------------
+
+def run_battery(data: Any, kind: str = "packets", alpha: float = _ALPHA) -> Dict[str, Any]:
+    """Run every canonical test over *data* (bytes, 1-D or 2-D uint8 array).
+
+    2-D input is ``(sources, samples)``: each row is tested independently
+    and every statistic comes back as a list, one entry per source.  Rows
+    shorter than a test's canonical sample count are tested on what they
+    have (the reported ``samples`` says how many were used).
+    """
+    if kind not in ("packets", "ebits"):
+        raise ValueError("kind must be 'packets' or 'ebits'")
+    arr = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray, memoryview)) \
+        else np.asarray(data, dtype=np.uint8)
+    single = arr.ndim == 1
+    arr = np.atleast_2d(arr)
+    n = arr.shape[1]
+    if n < _PSD_SEGMENT:
+        raise ValueError(f"need at least {_PSD_SEGMENT} samples, got {n}")
+
+    n_bias = min(n, CANON_SAMPLE_COUNTS["eBits_bias"])
+    n_runs = min(n, CANON_SAMPLE_COUNTS["run_length"])
+    n_spec = min(n, CANON_SAMPLE_COUNTS["spectral_density"])
+    bits_bias = _bits(arr[:, :n_bias], kind)
+    bits_runs = bits_bias[:, : bits_bias.shape[1] * n_runs // n_bias]
+
+    bias = _bias(bits_bias)
+    runs = _runs(bits_runs)
+    serial = _serial(arr[:, :n_bias])
+    spectral = _spectral(arr[:, :n_spec])
+    chi2 = _chi2_bytes(bits_bias)
+
+    # Two sub-tests → Bonferroni
+    run_p = np.minimum(1.0, 2 * np.minimum(_p_normal(runs["z"]), runs.pop("length_p")))
+    return {
+        "kind": kind,
+        "sources": arr.shape[0],
+        "samples": {"bias": n_bias, "runs": n_runs, "spectral": n_spec},
+        "bias": _out(bias, _p_normal(bias["z"]), single, alpha),
+        "runs": _out(runs, run_p, single, alpha),
+        "serial": _out(serial, _p_normal(serial["z"]), single, alpha),
+        "spectral": _out(spectral, _p_normal(spectral["z"]), single, alpha),
+        "chi2": _out(chi2, _p_chi2(chi2["chi2"], 255), single, alpha),
+    }
+
+
+def battery_from_archive(root: str, stream: str, start: Any, end: Any, alpha: float = _ALPHA) -> Dict[str, Any]:
+    """Battery over a time range of a ``bot.pcqng_archive`` capture."""
+    from bot.pcqng_archive import ArchiveReader
+
+    data = ArchiveReader(root).read(stream, start, end)
+    return run_battery(data, kind=stream, alpha=alpha)
+
+
+def battery_from_trace(path: str, alpha: float = _ALPHA) -> Dict[str, Dict[str, Any]]:
+    """Replay a timestamp trace (``bot.pcqng_replay``) and test both streams."""
+    from bot.pcqng_replay import replay_ebits, replay_packets
+
+    ebits = np.concatenate(list(replay_ebits(path)))
+    packets = b"".join(p for chunk in replay_packets(path) for p in chunk)
+    return {
+        "ebits": run_battery(ebits, kind="ebits", alpha=alpha),
+        "packets": run_battery(packets, kind="packets", alpha=alpha),
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    import time
+
+    parser = argparse.ArgumentParser("pcqng statistics battery")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--archive", help="bot.pcqng_archive root")
+    src.add_argument("--trace", help="int64 timestamp trace to replay")
+    parser.add_argument("--stream", default="packets", choices=("packets", "ebits"))
+    parser.add_argument("--since", type=float, default=3600.0, help="archive: seconds back from now")
+    args = parser.parse_args()
+    if args.archive:
+        now = time.time()
+        report: Any = battery_from_archive(args.archive, args.stream, now - args.since, now)
+    else:
+        report = battery_from_trace(args.trace)
+    print(json.dumps(report, indent=2))
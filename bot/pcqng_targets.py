@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+"""Pre-generated PCQNG target buffers, one per session (``PcqngTargetGen``).
+
+Port of ``temporal_rng/PcqngTargetGen.{hpp,cpp}``.  A target word is
+built from one input byte: its 7 bits are clocked – again and again, 7 at
+a time – through the session's own 63-bit ``LfsrCorrector`` until the
+corrector's output ends a group inside a run of at least 5 equal bits;
+the last output bit is one bit of the word, and seven such bits make a
+7-bit target word.  ``GetNextTarget`` returns words from a buffer that
+was filled ahead of time; ``GetNextPrecogTarget`` instead waits for a
+byte generated *after* the request.
+
+:class:`TargetService` keeps that buffer full for many sessions at once.
+The generator thread hands it every tick's packet bytes with
+:meth:`~TargetService.feed` (an O(1) append); a background thread turns
+bytes into words – precognition requests first, then the emptiest
+session buffers up to *depth* – so a burst of trials pops ready words
+in O(1) each and never waits for the 1 ms cadence unless it drains more
+than *depth* words.  Each input byte is used by one session only; bytes
+arriving while every buffer is full are not used.
+
+The C++ reads raw eBits from the core buffer it shares with
+``PcqngRng``; here the input is the corrected packet bytes the pool
+publishes, since eBits stay inside the pool's worker processes.  The 7
+corrector clocks of a group are computed at once: the outputs of 7
+clocks depend only on the register at the start of the group (the
+feedback bits land above the highest tap), so a group is a few integer
+operations plus one run-length table lookup.
+
+Scott Wilber justification: every target bit is the canonical corrector
+output for its input byte; buffering changes when a word is computed,
+not its value, and precognition targets still come from future bytes.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Tuple
+
+import numpy as np
+
+from bot.pcqng import _LfsrCorrector
+
+__all__ = ["DEFAULT_TARGET_DEPTH", "TargetSession", "TargetService", "target_words"]
+
+DEFAULT_TARGET_DEPTH = 256
+_BITS = 7
+_MIN_RUN = 5
+_MAX_GROUPS = 256   # per bit; ~21 on average (see _target_word)
+_LFSR_SEED = _LfsrCorrector()._lfsr
+_MAX_PENDING_BYTES = 1 << 16   # feed() backlog if the worker thread falls behind
+
+# Input bits in clock order: bit k = (e >> (6 - k)) & 1
+_REV7 = [int(f"{e & 0x7F:07b}"[::-1], 2) for e in range(256)]
+
+
+def _run_table() -> List[int]:
+    """(runType·6 + min(runLength, 5))·128 + group outputs → next run code."""
+    table = [0] * (2 * (_MIN_RUN + 1) * 128)
+    for rtype in (0, 1):
+        for rlen in range(_MIN_RUN + 1):
+            for x in range(128):
+                t, n = rtype, rlen
+                for k in range(_BITS):
+                    bit = (x >> k) & 1
+                    t, n = (t, min(n + 1, _MIN_RUN)) if bit == t else (bit, 1)
+                table[(rtype * (_MIN_RUN + 1) + rlen) * 128 + x] = t * (_MIN_RUN + 1) + n
+    return table
+
+
+_RUN = _run_table()
+
+
+def _target_word(state: int, e_byte: int) -> Tuple[int, int]:
+    """``GenerateTarget`` for one input byte: (word, new register).
+
+    The C++ loops until the run condition holds, which some register /
+    input pairs never reach (the canonical seed fed 0x7F outputs
+    1010… forever); after ``_MAX_GROUPS`` groups the last output bit is
+    taken as it is.
+    """
+    rin = _REV7[e_byte]
+    word = 0
+    for _ in range(_BITS):
+        code = 0
+        for _ in range(_MAX_GROUPS):
+            x = (state ^ (state >> 13) ^ (state >> 30) ^ (state >> 37) ^ (state >> 48)) & 0x7F
+            state = (state >> _BITS) | ((x ^ rin) << 56)
+            code = _RUN[code * 128 + x]
+            if code % (_MIN_RUN + 1) == _MIN_RUN:
+                break
+        word = (word << 1) | (x >> 6)
+    return word, state
+
+
+def target_words(data: Any, state: int = _LFSR_SEED) -> Tuple[np.ndarray, int]:
+    """One target word per byte of *data*, starting from register *state*."""
+    out = np.empty(len(data), dtype=np.uint8)
+    for i, e_byte in enumerate(bytes(data)):
+        out[i], state = _target_word(state, e_byte)
+    return out, state
+
+
+class TargetSession:
+    """One session's ``ITargetGen``: buffered targets plus the precog path.
+
+    Created by :meth:`TargetService.session`; every method is thread-safe.
+    Waiting calls raise :class:`TimeoutError` after *timeout* seconds
+    (``None`` = the service default) without consuming anything.
+    """
+
+    def __init__(self, service: "TargetService", session_id: str, depth: int) -> None:
+        self._service = service
+        self.session_id = session_id
+        self.depth = depth
+        self._lfsr = _LFSR_SEED          # touched by the service thread only
+        self._buf: Deque[int] = deque()
+        self._precog: Deque[int] = deque()
+        self._precog_want = 0
+        self._precog_after = 0           # feed sequence the precog bytes must follow
+        self.served = 0
+        self.waits = 0
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def _wait(self, ready: Any, timeout: float | None) -> None:
+        svc = self._service
+        if ready():
+            return
+        self.waits += 1
+        timeout = svc.timeout_s if timeout is None else timeout
+        if not svc._cond.wait_for(ready, timeout):
+            svc.timeouts += 1
+            raise TimeoutError(f"session {self.session_id!r}: no targets within {timeout} s")
+
+    # -- ITargetGen ------------------------------------------------------
+    def next_targets(self, n: int, timeout: float | None = None) -> np.ndarray:
+        """*n* buffered target words (all or nothing; at most ``depth``)."""
+        if n > self.depth:
+            raise ValueError(f"cannot take {n} targets from a buffer of depth {self.depth}")
+        with self._service._cond:
+            self._service._touch(self.session_id)
+            self._wait(lambda: len(self._buf) >= n, timeout)
+            out = np.array([self._buf.popleft() for _ in range(n)], dtype=np.uint8)
+            self.served += n
+        self._service._wake()
+        return out
+
+    def next_precog_targets(self, n: int, timeout: float | None = None) -> np.ndarray:
+        """*n* words from bytes fed after this call."""
+        svc = self._service
+        with svc._cond:
+            svc._touch(self.session_id)
+            if not self._precog_want:
+                self._precog.clear()     # left by a timed-out request: not after this one
+            self._precog_want += n
+            self._precog_after = svc._fed_seq
+            try:
+                self._wait(lambda: len(self._precog) >= n, timeout)
+            except TimeoutError:
+                self._precog_want = max(0, self._precog_want - n)
+                raise
+            out = np.array([self._precog.popleft() for _ in range(n)], dtype=np.uint8)
+            self.served += n
+        return out
+
+    def get_next_target(self) -> int:
+        return int(self.next_targets(1)[0])
+
+    def get_next_precog_target(self) -> int:
+        return int(self.next_precog_targets(1)[0])
+
+    def set_target_buffer_size(self, size: int) -> None:
+        if size < 1:
+            raise ValueError("target buffer size must be positive")
+        with self._service._cond:
+            self.depth = size
+            while len(self._buf) > size:
+                self._buf.pop()          # drop the newest: older words stay first
+        self._service._wake()
+
+    def clear_buffers(self) -> None:
+        """Discard pre-generated targets; the service refills from new bytes."""
+        with self._service._cond:
+            self._buf.clear()
+        self._service._wake()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"depth": self.depth, "buffered": len(self._buf), "served": self.served, "waits": self.waits}
+
+
+class TargetService:
+    """Per-session target buffers kept full from fed PCQNG packet bytes.
+
+    At most *max_sessions* sessions are kept; creating one more drops the
+    least recently used.
+    """
+
+    def __init__(
+        self,
+        depth: int = DEFAULT_TARGET_DEPTH,
+        max_sessions: int = 1024,
+        timeout_s: float = 1.0,
+        max_pending_bytes: int = _MAX_PENDING_BYTES,
+    ) -> None:
+        if depth < 1 or max_sessions < 1:
+            raise ValueError("depth and max_sessions must be positive")
+        self.depth = depth
+        self.max_sessions = max_sessions
+        self.timeout_s = timeout_s
+        self._max_pending = max_pending_bytes
+        self._cond = threading.Condition()
+        self._sessions: "OrderedDict[str, TargetSession]" = OrderedDict()
+        self._inbox: Deque[Tuple[int, bytes]] = deque()
+        self._inbox_bytes = 0
+        self._fed_seq = 0
+        self._kick = threading.Event()
+        self._stop = threading.Event()
+        self.fed_bytes = 0
+        self.used_bytes = 0
+        self.dropped_bytes = 0
+        self.timeouts = 0
+        self._thread = threading.Thread(target=self._run, name="pcqng-targets", daemon=True)
+        self._thread.start()
+
+    # -- generator side --------------------------------------------------
+    def feed(self, data: bytes) -> None:
+        """Queue one tick's packet bytes (O(1), never blocks on generation)."""
+        if not data:
+            return
+        with self._cond:
+            self._fed_seq += 1
+            self._inbox.append((self._fed_seq, bytes(data)))
+            self._inbox_bytes += len(data)
+            self.fed_bytes += len(data)
+            while self._inbox_bytes > self._max_pending:
+                _, old = self._inbox.popleft()
+                self._inbox_bytes -= len(old)
+                self.dropped_bytes += len(old)
+        self._kick.set()
+
+    # -- sessions --------------------------------------------------------
+    def session(self, session_id: str) -> TargetSession:
+        """The session's target generator, created (and then filled) on first use."""
+        with self._cond:
+            sess = self._sessions.get(session_id)
+            if sess is None:
+                sess = self._sessions[session_id] = TargetSession(self, session_id, self.depth)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            self._sessions.move_to_end(session_id)
+        self._kick.set()
+        return sess
+
+    def close_session(self, session_id: str) -> None:
+        with self._cond:
+            self._sessions.pop(session_id, None)
+
+    def _touch(self, session_id: str) -> None:
+        if session_id in self._sessions:
+            self._sessions.move_to_end(session_id)
+
+    def _wake(self) -> None:
+        self._kick.set()
+
+    # -- worker thread ---------------------------------------------------
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._kick.wait(0.1)
+            self._kick.clear()
+            self._fill()
+
+    def _fill(self) -> None:
+        with self._cond:
+            if not self._inbox:
+                return
+            data = [[seq, blob, 0] for seq, blob in self._inbox]
+            self._inbox.clear()
+            self._inbox_bytes = 0
+
+        def take(n: int, after: int = 0) -> bytes:
+            got = bytearray()
+            for item in data:
+                seq, blob, pos = item
+                if len(got) >= n:
+                    break
+                if seq <= after or pos >= len(blob):
+                    continue
+                k = min(n - len(got), len(blob) - pos)
+                got += blob[pos:pos + k]
+                item[2] = pos + k
+            return bytes(got)
+
+        # Rounds until the bytes run out or nobody needs more: trials may
+        # drain a buffer again while it is being refilled
+        while True:
+            with self._cond:
+                sessions = list(self._sessions.values())
+                precog = [(s, s._precog_want, s._precog_after) for s in sessions if s._precog_want]
+                refill = sorted(
+                    ((s, s.depth - len(s._buf)) for s in sessions if len(s._buf) < s.depth),
+                    key=lambda item: -item[1],
+                )
+            jobs = [(sess, take(want, after), sess._precog) for sess, want, after in precog]
+            jobs += [(sess, take(need), sess._buf) for sess, need in refill]
+            if not any(raw for _, raw, _ in jobs):
+                return
+            # Registers are only touched by this thread; each word is
+            # published at once, and ~0.1 ms of Python per word is followed
+            # by a GIL yield so the 1 ms sampler thread keeps its deadline
+            for sess, raw, dest in jobs:
+                for e_byte in raw:
+                    word, sess._lfsr = _target_word(sess._lfsr, e_byte)
+                    with self._cond:
+                        dest.append(word)
+                        if dest is sess._precog:
+                            sess._precog_want = max(0, sess._precog_want - 1)
+                        self.used_bytes += 1
+                        self._cond.notify_all()
+                    time.sleep(0)
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop.set()
+        self._kick.set()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            buffered = [len(s) for s in self._sessions.values()]
+            return {
+                "depth": self.depth,
+                "sessions": len(self._sessions),
+                "buffered_min": min(buffered) if buffered else 0,
+                "fed_bytes": self.fed_bytes,
+                "used_bytes": self.used_bytes,
+                "dropped_bytes": self.dropped_bytes,
+                "timeouts": self.timeouts,
+            }
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+"""Drift-free 1 ms tick scheduler for PCQNG sampling loops.
+
+Python analogue of the C++ ``MilliTimer`` pulse that paces
+``PcqngCore::Runner``: ticks are scheduled on an absolute deadline grid
+(``t0 + k·period``) instead of "sleep 1 ms after the work", so per-tick
+work and OS wake-up latency never accumulate into cadence drift.
+
+Like ``timeSetEvent(..., TIME_CALLBACK_EVENT_PULSE)``, pulses that fire
+while nobody is waiting are lost rather than queued: when the caller falls
+a whole period behind, the missed ticks are counted and the grid is
+re-anchored instead of bursting to catch up.
+
+Scott Wilber justification: the PCQNG entropy *is* the wake-up jitter, so
+PCQNG loops use ``spin_s=0`` – a spin phase would wake on the exact
+deadline and flatten the very deltas being quantised.  The spin margin is
+available for callers that need precise cadence rather than jitter.
+"""
+
+import time
+from typing import Callable, Dict
+
+import numpy as np
+
+__all__ = ["MilliTimer", "PCQNG_TICK_S"]
+
+# canon.yaml › PCQNG › canonical_constants › timer_period_ms
+PCQNG_TICK_S = 0.001
+
+
+class MilliTimer:
+    """Periodic absolute-deadline pulse with lateness accounting.
+
+    Call :meth:`wait` once per loop iteration; it blocks until the next
+    deadline.  The final ``spin_s`` before a deadline are busy-waited (and
+    any early OS wake-up is always spun out), everything before that is
+    slept.
+    """
+
+    def __init__(
+        self,
+        period_s: float = PCQNG_TICK_S,
+        spin_s: float = 0.0002,
+        late_s: float | None = None,
+        history: int = 4096,
+        clock: Callable[[], int] = time.perf_counter_ns,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._period = int(period_s * 1e9)
+        self._spin = int(spin_s * 1e9)
+        # A tick counts as "late" beyond 10 % of the period unless overridden
+        self._late = int((late_s if late_s is not None else period_s / 10) * 1e9)
+        self._clock = clock
+        self._sleep = sleep
+
+        self._lateness = np.zeros(history, dtype=np.int64)
+        self._hist_pos = 0
+
+        self._deadline = 0
+        self._first_tick = 0
+        self._last_tick = 0
+        self.ticks = 0
+        self.late_ticks = 0
+        self.missed_ticks = 0
+
+    # ------------------------------------------------------------------
+    def reset(self) -> None:
+        """Drop the deadline grid and all counters (next wait() re-anchors)."""
+        self._deadline = 0
+        self._hist_pos = 0
+        self.ticks = self.late_ticks = self.missed_ticks = 0
+
+    def wait(self) -> int:
+        """Block until the next tick; return its lateness in nanoseconds."""
+        clock = self._clock
+        if not self._deadline:
+            self._deadline = clock() + self._period
+
+        deadline = self._deadline
+        remaining = deadline - clock()
+        if remaining > self._spin:
+            self._sleep((remaining - self._spin) / 1e9)
+        while clock() < deadline:
+            pass
+        now = clock()
+        lateness = now - deadline
+
+        if lateness >= self._period:
+            # Pulses fired while we were busy are lost, not replayed
+            skipped = lateness // self._period
+            self.missed_ticks += skipped
+            deadline += skipped * self._period
+        self._deadline = deadline + self._period
+
+        if lateness > self._late:
+            self.late_ticks += 1
+        self._lateness[self._hist_pos % len(self._lateness)] = lateness
+        self._hist_pos += 1
+        if not self.ticks:
+            self._first_tick = now
+        self._last_tick = now
+        self.ticks += 1
+        return lateness
+
+    # ------------------------------------------------------------------
+    @property
+    def rate_hz(self) -> float:
+        """Achieved tick rate since the first tick."""
+        span = self._last_tick - self._first_tick
+        return (self.ticks - 1) * 1e9 / span if self.ticks > 1 and span > 0 else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Tick counters plus lateness percentiles (µs) over recent ticks."""
+        n = min(self._hist_pos, len(self._lateness))
+        out: Dict[str, float] = {
+            "period_us": self._period / 1e3,
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "missed_ticks": self.missed_ticks,
+            "rate_hz": round(self.rate_hz, 3),
+        }
+        if n:
+            lat = self._lateness[:n] / 1e3
+            p50, p90, p99 = np.percentile(lat, [50, 90, 99])
+            out.update(
+                lateness_p50_us=round(float(p50), 3),
+                lateness_p90_us=round(float(p90), 3),
+                lateness_p99_us=round(float(p99), 3),
+                lateness_max_us=round(float(lat.max()), 3),
+            )
+        return out
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+"""Bounded random-walk PRD generator over PCQNG packets (``BoundedWalkGen``).
+
+Port of ``temporal_rng/BoundedWalkGen.hpp`` (the original ships only the
+header).  Every 7-bit packet byte is read MSB first as ±1 steps of a
+walk started at 0; when the walk reaches ``+bound`` or ``-bound`` the
+generator outputs ``+1.0`` / ``-1.0`` and the walk restarts at 0.  The
+bound follows from the requested average hit time: a fair ±1 walk needs
+``bound**2`` steps on average, so ``bound = round(sqrt(avg_bound_hit_s ·
+bit_rate))``.
+
+The walk never visits bits one at a time in Python.  After each hit the
+walk's origin moves by exactly ±bound, so in absolute terms hits are the
+moments the running sum reaches a multiple of *bound* other than the
+last one reached.  The running sum is a cumulative sum over byte pairs
+via a lookup table (net step, minimum and maximum partial sum of each
+14-bit pattern); only pairs whose range contains a multiple of *bound*
+are unpacked to bits, and de-duplicating consecutive multiples yields every
+hit of the buffer at once.  Walk position and alternation phase carry
+across calls, so feeding a buffer whole or in pieces gives the same
+outputs as a bit-by-bit walk.
+
+PCQNG has a single packet stream (the C++ ``PcqngRng`` never writes its
+AC buffer), so ``bias_channel=False`` derives the autocorrelation channel
+by XOR-ing the bits with an alternating 1010… pattern, which turns lag-1
+correlation into bias.
+
+Scott Wilber justification: walk outputs are a lossless function of the
+corrected packets; no bits are skipped or reused.
+"""
+
+import math
+from collections import deque
+from typing import Any, Deque, List, Tuple
+
+import numpy as np
+
+__all__ = ["PCQNG_BIT_RATE", "BoundedWalkGen"]
+
+# C++ PcqngRng::bitRate_ (119000·4); also 1 kHz × 476 corrected bits
+PCQNG_BIT_RATE = 119_000 * 4
+_BITS = 7
+
+
+def _tables(width: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Per pattern of *width* bytes: net step, max / span and every partial sum.
+
+    Indexed by the little-endian value of the bytes (first byte lowest,
+    bit 7 clear).  ``hi`` is the highest partial sum relative to the end
+    value and ``span`` the distance from lowest to highest, so a unit
+    ending at *e* touches a multiple of *b* iff ``(e + hi) % b <= span``;
+    ``prefix`` holds the partial sums after each bit, from the unit start.
+    """
+    idx = np.arange(1 << (8 * width), dtype=np.int64)
+    prefix = np.empty((len(idx), _BITS * width), dtype=np.int8)
+    s = np.zeros(len(idx), dtype=np.int32)
+    for byte in range(width):
+        for k in range(_BITS - 1, -1, -1):
+            s += (((idx >> (8 * byte + k)) & 1) * 2 - 1).astype(np.int32)
+            prefix[:, byte * _BITS + _BITS - 1 - k] = s
+    lo, hi = prefix.min(axis=1).astype(np.int32), prefix.max(axis=1).astype(np.int32)
+    return s, hi - s, (hi - lo).astype(np.int8), prefix
+
+
+_TABLES = {1: _tables(1), 2: _tables(2)}   # single bytes / byte pairs (~1.6 MiB)
+_AC_MASKS = np.array([0b0101010, 0b1010101], dtype=np.uint8)  # by phase of bit 6
+_MAX_SLICE = 1 << 24                        # keeps int32 running sums exact
+
+
+def _walk_reference(data: bytes, bound: int, pos: int = 0) -> Tuple[List[float], int]:
+    """Bit-by-bit walk (what the C++ ``inBitPointer_`` loop does)."""
+    out = []
+    for byte in data:
+        for k in range(_BITS - 1, -1, -1):
+            pos += 1 if (byte >> k) & 1 else -1
+            if pos >= bound:
+                out.append(1.0)
+                pos = 0
+            elif pos <= -bound:
+                out.append(-1.0)
+                pos = 0
+    return out, pos
+
+
+class BoundedWalkGen:
+    """PRD generator: ±1.0 per bound hit of a walk over PCQNG bits.
+
+    *rng* is anything with ``step()`` and ``read_packets()`` (``PcqngRng``,
+    ``PcqngPool``) and is only needed for :meth:`generate`;
+    :meth:`process` works on buffers supplied by the caller.
+    """
+
+    prd_id = "BoundedWalk"
+
+    def __init__(
+        self,
+        rng: Any = None,
+        bias_channel: bool = True,
+        avg_bound_hit_s: float = 0.1,
+        avg_buffer_size_s: float = 0.1,
+        bit_rate: float = PCQNG_BIT_RATE,
+    ) -> None:
+        if avg_bound_hit_s <= 0 or avg_buffer_size_s <= 0 or bit_rate <= 0:
+            raise ValueError("times and bit_rate must be positive")
+        self._rng = rng
+        self.bias_channel = bias_channel
+        self.bound_steps = max(1, int(round(math.sqrt(avg_bound_hit_s * bit_rate))))
+        self.min_read_words = max(1, int(avg_buffer_size_s * bit_rate / _BITS))
+        self._outputs: Deque[float] = deque()
+        self.clear_buffers()
+
+    def clear_buffers(self) -> None:
+        """Drop queued outputs and restart the walk at 0."""
+        self._outputs.clear()
+        self._pos = 0
+        self._phase = 0   # AC channel: XOR bit for the next bit read
+        self.bits_read = 0
+        self.hits = 0
+
+    # ------------------------------------------------------------------
+    def process(self, data: Any) -> np.ndarray:
+        """Walk every bit of *data* (packet bytes); return the hits as ±1.0."""
+        buf = np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray, memoryview)) \
+            else np.asarray(data, dtype=np.uint8)
+        n = len(buf)
+        if not n:
+            return np.empty(0, dtype=np.float64)
+        if not self.bias_channel:
+            # Phase of each byte's first bit alternates because 7 is odd
+            buf = buf ^ _AC_MASKS[(np.arange(n) + self._phase) & 1]
+            self._phase = (self._phase + n * _BITS) & 1
+        self.bits_read += n * _BITS
+
+        if buf.max() > 0x7F:
+            buf = buf & 0x7F
+        outs = []
+        for i in range(0, n, _MAX_SLICE):
+            piece = buf[i:i + _MAX_SLICE]
+            even = len(piece) & ~1
+            if even:
+                outs.append(self._walk(piece[:even].reshape(-1, 2), piece[:even].view("<u2")))
+            if even < len(piece):
+                outs.append(self._walk(piece[even:].reshape(-1, 1), piece[even:]))
+        out = np.concatenate(outs) if len(outs) > 1 else outs[0]
+        self.hits += len(out)
+        return out
+
+    def _walk(self, units: np.ndarray, index: np.ndarray) -> np.ndarray:
+        """Hits for one run of *units* (rows of 1 or 2 bytes)."""
+        bound = self.bound_steps
+        net_t, hi_t, span_t, prefix_t = _TABLES[units.shape[1]]
+        index = index.astype(np.intp)  # one conversion for four gathers
+        net = np.take(net_t, index)
+        end = np.cumsum(net, dtype=np.int32)
+        end += self._pos
+        top = end + np.take(hi_t, index)
+        rem = top % bound
+        cand = np.flatnonzero(rem <= np.take(span_t, index))
+
+        # Exact partial sums only for the units that touch a multiple
+        start = end[cand] - net[cand]
+        sums = start[:, None] + prefix_t[index[cand]]
+        if bound > _BITS * units.shape[1]:
+            # A unit spans fewer values than bound: one multiple, known already
+            visits = sums[sums == (top[cand] - rem[cand])[:, None]]
+        else:
+            visits = sums[sums % bound == 0]
+        # Walk origin is 0 at entry; a hit is a visit to a different multiple
+        prev = np.concatenate(([0], visits[:-1]))
+        moved = visits != prev
+        self._pos = int(end[-1] - (visits[-1] if len(visits) else 0))
+        return np.sign(visits[moved] - prev[moved]).astype(np.float64)
+
+    def feed(self, data: Any) -> int:
+        """Process *data* and queue its outputs for :meth:`generate`."""
+        out = self.process(data)
+        self._outputs.extend(out.tolist())
+        return len(out)
+
+    def generate(self) -> float:
+        """Next output, ticking *rng* in ``min_read_words`` batches as needed."""
+        if self._rng is None and not self._outputs:
+            raise RuntimeError("no rng attached and no outputs queued")
+        while not self._outputs:
+            chunk = bytearray()
+            while len(chunk) < self.min_read_words:
+                self._rng.step()
+                for packet in self._rng.read_packets():
+                    chunk += packet
+            self.feed(chunk)
+        return self._outputs.popleft()
+
+    def stats(self) -> dict:
+        return {
+            "id": self.prd_id,
+            "bias_channel": self.bias_channel,
+            "bound_steps": self.bound_steps,
+            "bits_read": self.bits_read,
+            "hits": self.hits,
+            "queued": len(self._outputs),
+        }
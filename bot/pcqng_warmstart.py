@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+"""Warm-start persistence of PCQNG calibration state.
+
+A cold ``PcqngRng`` spends ~1 s in INIT (3 samples) + RAMP (1000 samples)
+and then discards its first 10 packets before serving anything – per
+generator, per restart, multiplied across a pool and rolling deploys.
+This module snapshots the calibrated state (LPF value, ``_q_divisor``,
+the 1024-sample calibration window and the LFSR register) to a small
+JSON file and restores it on start-up, so a restarted generator emits
+eBits from its second timestamp.
+
+A snapshot is only trusted when it is recent, was written on the same
+host and platform, and is a regular file owned by this user that nobody
+else can write; anything else falls back to full calibration.  Snapshots
+hold the LFSR register, so they are written with mode 0600, and every
+generator needs a file of its own – :func:`claim_slot` hands each process
+sharing one base path a distinct, stable slot.
+
+Scott Wilber justification: only *calibration* is carried over – every
+eBit after a restore is still quantised from fresh timing jitter, and the
+sliding window re-calibrates against live samples within 1024 ticks.
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover – non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+from bot.pcqng import PcqngCore, PcqngRng
+
+__all__ = [
+    "SNAPSHOT_VERSION",
+    "DEFAULT_MAX_AGE_S",
+    "save_warm_start",
+    "load_warm_start",
+    "claim_slot",
+    "WarmStart",
+]
+
+SNAPSHOT_VERSION = 1
+DEFAULT_MAX_AGE_S = 600.0
+DEFAULT_SAVE_INTERVAL_S = 60.0
+MAX_SLOTS = 256
+
+# Slot lock descriptors, held open (and so locked) for the process lifetime
+_slot_locks: List[int] = []
+
+PathLike = Union[str, os.PathLike]
+Generator = Union[PcqngCore, PcqngRng]
+
+
+def _fingerprint() -> Dict[str, Any]:
+    # Timing-source units and jitter profile are host/platform specific
+    return {"host": socket.gethostname(), "platform": sys.platform}
+
+
+def save_warm_start(gen: Generator, path: PathLike) -> bool:
+    """Write *gen*'s calibration snapshot to *path* (atomic replace).
+
+    Returns False without touching the file while *gen* is still warming up.
+    """
+    state = gen.snapshot()
+    if state is None:
+        return False
+    record = dict(
+        _fingerprint(),
+        version=SNAPSHOT_VERSION,
+        kind=type(gen).__name__,
+        saved_at=time.time(),
+        state=state,
+    )
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)  # mode 0600
+    try:
+        with os.fdopen(fd, "w") as fh:
+            fh.write(json.dumps(record))
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return True
+
+
+def _read_private(path: PathLike) -> str:
+    """Contents of *path* if it is a regular file only this user controls."""
+    fd = os.open(path, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+    with os.fdopen(fd) as fh:
+        st = os.fstat(fh.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            raise ValueError("not a regular file")
+        if hasattr(os, "getuid") and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+            raise ValueError("snapshot owned or writable by another user")
+        return fh.read()
+
+
+def load_warm_start(gen: Generator, path: PathLike, max_age_s: float = DEFAULT_MAX_AGE_S) -> bool:
+    """Restore *gen* from *path* if the snapshot is fresh and from this host.
+
+    Returns True when *gen* now starts in NORMAL; False (leaving *gen*
+    untouched, i.e. on the full INIT→RAMP path) when the file is missing,
+    unreadable, not privately owned, stale, foreign or of a different
+    generator kind.
+    """
+    try:
+        record = json.loads(_read_private(path))
+    except (OSError, ValueError):
+        return False
+    if not isinstance(record, dict) or record.get("version") != SNAPSHOT_VERSION:
+        return False
+    if record.get("kind") != type(gen).__name__:
+        return False
+    if any(record.get(k) != v for k, v in _fingerprint().items()):
+        return False
+    age = time.time() - float(record.get("saved_at", 0))
+    if not 0 <= age <= max_age_s:
+        return False
+    try:
+        gen.restore(record["state"])
+    except (KeyError, TypeError, ValueError):
+        return False
+    print(f"PCQNG warm start: restored calibration from {path} ({age:.0f} s old)")
+    return True
+
+
+def claim_slot(base: PathLike, max_slots: int = MAX_SLOTS) -> Path:
+    """Per-process snapshot path ``<base>.s<k>`` for generators sharing *base*.
+
+    Each process holds an ``flock`` on the first free ``<k>`` for its
+    lifetime, so concurrent workers (e.g. uvicorn's) never share corrector
+    state while a restarted worker reuses a slot a dead one released.  The
+    parent directory is created private (0700) if missing.  Without
+    ``fcntl`` the slot is the process id, which restores nothing across
+    restarts but never shares a file.
+    """
+    base = Path(base)
+    base.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+    if fcntl is None:
+        return base.with_name(f"{base.name}.p{os.getpid()}")
+    for k in range(max_slots):
+        lock = base.with_name(f"{base.name}.s{k}.lock")
+        fd = os.open(lock, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            continue
+        _slot_locks.append(fd)
+        return base.with_name(f"{base.name}.s{k}")
+    raise RuntimeError(f"all {max_slots} warm-start slots of {base} are in use")
+
+
+class WarmStart:
+    """Load once at start-up, then re-save periodically from a tick loop.
+
+    ``tick()`` is cheap between saves (one monotonic read); a save costs a
+    JSON dump of the 1024-sample window, i.e. one slightly late tick per
+    ``interval_s``.  Write errors are swallowed – a missing snapshot only
+    costs the next start a full calibration.
+    """
+
+    def __init__(
+        self,
+        path: PathLike,
+        interval_s: float = DEFAULT_SAVE_INTERVAL_S,
+        max_age_s: float = DEFAULT_MAX_AGE_S,
+    ) -> None:
+        self.path = Path(path)
+        self._interval = interval_s
+        self._max_age = max_age_s
+        self._last_save = time.monotonic()
+        self.restored = False
+
+    def load(self, gen: Generator) -> bool:
+        self.restored = load_warm_start(gen, self.path, self._max_age)
+        return self.restored
+
+    def save(self, gen: Generator) -> bool:
+        self._last_save = time.monotonic()
+        try:
+            return save_warm_start(gen, self.path)
+        except OSError:
+            return False
+
+    def tick(self, gen: Generator) -> None:
+        if time.monotonic() - self._last_save >= self._interval:
+            self.save(gen)
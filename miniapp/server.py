@@ -11,9 +11,11 @@ and the canonical temporal exploration framework from canon.yaml.
 """
 
 import asyncio
+import base64
 import sqlite3
 import json
 import math
+import os
 import time
 from datetime import datetime, timedelta, time as dt_time
 from typing import Optional, List, Dict, Any
@@ -24,9 +26,10 @@ from io import StringIO
 import sys
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, Response
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
@@ -40,9 +43,19 @@ except Exception:
     pass
 
 from bot.pcqng import PcqngRng  # Scott Wilber–vetted temporal RNG
+from bot.pcqng_timer import MilliTimer
+from bot.pcqng_pool import PcqngPool
+from bot.pcqng_warmstart import WarmStart, claim_slot
+from bot.pcqng_histogram import RollingHistogram
+from bot.pcqng_health import DEFAULT_HEALTH_MODE, PcqngHealth
+from bot.pcqng_clocks import clock_report
+from bot.pcqng_sched import tune_sampling_thread
+from bot.pcqng_archive import PcqngArchive
+from bot.pcqng_async import pcqng_stream
+from bot.pcqng_targets import DEFAULT_TARGET_DEPTH, TargetService
+from bot.entropy_ring import AsyncEntropyFeed, ByteRing, SharedEntropyRing
 
 import threading
-from collections import deque
 
 # Blockchain helper – shared root-level module
 from blockchain import latest_block, commit_block  # type: ignore
@@ -153,14 +166,106 @@ class RevealPayload(BaseModel):
     cid: str  # IPFS CID of raw deltas
     signature: str  # WebAuthn base64 signature
 
-# Global byte buffer populated by background thread
-_rng_buffer = deque()  # type: ignore
-_rng_lock = threading.Lock()
+# Global byte buffer populated by background thread – bounded ring, so an
+# idle /api/entropy no longer lets it grow without limit.
+# PCQNG_BUFFER_OVERFLOW: "drop_oldest" (default) or "block" (pause producer)
+_rng_buffer = ByteRing(
+    capacity=int(os.environ.get("PCQNG_BUFFER_BYTES", str(1 << 20))),
+    overflow=os.environ.get("PCQNG_BUFFER_OVERFLOW", "drop_oldest"),
+)
 
-# 64-bin eBits/byte histogram (0-255 → bin width 4)
+# Byte histogram: lifetime 64-bin view (0-255 → bin width 4) for Grafana
+# plus 1 min / 1 h / 24 h rolling windows with chi-square and mean drift
 _hist_bins = 64
-_hist_counts = [0] * _hist_bins
-_hist_total = 0
+_histogram = RollingHistogram()
+
+# Absolute-deadline 1 ms pulse for the worker (no spin: the wake-up jitter
+# is the entropy source)
+_tick_timer = MilliTimer(spin_s=0.0)
+
+# PCQNG_POOL_WORKERS=N runs N pinned generator processes (0 = in-thread RNG)
+_POOL_WORKERS = int(os.environ.get("PCQNG_POOL_WORKERS", "0"))
+_pool: Optional[PcqngPool] = None
+
+# PCQNG_HEALTH: "quarantine" (default – a failing source stops filling the
+# buffer), "monitor" (alarms only) or "off"; see bot.pcqng_health
+_HEALTH_MODE = os.environ.get("PCQNG_HEALTH", DEFAULT_HEALTH_MODE)
+_health: Optional[PcqngHealth] = None
+
+# PCQNG_RT: "off" (default), "nice", "rr", "fifo" or "auto" – pin the
+# sampler thread to PCQNG_RT_CPU and raise its priority (bot.pcqng_sched)
+_RT_MODE = os.environ.get("PCQNG_RT", "off")
+_RT_CPU = int(os.environ.get("PCQNG_RT_CPU", "0"))
+_sched_report: Optional[Dict[str, Any]] = None
+
+# PCQNG_ARCHIVE_DIR=<dir> keeps raw eBits + packets in hourly indexed zstd
+# files for offline statistics (bot.pcqng_archive); unset = no archive
+_ARCHIVE_DIR = os.environ.get("PCQNG_ARCHIVE_DIR")
+_archive: Optional[PcqngArchive] = None
+
+# PCQNG_WARM_START=<path> opts in to snapshots of the calibrated generator
+# state, saved every minute and restored on restart.  The path should be in
+# a private directory: each worker process claims its own <path>.s<k> slot
+# (bot.pcqng_warmstart.claim_slot), written 0600.  Unset = cold starts.
+_WARM_START_BASE = os.environ.get("PCQNG_WARM_START")
+_warm_start_path: Optional[str] = None
+
+# PCQNG_TARGET_DEPTH=<words> pre-generated trial targets kept per session by
+# bot.pcqng_targets, refilled from every tick's packets (0 disables)
+_TARGET_DEPTH = int(os.environ.get("PCQNG_TARGET_DEPTH", str(DEFAULT_TARGET_DEPTH)))
+_TARGET_SESSIONS = int(os.environ.get("PCQNG_TARGET_SESSIONS", "1024"))
+_targets: Optional[TargetService] = None
+
+# PCQNG_SHM_RING=<name> reads from one standalone generator process
+# (`python -m bot.entropy_ring --name <name>`) shared by every uvicorn
+# worker, instead of running a generator thread per worker process
+_SHM_RING_NAME = os.environ.get("PCQNG_SHM_RING")
+_shm_ring: Optional[SharedEntropyRing] = None
+
+
+_SHM_STALE_S = 2.0  # writer silent this long -> check for a restarted generator
+
+
+def _get_shm_ring() -> Optional[SharedEntropyRing]:
+    """Attach lazily so API workers may start before the generator.
+
+    A restarted generator creates a fresh segment under the same name, so
+    a ring whose writer has gone quiet is dropped and re-attached once the
+    name points elsewhere."""
+    global _shm_ring
+    if _shm_ring is not None and _shm_ring.writer_stale(_SHM_STALE_S) and _shm_ring.replaced():
+        _shm_ring.close()
+        _shm_ring = None
+    if _shm_ring is None:
+        try:
+            _shm_ring = SharedEntropyRing.attach(_SHM_RING_NAME)
+        except FileNotFoundError:
+            return None
+    return _shm_ring
+
+
+def _read_shm(n: int) -> bytes:
+    ring = _get_shm_ring()
+    return ring.read(n) if ring is not None else b""
+
+
+# Waiting /api/entropy requests are woken by the producer (FIFO) rather than
+# each polling every 5 ms.  The shm generator lives in another process and
+# cannot signal us, so that mode re-checks on one shared 1 ms timer.
+if _SHM_RING_NAME:
+    _entropy_feed = AsyncEntropyFeed(_read_shm, poll_s=0.001)
+else:
+    _entropy_feed = AsyncEntropyFeed(_rng_buffer.read)
+
+
+def entropy_stream(chunk_size: int = 68):
+    """Async iterator of *chunk_size*-byte chunks for in-process consumers.
+
+    ``bot.pcqng_async.pcqng_stream`` attached to ``_entropy_feed``, so it
+    shares this process's generator (or the shm ring) rather than
+    starting a second sampler thread."""
+    return pcqng_stream(chunk_size, feed=_entropy_feed)
+
 
 def _pcqng_worker():
     """Background worker pumping jitter-derived bytes into shared buffer.
@@ -168,55 +273,230 @@ def _pcqng_worker():
     Scott Wilber justification: pulls directly from PcqngRng without extra
     whitening, preserving bias-amplification doctrine. 1 ms pacing matches
     canonical INIT→RAMP→NORMAL state machine timing (see canon.yaml)."""
-    global _hist_total
-    rng = PcqngRng()
+    global _pool, _health, _sched_report, _archive, _warm_start_path
+    warm = None
+    if _WARM_START_BASE:
+        _warm_start_path = str(claim_slot(_WARM_START_BASE))
+    if _POOL_WORKERS > 0:
+        # Same step()/read_packets() surface; workers tick in their own
+        # processes and step() only drains their output
+        rng = _pool = PcqngPool(
+            workers=_POOL_WORKERS,
+            warm_start=_warm_start_path,
+            health=_HEALTH_MODE,
+            rt=None if _RT_MODE == "off" else _RT_MODE,
+            archive=_ARCHIVE_DIR,
+        ).start()
+    else:
+        if _RT_MODE != "off":
+            # Per-thread on Linux: only the sampler is pinned / prioritised
+            _sched_report = tune_sampling_thread(_RT_MODE, _RT_CPU)
+        _health = PcqngHealth.from_mode(_HEALTH_MODE)
+        _archive = PcqngArchive(_ARCHIVE_DIR) if _ARCHIVE_DIR else None
+        rng = PcqngRng(health=_health, archive=_archive)
+        if _warm_start_path:
+            warm = WarmStart(_warm_start_path)
+            warm.load(rng)  # skip INIT/RAMP when a fresh local snapshot exists
     while True:
         rng.step()  # 1 ms temporal tick – jitter extracted inside
         packets = rng.read_packets()
         if packets:
-            with _rng_lock:
-                for pkt in packets:
-                    _rng_buffer.extend(pkt)
-                    # update histogram
-                    for b in pkt:
-                        idx = b // 4  # 0-63
-                        _hist_counts[idx] += 1
-                        _hist_total += 1
-        time.sleep(0.001)  # maintain canonical 1 ms cadence
-
-
-# Start worker at import time so entropy is already warming up
+            data = b"".join(packets)
+            _rng_buffer.write(data)
+            _entropy_feed.notify()
+            _histogram.add(data)  # one bincount per tick, no per-byte loop
+            if _targets is not None:
+                _targets.feed(data)  # O(1); words are built on its own thread
+        if warm is not None:
+            warm.tick(rng)
+        _tick_timer.wait()  # maintain canonical 1 ms cadence (drift-free)
+
+
+# Start worker at import time so entropy is already warming up (skipped in
+# spawned pool children, which re-import a script __main__ as __mp_main__)
 _thread = threading.Thread(target=_pcqng_worker, daemon=True)
-_thread.start()
+if __name__ != "__mp_main__" and not _SHM_RING_NAME:
+    if _TARGET_DEPTH > 0:
+        _targets = TargetService(depth=_TARGET_DEPTH, max_sessions=_TARGET_SESSIONS)
+    _thread.start()
 
 # ---------------------------------------------------------------------------
 # Entropy endpoint
 # ---------------------------------------------------------------------------
 
+_ENTROPY_MAX_COUNT = 512            # per call within the default 250 ms wait
+_ENTROPY_MAX_COUNT_PATIENT = 1 << 16
+_ENTROPY_DEFAULT_WAIT_MS = 250
+_ENTROPY_MAX_WAIT_MS = 30_000
+
 @app.get("/api/entropy")
-async def get_entropy(count: int = 32):
+async def get_entropy(count: int = 32, timeout_ms: int = _ENTROPY_DEFAULT_WAIT_MS):
     """Return `count` raw random bytes from PCQNG (canonical packets).
 
-    Bytes are delivered as application/octet-stream. Caller may request up to
-    512 bytes per call; larger sizes will be capped. If fewer than *count*
-    bytes are immediately available, the endpoint will wait up to 250 ms to
-    accumulate them, ensuring non-blocking behaviour for the Mini App while
-    preserving timing unpredictability (Scott Wilber, personal comm.)."""
-
-    MAX_COUNT = 512
-    count = min(count, MAX_COUNT)
-    collected = bytearray()
-    deadline = time.time() + 0.25  # 250 ms patience window
+    Bytes are delivered as application/octet-stream. If fewer than *count*
+    bytes are immediately available the request waits – woken by the
+    generator as packets land, served in arrival order – for up to
+    *timeout_ms* (default 250 ms, max 30 s) and then returns what it has,
+    ensuring non-blocking behaviour for the Mini App while preserving
+    timing unpredictability (Scott Wilber, personal comm.).
 
-    while len(collected) < count and time.time() < deadline:
-        with _rng_lock:
-            while _rng_buffer and len(collected) < count:
-                collected.append(_rng_buffer.popleft())
-        if len(collected) < count:
-            await asyncio.sleep(0.005)  # yield to event loop
+    Requests within the default patience window are capped at 512 bytes;
+    callers willing to wait longer may ask for up to 64 KiB."""
 
+    timeout_ms = max(0, min(timeout_ms, _ENTROPY_MAX_WAIT_MS))
+    cap = _ENTROPY_MAX_COUNT if timeout_ms <= _ENTROPY_DEFAULT_WAIT_MS else _ENTROPY_MAX_COUNT_PATIENT
+    count = max(0, min(count, cap))
+    data = await _entropy_feed.read(count, timeout=timeout_ms / 1000)
     # If still short, just return what we have
-    return Response(content=bytes(collected), media_type="application/octet-stream")
+    return Response(content=data, media_type="application/octet-stream")
+
+# ---------------------------------------------------------------------------
+# Trial targets (pre-generated per session)
+# ---------------------------------------------------------------------------
+
+_TARGETS_MAX_COUNT = 1024
+
+@app.get("/api/targets")
+async def get_targets(session_id: str, count: int = 1, precog: bool = False, timeout_ms: int = _ENTROPY_DEFAULT_WAIT_MS):
+    """Return `count` 7-bit target words for a trial session.
+
+    Words come from the session's pre-generated buffer, so a burst of up
+    to PCQNG_TARGET_DEPTH targets is served at once; ``precog=true``
+    instead waits for words built from bytes generated after the request
+    (PcqngTargetGen::GetNextPrecogTarget).  ``targets`` expands the words
+    into ±1 values, bit 6 first, as the PRD comparator uses them."""
+    if _targets is None:
+        raise HTTPException(status_code=503, detail="target service disabled")
+    session = _targets.session(session_id)
+    count = max(1, min(count, _TARGETS_MAX_COUNT, session.depth))
+    timeout = max(0, min(timeout_ms, _ENTROPY_MAX_WAIT_MS)) / 1000
+    try:
+        if precog:
+            words = await asyncio.to_thread(session.next_precog_targets, count, timeout)
+        elif len(session) >= count:
+            words = session.next_targets(count, 0)  # the common case: no wait, no thread hop
+        else:
+            words = await asyncio.to_thread(session.next_targets, count, timeout)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="targets not ready")
+    words = words.tolist()
+    targets = [((w >> k) & 1) * 2 - 1 for w in words for k in range(6, -1, -1)]
+    return {"session_id": session_id, "words": words, "targets": targets}
+
+# ---------------------------------------------------------------------------
+# Entropy streaming (WebSocket + SSE)
+# ---------------------------------------------------------------------------
+
+_STREAM_FRAMINGS = ("raw", "hex", "packet")
+_STREAM_PACKET_BYTES = 17
+_STREAM_MAX_CHUNK = 4096
+_STREAM_IDLE_S = 1.0  # wake-up period for keepalives / disconnect checks
+
+
+async def _stream_frames(chunk: int, framing: str, limit: int):
+    """Yield byte frames pulled from the shared entropy feed.
+
+    Each connection *pulls* its next frame only after the previous one was
+    sent, so a slow client simply stops drawing from the feed – it never
+    stalls the generator (whose ring drops oldest on overflow) or other
+    subscribers, and no per-connection queue can grow.  Every byte goes to
+    exactly one subscriber.  Yields ``b""`` when idle for ``_STREAM_IDLE_S``
+    so callers can check that their client is still there.
+
+    ``packet`` framing emits fixed 17-byte frames; they are packet-sized,
+    not guaranteed to be aligned with the generator's packet boundaries.
+    """
+    size = _STREAM_PACKET_BYTES if framing == "packet" else chunk
+    pending = bytearray()
+    sent = 0
+    while not limit or sent < limit:
+        want = min(size, limit - sent) if limit else size
+        pending += await _entropy_feed.read(want - len(pending), timeout=_STREAM_IDLE_S)
+        if not pending or (framing == "packet" and len(pending) < want):
+            yield b""
+            continue
+        frame, pending = bytes(pending), bytearray()
+        sent += len(frame)
+        yield frame
+
+
+def _check_stream_params(chunk: int, framing: str) -> Optional[str]:
+    if framing not in _STREAM_FRAMINGS:
+        return f"framing must be one of {', '.join(_STREAM_FRAMINGS)}"
+    if not 1 <= chunk <= _STREAM_MAX_CHUNK:
+        return f"chunk must be between 1 and {_STREAM_MAX_CHUNK}"
+    return None
+
+
+@app.websocket("/api/entropy/stream")
+async def stream_entropy_ws(websocket: WebSocket, framing: str = "raw", chunk: int = 68, limit: int = 0):
+    """Push PCQNG bytes as they are produced over a WebSocket.
+
+    ``raw`` and ``packet`` framing send binary messages, ``hex`` sends text
+    messages.  *chunk* is the message size for raw/hex; *limit* > 0 closes
+    the socket after that many bytes."""
+    error = _check_stream_params(chunk, framing)
+    if error:
+        await websocket.close(code=1008, reason=error)
+        return
+    await websocket.accept()
+    # Sends only fail once a frame is due, so an idle feed would never notice
+    # a vanished client; draining its messages updates client_state instead
+    inbox = asyncio.create_task(_drain_ws(websocket))
+    frames = _stream_frames(chunk, framing, max(limit, 0))
+    try:
+        async for frame in frames:
+            if websocket.client_state != WebSocketState.CONNECTED:
+                return
+            if not frame:
+                continue
+            if framing == "hex":
+                await websocket.send_text(frame.hex())
+            else:
+                await websocket.send_bytes(frame)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        inbox.cancel()
+        await frames.aclose()
+
+
+async def _drain_ws(websocket: WebSocket) -> None:
+    """Read (and ignore) client messages until the client disconnects."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+
+@app.get("/api/entropy/stream")
+async def stream_entropy_sse(request: Request, framing: str = "hex", chunk: int = 68, limit: int = 0):
+    """Server-Sent Events variant of the entropy stream.
+
+    SSE is text-only, so ``raw`` frames are base64 encoded, ``hex`` frames
+    hex encoded and ``packet`` frames are sent as hex ``event: packet``
+    records.  Idle periods emit ``: keepalive`` comments."""
+    error = _check_stream_params(chunk, framing)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+
+    async def events():
+        async for frame in _stream_frames(chunk, framing, max(limit, 0)):
+            if await request.is_disconnected():
+                break
+            if not frame:
+                yield ": keepalive\n\n"
+            elif framing == "raw":
+                yield f"data: {base64.b64encode(frame).decode()}\n\n"
+            elif framing == "packet":
+                yield f"event: packet\ndata: {frame.hex()}\n\n"
+            else:
+                yield f"data: {frame.hex()}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # Database utilities
 async def get_db_connection():
@@ -920,16 +1200,26 @@ async def internal_error_handler(request: Request, exc):
 
 @app.get("/api/entropy/metrics")
 async def get_entropy_metrics():
-    """Return live 64-bin histogram of generated bytes for Grafana panels."""
-    with _rng_lock:
-        counts = list(_hist_counts)  # shallow copy
-        total = int(_hist_total)
+    """Return live 64-bin histogram of generated bytes for Grafana panels.
 
+    ``windows`` adds rolling 1 min / 1 h / 24 h counts over the 7-bit
+    support with chi-square uniformity and mean-drift statistics."""
     # normalise to probability if desired by client; we send raw counts
     return {
         "bins": _hist_bins,
-        "counts": counts,
-        "total": total,
+        "counts": _histogram.lifetime_bins(_hist_bins),
+        "total": _histogram.total,
+        "windows": _histogram.snapshot(),
+        "tick": _tick_timer.stats(),
+        "buffer": _rng_buffer.stats(),
+        "pool": _pool.health() if _pool is not None else None,
+        "shm_ring": _shm_ring.stats() if _shm_ring is not None else None,
+        "waiters": _entropy_feed.stats(),
+        "health": _health.stats() if _health is not None else None,
+        "sched": _sched_report,
+        "archive": _archive.stats() if _archive is not None else None,
+        "targets": _targets.stats() if _targets is not None else None,
+        "clock": clock_report(),  # None unless this process samples the clock
     }
 
 # At startup ensure extra tables exist
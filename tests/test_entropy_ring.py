@@ -0,0 +1,180 @@
+"""Entropy rings: wraparound, overflow policies and exactly-once reads."""
+
+import multiprocessing as mp
+import threading
+import time
+import uuid
+from collections import Counter
+
+import pytest
+
+from bot.entropy_ring import ByteRing, SharedEntropyRing
+
+
+def test_byte_ring_drop_oldest():
+    ring = ByteRing(capacity=32)
+    ring.write(bytes(range(20)))
+    assert ring.read(5) == bytes(range(5))
+    ring.write(bytes(range(100, 125)))  # 15 + 25 > 32 → 8 oldest dropped
+    assert ring.occupancy == 32 and ring.dropped == 8
+    buf = bytearray(64)
+    n = ring.read_into(buf)
+    assert bytes(buf[:n]) == bytes(range(13, 20)) + bytes(range(100, 125))
+    # oversized write keeps only the newest `capacity` bytes
+    ring.write(bytes(range(50)))
+    assert ring.read(100) == bytes(range(18, 50))
+    assert ring.stats()["dropped"] == 8 + 18
+
+
+def test_byte_ring_block_pauses_producer():
+    ring = ByteRing(capacity=16, overflow="block")
+    assert ring.write(bytes(16)) == 16
+
+    # Full ring: a timed-out write stores nothing and counts the drop
+    assert ring.write(b"x" * 4, timeout=0.01) == 0
+    assert ring.dropped == 4
+
+    done = []
+    producer = threading.Thread(target=lambda: done.append(ring.write(bytes(range(1, 9)))))
+    producer.start()
+    time.sleep(0.05)
+    assert not done, "producer should be paused while the ring is full"
+    assert ring.read(10) == bytes(10)
+    producer.join(2)
+    assert done == [8]
+    assert ring.read(100) == bytes(6) + bytes(range(1, 9))
+
+
+def _name():
+    return f"pcqng-test-{uuid.uuid4().hex[:8]}"
+
+
+def test_wraparound_and_overflow():
+    ring = SharedEntropyRing.create(_name(), capacity=64)
+    try:
+        reader = SharedEntropyRing.attach(ring._shm.name)
+        assert ring.write(bytes(range(50))) == 50
+        assert reader.read(40) == bytes(range(40))
+        # 10 unread + 60 new wraps the 64-byte region; 6 bytes overflow
+        assert ring.write(bytes(range(100, 160))) == 54
+        assert ring.stats()["dropped"] == 6
+        assert reader.occupancy == 64
+        assert reader.read(100) == bytes(range(40, 50)) + bytes(range(100, 154))
+        assert reader.read(1) == b""
+        reader.close()
+    finally:
+        ring.close()
+
+
+def _drain(name, out_q):
+    ring = SharedEntropyRing.attach(name)
+    got = bytearray()
+    idle = 0
+    while idle < 200:
+        chunk = ring.read(97)
+        got += chunk
+        idle = 0 if chunk else idle + 1
+        if not chunk:
+            import time
+            time.sleep(0.001)
+    ring.close()
+    out_q.put(bytes(got))
+
+
+def test_readers_in_other_processes_get_disjoint_bytes():
+    """Every written byte is claimed by exactly one reader process."""
+    name = _name()
+    ring = SharedEntropyRing.create(name, capacity=4096)
+    ctx = mp.get_context("spawn")
+    out_q = ctx.Queue()
+    procs = [ctx.Process(target=_drain, args=(name, out_q)) for _ in range(3)]
+    try:
+        for p in procs:
+            p.start()
+        data = bytes(range(256)) * 200
+        sent = 0
+        while sent < len(data):
+            sent += ring.write(data[sent:sent + 1000])
+        parts = [out_q.get(timeout=30) for _ in procs]
+        for p in procs:
+            p.join(10)
+    finally:
+        ring.close()
+
+    assert sum(len(p) for p in parts) == len(data)
+    assert Counter(b"".join(parts)) == Counter(data)
+
+
+def test_async_feed_fifo_wakeups():
+    import asyncio
+
+    from bot.entropy_ring import AsyncEntropyFeed
+
+    ring = ByteRing(capacity=1024)
+    feed = AsyncEntropyFeed(ring.read)
+
+    def produce(chunks):
+        for chunk in chunks:
+            time.sleep(0.01)
+            ring.write(chunk)
+            feed.notify()
+
+    async def main():
+        first = asyncio.ensure_future(feed.read(10, timeout=2))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(feed.read(4, timeout=2))
+        await asyncio.sleep(0)
+        assert len(feed) == 2
+        producer = threading.Thread(target=produce, args=([bytes(range(6)), bytes(range(6, 14))],))
+        producer.start()
+        a, b = await first, await second
+        producer.join()
+        # oldest request is completed first, nothing served twice
+        assert a == bytes(range(10)) and b == bytes(range(10, 14))
+
+        # a short request times out with what it collected, freeing the queue
+        ring.write(b"abc")
+        assert await feed.read(8, timeout=0.02) == b"abc"
+        assert len(feed) == 0 and feed.stats()["timeouts"] == 1
+
+    asyncio.run(main())
+
+
+def test_reader_detects_restarted_writer():
+    name = _name()
+    ring = SharedEntropyRing.create(name, capacity=64)
+    reader = SharedEntropyRing.attach(name)
+    try:
+        assert not reader.writer_stale(1.0)
+        assert not reader.replaced()
+        ring.close()  # owner unlinks the segment
+        assert reader.replaced()
+        ring = SharedEntropyRing.create(name, capacity=64)
+        assert reader.replaced()  # same name, new epoch
+        fresh = SharedEntropyRing.attach(name)
+        assert not fresh.replaced()
+        fresh.close()
+    finally:
+        reader.close()
+        ring.close()
+
+
+
+def test_create_refuses_a_live_writer():
+    name = _name()
+    ring = SharedEntropyRing.create(name, capacity=64)
+    try:
+        with pytest.raises(FileExistsError):
+            SharedEntropyRing.create(name, capacity=64)
+        reader = SharedEntropyRing.attach(name)
+        assert not reader.replaced()  # the live ring was left alone
+        reader.close()
+        # A writer silent for longer than stale_s is replaced
+        time.sleep(0.05)
+        taken = SharedEntropyRing.create(name, capacity=64, stale_s=0.01)
+        assert ring.replaced()
+    finally:
+        ring.close()  # must not unlink the successor's block
+    fresh = SharedEntropyRing.attach(name)
+    fresh.close()
+    taken.close()
@@ -0,0 +1,108 @@
+"""Mini-app entropy stream: WebSocket / SSE framing, limits and disconnects."""
+
+import asyncio
+import base64
+import importlib
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from bot.entropy_ring import AsyncEntropyFeed, ByteRing
+
+DATA = bytes(range(1, 201))
+
+
+@pytest.fixture(scope="module")
+def server():
+    # Any PCQNG_SHM_RING name keeps the import from starting a generator
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("PCQNG_SHM_RING", "test-stream-no-generator")
+        yield importlib.import_module("miniapp.server")
+
+
+@pytest.fixture()
+def ring(server, monkeypatch):
+    """Replace the generator feed with a ring the test fills."""
+    ring = ByteRing(1 << 16)
+    monkeypatch.setattr(server, "_entropy_feed", AsyncEntropyFeed(ring.read, poll_s=0.005))
+    monkeypatch.setattr(server, "_STREAM_IDLE_S", 0.05)
+    return ring
+
+
+@pytest.fixture()
+def client(server):
+    return TestClient(server.app)
+
+
+def test_ws_binary_and_hex_frames_close_at_limit(ring, client):
+    ring.write(DATA)
+    with client.websocket_connect("/api/entropy/stream?chunk=50&limit=120") as ws:
+        got = [ws.receive_bytes() for _ in range(3)]
+        assert ws.receive()["type"] == "websocket.close"
+    assert [len(f) for f in got] == [50, 50, 20] and b"".join(got) == DATA[:120]
+
+    with client.websocket_connect("/api/entropy/stream?framing=hex&chunk=10&limit=20") as ws:
+        assert [ws.receive_text() for _ in range(2)] == [DATA[120:130].hex(), DATA[130:140].hex()]
+        assert ws.receive()["type"] == "websocket.close"
+
+    with client.websocket_connect("/api/entropy/stream?framing=packet&chunk=1&limit=34") as ws:
+        assert [ws.receive_bytes() for _ in range(2)] == [DATA[140:157], DATA[157:174]]
+        assert ws.receive()["type"] == "websocket.close"
+
+
+def test_sse_records_and_keepalive(ring, client):
+    ring.write(DATA[:60])
+    resp = client.get("/api/entropy/stream?chunk=10&limit=20")
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert resp.text == f"data: {DATA[:10].hex()}\n\ndata: {DATA[10:20].hex()}\n\n"
+    resp = client.get("/api/entropy/stream?framing=raw&chunk=20&limit=20")
+    assert resp.text == f"data: {base64.b64encode(DATA[20:40]).decode()}\n\n"
+    resp = client.get("/api/entropy/stream?framing=packet&limit=17")
+    assert resp.text == f"event: packet\ndata: {DATA[40:57].hex()}\n\n"
+
+    # Idle feed: keepalive comments until bytes arrive
+    ring.read(len(ring))
+    threading.Timer(0.3, ring.write, (b"\x2a",)).start()
+    resp = client.get("/api/entropy/stream?chunk=1&limit=1")
+    assert resp.text.startswith(": keepalive\n\n") and resp.text.endswith("data: 2a\n\n")
+
+
+@pytest.mark.parametrize("query", ["framing=bogus", "chunk=0", "chunk=4097"])
+def test_bad_params_rejected(ring, client, query):
+    with pytest.raises(WebSocketDisconnect) as err:
+        with client.websocket_connect(f"/api/entropy/stream?{query}"):
+            pass
+    assert err.value.code == 1008
+    assert client.get(f"/api/entropy/stream?{query}").status_code == 400
+
+
+def test_ws_notices_disconnect_while_idle(server, ring, client, monkeypatch):
+    """A client leaving an idle stream ends the handler, not a poll loop."""
+    finished = threading.Event()
+    frames = server._stream_frames
+
+    async def tracked(*args):
+        try:
+            async for frame in frames(*args):
+                yield frame
+        finally:
+            finished.set()
+
+    monkeypatch.setattr(server, "_stream_frames", tracked)
+    with client.websocket_connect("/api/entropy/stream") as ws:
+        time.sleep(0.1)                              # a few idle frames
+        ws.close()
+        assert finished.wait(2.0), "handler kept polling after the client left"
+
+
+def test_in_process_stream_shares_the_worker_feed(server, ring):
+    ring.write(DATA[:40])
+
+    async def first_chunk():
+        async for chunk in server.entropy_stream(40):
+            return chunk
+
+    assert asyncio.run(first_chunk()) == DATA[:40]
@@ -18,7 +18,7 @@ import time
 import numpy as np
 from scipy import stats
 from collections import Counter
-from bot.pcqng import PcqngCore, PcqngRng, _LpFilter, _LfsrCorrector
+from bot.pcqng import PcqngCore, PcqngRng, _LpFilter, _LfsrCorrector, _RobustWindow
 
 # =============================================================================
 # CANONICAL CONSTANTS VALIDATION (from canon.yaml + ME Trainer source)
@@ -367,6 +367,192 @@ def test_parity_bit_not_frozen():
     print(f"Parity bit diversity OK: zeros={zeros}, ones={ones}")
 
 
+# =============================================================================
+# TABLE-DRIVEN LFSR BLOCK MUST MATCH BIT-SERIAL CORRECTOR
+# =============================================================================
+
+def _reference_packets(lfsr, e_byte):
+    """Original 4×17×7 next_bit() loop from PcqngRng._process_e_byte."""
+    parity_tmp = e_byte
+    parity_tmp ^= parity_tmp >> 4
+    parity_tmp ^= parity_tmp >> 2
+    parity_bit = parity_tmp & 1
+    packets = []
+    for _ in range(4):
+        corrected = bytearray(17)
+        for i in range(17):
+            val = 0
+            for b in range(7):
+                val = (val << 1) | lfsr.next_bit(parity_bit)
+            corrected[i] = val
+        packets.append(bytes(corrected))
+    return packets
+
+
+def test_lfsr_block_matches_bit_serial():
+    """next_block() packets and final register equal the per-bit loop."""
+    import random
+
+    rnd = random.Random(1234)
+    serial = _LfsrCorrector()
+    rng = PcqngRng()
+    rng._discard_left = 0
+
+    for _ in range(300):
+        e_byte = rnd.randrange(256)
+        expected = _reference_packets(serial, e_byte)
+        rng._process_e_byte(e_byte)
+        assert rng.read_packets() == expected
+        assert rng._lfsr._lfsr == serial._lfsr, "LFSR state diverged"
+
+    # Arbitrary register contents, not just states reachable from the seed
+    for _ in range(50):
+        state = rnd.getrandbits(63)
+        a, b = _LfsrCorrector(), _LfsrCorrector()
+        a._lfsr = b._lfsr = state
+        in_bit = rnd.getrandbits(1)
+        block = b.next_block(in_bit)
+        ref = b"".join(_reference_packets(a, 0b11 if in_bit else 0))
+        assert block == ref and a._lfsr == b._lfsr
+
+    print("✓ Table-driven LFSR block is bit-identical to next_bit() loop")
+
+
+# =============================================================================
+# BATCH MODE MUST MATCH PER-SAMPLE STATE MACHINE
+# =============================================================================
+
+def _synthetic_timestamps(n, seed=7):
+    """~1 ms ticks with Gaussian jitter plus occasional 3× outliers."""
+    rnd = np.random.default_rng(seed)
+    deltas = rnd.normal(1_000_000, 20_000, n).astype(np.int64)
+    deltas[rnd.random(n) < 0.02] *= 3
+    return np.cumsum(deltas)
+
+
+def test_step_many_matches_step():
+    """step_many() yields the same eBits and end state as repeated step()."""
+    ts = _synthetic_timestamps(6000)
+
+    ref = PcqngCore()
+    ref._read_timestamp = iter(ts.tolist()).__next__
+    expected = [e for e in (ref.step() for _ in range(len(ts))) if e is not None]
+
+    # Uneven chunks cross warm-up, calibration and chunk boundaries
+    core = PcqngCore()
+    out = []
+    pos = 0
+    for size in (1, 1500, 2, 2048, 1000, 1449):
+        out.extend(core.step_many(ts[pos:pos + size]).tolist())
+        pos += size
+    assert pos == len(ts)
+
+    assert out == expected, "batch eBits diverged from step()"
+    assert core._q_divisor == ref._q_divisor
+    assert core._lpf.value == ref._lpf.value
+    assert core._sample_since_cal == ref._sample_since_cal
+    assert list(core._window) == list(ref._window)
+    print(f"✓ step_many reproduced {len(out)} eBits from step()")
+
+
+def test_step_many_scales_linearly():
+    """Batch cost per sample stays flat from 0.5M to 4M timestamps.
+
+    A per-recalibration rewrite of the divisor tail would make the 8×
+    larger batch ~8× dearer per sample; the bound leaves room for noise.
+    """
+    def per_sample(n):
+        ts = _synthetic_timestamps(n)
+        best = float("inf")
+        for _ in range(2):
+            core = PcqngCore(timestamp_source=lambda: 0)
+            start = time.perf_counter()
+            core.step_many(ts)
+            best = min(best, time.perf_counter() - start)
+        return best / n
+
+    small, large = per_sample(500_000), per_sample(4_000_000)
+    assert large < 2.5 * small, f"{large * 1e9:.0f} ns/sample at 4M vs {small * 1e9:.0f} at 0.5M"
+    print(f"✓ step_many: {1 / large / 1e6:.1f}M samples/s at 4M")
+
+
+# =============================================================================
+# STREAMING MEDIAN / MAD MUST MATCH FULL SORT
+# =============================================================================
+
+def _sorted_median_mad(values):
+    """Original two-sort calibration statistics from _normal_processing."""
+    n = len(values)
+    mid = n // 2
+    s = sorted(values)
+    mu = s[mid] if n % 2 else (s[mid - 1] + s[mid]) / 2
+    d = sorted(abs(x - mu) for x in values)
+    mad = d[mid] if n % 2 else (d[mid - 1] + d[mid]) / 2
+    return mu, mad
+
+
+def test_robust_window_matches_sorted_stats():
+    """_RobustWindow median/MAD equal the sort-based reference, ties included."""
+    import random
+
+    rnd = random.Random(99)
+    # Small loads force block splits and merges at every window size
+    for size, load in ((1, 1), (2, 1), (5, 2), (64, 4), (64, 512), (PcqngCore._CAL_WINDOW, 16),
+                       (PcqngCore._CAL_WINDOW, 512), (PcqngCore._CAL_WINDOW, _RobustWindow._LOAD)):
+        win = _RobustWindow(size, load)
+        stream = []
+        for _ in range(size * 3):
+            # Mix of continuous jitter and heavily repeated values
+            x = float(rnd.choice([rnd.gauss(1e6, 3e4), 1e6, rnd.randint(0, 4)]))
+            win.append(x)
+            stream.append(x)
+            if win.full:
+                expected_mu, expected_mad = _sorted_median_mad(stream[-size:])
+                mu = win.median()
+                assert mu == expected_mu
+                assert win.mad(mu) == expected_mad
+        assert list(win) == stream[-size:]
+
+    print("✓ Streaming median/MAD identical to sorted reference")
+
+
+def test_robust_window_append_is_sublinear():
+    """Appends touch one block of bounded size, whatever the window size.
+
+    Checked structurally rather than by wall-clock: after heavy churn –
+    random, ascending and descending streams, which pile evictions and
+    inserts onto the end blocks – every block holds between load/2 and
+    2*load values, so an append is a bisect over the block maxima plus an
+    O(load) insert/delete, independent of the window size.
+    """
+    import random
+
+    # Small windows with a small load, and the production calibration
+    # window with the production load
+    assert PcqngCore(timestamp_source=lambda: 0)._window._load == _RobustWindow._LOAD
+    for size, load in ((1 << 6, 8), (1 << 12, 8), (PcqngCore._CAL_WINDOW, _RobustWindow._LOAD)):
+        rnd = random.Random(size)
+        win = _RobustWindow(size, load=load)
+        win.extend(rnd.random() for _ in range(size))
+        streams = (
+            [rnd.random() for _ in range(4 * size)],
+            [float(i) for i in range(4 * size)],
+            [float(-i) for i in range(4 * size)],
+        )
+        for stream in streams:
+            for k, x in enumerate(stream):
+                win.append(x)
+                if k % 97 == 0:
+                    sizes = [len(b) for b in win._blocks]
+                    assert max(sizes) <= 2 * load
+                    assert len(sizes) == 1 or min(sizes) >= load // 2, sizes
+            assert len(win._blocks) <= size // (load // 2)
+            if size == PcqngCore._CAL_WINDOW:
+                assert len(win._blocks) > 1  # really blocked, not one flat list
+            assert win._maxes == [b[-1] for b in win._blocks]
+            assert [v for b in win._blocks for v in b] == sorted(win)
+
+
 if __name__ == "__main__":
     print("\n" + "="*70)
     print("PCQNG CANONICAL FIDELITY AUDIT")
@@ -381,6 +567,9 @@ if __name__ == "__main__":
     test_end_to_end_canonical_behavior()
     test_detect_failure_modes()
     test_parity_bit_not_frozen()
+    test_lfsr_block_matches_bit_serial()
+    test_step_many_matches_step()
+    test_robust_window_matches_sorted_stats()
     
     print("\n" + "="*70)
     print("✅ AUDIT COMPLETE: PCQNG implementation demonstrates canonical fidelity")
@@ -0,0 +1,174 @@
+"""Batched BpZAnalogFlip PRD: parity with a per-tuple port of the C++ loops."""
+
+import math
+
+import numpy as np
+import pytest
+
+from bot.pcqng_ann import (
+    BPZAFP_CFACTOR,
+    BPZAFP_SD,
+    AnalogFlipPrd,
+    BackPropNet,
+    _OUTPUT_POLY,
+    load_backprop,
+    load_config,
+    save_backprop,
+    seven_tuples,
+)
+from bot.pcqng_lpspeed import LpSpeedFilter
+
+TYPES = ["TRawNorm", "TRawUni", "TFactNorm", "TFactNorm", "TFactUni", "TRawUni", "HFactUni"]
+HIDDEN = [8, 8, 5, 8, 8, 8, 6]  # mixed structures → several stacks per role
+
+
+def _net(rnd, hidden):
+    sizes = (7, hidden, 1)
+    ws = [rnd.normal(0, 0.5, (b, a)) for a, b in zip(sizes[:-1], sizes[1:])]
+    bs = [rnd.normal(0, 0.5, b) for b in sizes[1:]]
+    return BackPropNet(sizes, ws, bs, median=float(rnd.uniform(0.3, 0.7)))
+
+
+@pytest.fixture()
+def config_path(tmp_path):
+    rnd = np.random.default_rng(22)
+    (tmp_path / "BpAnnSolutions").mkdir()
+    rows = []
+    for i, (kind, hidden) in enumerate(zip(TYPES, HIDDEN)):
+        save_backprop(_net(rnd, hidden), tmp_path / "BpAnnSolutions" / f"n{i}.ann")
+        coefs = ",".join(repr(c) for c in [0.5, 1.0] + rnd.normal(0, 0.05, 4).tolist())
+        rows.append(f'<BpAnn file="BpAnnSolutions/n{i}.ann" type="{kind}" fitcoefs="{coefs}" fitsd="0.1" />')
+    (tmp_path / "cfg.xml").write_text(
+        '<PrdConfig><BpAnnMajFilt17 BlockLength="17" FilterCoef="10.508332" FilterAmp="0.2236068">'
+        + "".join(rows) + "</BpAnnMajFilt17></PrdConfig>"
+    )
+    return tmp_path / "cfg.xml"
+
+# -- scalar reference: line-by-line transcription of the C++ -----------------
+
+def _zp(z):
+    z = max(-8.0, min(8.0, z))
+    w = 1 if z >= 0 else -1
+    t = 1.0 + 0.2316419 * w * z
+    num = 0.31938153 + (1.330274429 + (-1.821255978 * t) + (1.781477937 * t * t) + (-0.356563782 * t * t * t)) / (t * t * t * t)
+    return 0.5 + w * (0.5 - num / (2.506628275 * math.exp(0.5 * z * z) * t))
+
+
+def _pz(p):
+    P = [-0.322232431088, -1.0, -0.342242088547, -0.0204231210245, -0.0000453642210148]
+    Q = [0.099348462606, 0.588581570495, 0.531103462366, 0.10353775285, 0.0038560700634]
+    pp = p if p < 0.5 else 1.0 - p
+    pp = 0.000001 if pp <= 0 else pp
+    y = math.sqrt(math.log(1.0 / (pp * pp)))
+    r = y + ((((y * P[4] + P[3]) * y + P[2]) * y + P[1]) * y + P[0]) / ((((y * Q[4] + Q[3]) * y + Q[2]) * y + Q[1]) * y + Q[0])
+    return -r if p < 0.5 else r
+
+
+def _ffwd(net, x):
+    out = list(x)
+    for w, b in zip(net.weights, net.biases):
+        out = [1 / (1 + math.exp(-(sum(o * wk for o, wk in zip(out, row)) + bias))) for row, bias in zip(w.tolist(), b.tolist())]
+    return out[0]
+
+
+def _reference_z(cfg, tup):
+    def feed(kind, s, res):
+        for a in cfg.by_type(kind):
+            arg = _zp((_ffwd(a.net, s) - a.net.median) / a.fit_sd) - 0.5
+            res.append(sum(c * arg ** i for i, c in enumerate(a.fit_coefs.tolist())))
+
+    smean = [.125, .25, .375, .5, .625, .75, .875]
+    sdev = [0.1102397, 0.1443377, 0.1613745, 0.1666667, 0.1613745, 0.1443377, 0.1102397]
+    from bot.pcqng_zstats import _EIGTAB, _EIGV
+    t, h, s = [], [], list(tup)
+    feed("TRawNorm", s, t)
+    s = [_zp(v) for v in s]
+    feed("TRawUni", s, t)
+    s = sorted(s)
+    s = [(v - m) / d for v, m, d in zip(s, smean, sdev)]
+    s = [sum(s[j] * _EIGTAB[i][j] for j in range(7)) / math.sqrt(_EIGV[i]) for i in range(7)]
+    feed("TFactNorm", s, t)
+    s = [_zp(v) for v in s]
+    feed("TFactUni", s, t)
+    feed("HFactUni", s, h)
+    tz, hz = sum(_pz(v) for v in t), sum(_pz(v) for v in h)
+    tz += hz * BPZAFP_CFACTOR
+    if hz < 0:
+        tz = -tz
+    count = len(t) + len(h) * BPZAFP_CFACTOR ** 2
+    uni = _zp(tz / (BPZAFP_SD * math.sqrt(count))) - 0.5
+    return _pz(sum(c * uni ** i for i, c in enumerate(_OUTPUT_POLY.tolist())))
+
+# ---------------------------------------------------------------------------
+
+def test_backprop_roundtrip(tmp_path):
+    net = _net(np.random.default_rng(1), 9)
+    save_backprop(net, tmp_path / "x.ann")
+    back = load_backprop(tmp_path / "x.ann")
+    assert back.sizes == (7, 9, 1) and back.median == net.median
+    x = np.random.default_rng(2).normal(size=(5, 7))
+    assert np.allclose(back.forward(x), net.forward(x), rtol=1e-14)
+
+
+def test_seven_tuples_follow_lfsrfeed_registers():
+    filt = LpSpeedFilter(10.508332, 0.2236068)
+    data = np.random.default_rng(3).integers(0, 128, 17 * 20, dtype=np.uint8).tobytes()
+    tuples = seven_tuples(data, filt)
+    words = [0] * 7
+    for i, byte in enumerate(data):
+        for n in range(7):
+            words[n] = ((words[n] << 1) | ((byte >> (6 - n)) & 1))
+        if i % 17 == 16:
+            expected = [filt.lookup(w) for w in words]
+            assert tuples[i // 17].tolist() == expected
+
+
+def test_batch_matches_scalar_reference(config_path):
+    prd = AnalogFlipPrd(load_config(config_path))
+    assert prd.combined_count == 4 and len(prd.groups["TFactNorm"].stacks) == 2
+    data = np.random.default_rng(4).integers(0, 128, 17 * 4 * 25, dtype=np.uint8).tobytes()
+    tuples = seven_tuples(data, prd.filter)
+    z = prd.tuple_z(tuples)
+    ref = np.array([_reference_z(prd.config, t) for t in tuples.tolist()])
+    # The 60th-degree output polynomial (1e23 coefficients) amplifies last-ulp
+    # pow() differences; everything upstream agrees to ~1e-15
+    assert np.allclose(z, ref, rtol=1e-7, atol=1e-7)
+
+    # Generate(): Σz over combined_count tuples / √count, streamed in pieces
+    expected = ref.reshape(-1, 4).sum(axis=1) / 2.0
+    outs = [prd.process(data[i:i + 100]) for i in range(0, len(data), 100)]
+    assert np.allclose(np.concatenate(outs), expected, rtol=1e-7, atol=1e-7)
+
+
+def test_missing_networks_are_reported(tmp_path):
+    from pathlib import Path
+
+    canonical = Path(__file__).resolve().parents[1] / "temporal_rng" / "PsigPrdConfig.xml"
+    with pytest.raises(FileNotFoundError):
+        load_config(canonical, ann_root=tmp_path)
+
+
+def test_archive_workers_match_single_process(config_path, tmp_path):
+    from bot.pcqng_ann import process_archive
+    from bot.pcqng_archive import PcqngArchive
+
+    t0 = 1_750_000_000 * 10**9
+    rnd = np.random.default_rng(5)
+    arch = PcqngArchive(tmp_path / "arch", flush_s=3600)
+    ticks = [rnd.integers(0, 128, 68, dtype=np.uint8).tobytes() for _ in range(300)]
+    for i, tick in enumerate(ticks):
+        arch.record(b"", [tick[k:k + 17] for k in range(0, 68, 17)], t_ns=t0 + i * 10**6)
+    arch.close()
+
+    cfg = load_config(config_path)
+    expected = AnalogFlipPrd(cfg).process(b"".join(ticks))
+    args = (tmp_path / "arch", t0 / 1e9, t0 / 1e9 + 1)
+    assert np.array_equal(process_archive(AnalogFlipPrd(cfg), *args), expected)
+    import bot.pcqng_ann as ann
+
+    old = ann._CHUNK_TUPLES
+    ann._CHUNK_TUPLES = 64  # several batches per worker
+    try:
+        assert np.array_equal(process_archive(AnalogFlipPrd(cfg), *args, workers=2), expected)
+    finally:
+        ann._CHUNK_TUPLES = old
@@ -0,0 +1,81 @@
+"""Async PCQNG stream: distinct slices per consumer and clean cancellation."""
+
+import asyncio
+import itertools
+import threading
+
+import bot.pcqng_async as pcqng_async
+from bot.entropy_ring import AsyncEntropyFeed, ByteRing
+from bot.pcqng_async import SharedPcqngGenerator, pcqng_stream
+
+
+class _CountingRng:
+    """Stand-in generator whose packets are big-endian uint16 counters."""
+
+    def __init__(self) -> None:
+        self._n = itertools.count()
+
+    def step(self) -> None:
+        pass
+
+    def read_packets(self):
+        return [b"".join(next(self._n).to_bytes(2, "big") for _ in range(8)) for _ in range(4)]
+
+
+def test_concurrent_consumers_get_distinct_slices():
+    gen = SharedPcqngGenerator(rng_factory=_CountingRng, period_s=0.0005)
+
+    async def consume(n_chunks, size):
+        out = []
+        async for chunk in pcqng_stream(size, generator=gen):
+            out.append(chunk)
+            if len(out) == n_chunks:
+                break
+        return out
+
+    async def main():
+        results = await asyncio.gather(consume(20, 50), consume(30, 8), consume(5, 300))
+
+        # a cancelled consumer leaves no waiter behind
+        async def stuck():
+            async for _ in pcqng_stream(1 << 30, generator=gen):
+                pass
+
+        task = asyncio.ensure_future(stuck())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert len(gen.feed) == 0
+        return results
+
+    try:
+        results = asyncio.run(main())
+    finally:
+        gen.stop()
+
+    for chunks, size in zip(results, (50, 8, 300)):
+        assert all(isinstance(c, bytes) and len(c) == size for c in chunks)
+    # Every counter value may reach at most one consumer
+    blob = b"".join(c for chunks in results for c in chunks)
+    counters = [int.from_bytes(blob[i:i + 2], "big") for i in range(0, len(blob), 2)]
+    assert len(counters) == (20 * 50 + 30 * 8 + 5 * 300) // 2
+    assert len(set(counters)) == len(counters)
+    assert not gen.running
+
+
+def test_stream_attaches_to_existing_feed():
+    """With feed=..., chunks come from that feed and no sampler starts."""
+    ring = ByteRing(1 << 12)
+    feed = AsyncEntropyFeed(ring.read)
+    ring.write(bytes(range(100)))
+
+    async def main():
+        out = []
+        async for chunk in pcqng_stream(30, feed=feed):
+            out.append(chunk)
+            if len(out) == 3:
+                return out
+
+    assert asyncio.run(main()) == [bytes(range(i, i + 30)) for i in (0, 30, 60)]
+    assert pcqng_async._shared is None
+    assert not any(t.name == "pcqng-shared" for t in threading.enumerate())
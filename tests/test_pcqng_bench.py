@@ -0,0 +1,69 @@
+"""Benchmark suite plumbing: quick run shape and baseline comparison."""
+
+import json
+
+import numpy as np
+
+from benchmarks.pcqng_bench import _STACK_KEYS, BASELINE_PATH, compare, main, run, run_meta, stack_mismatch
+
+
+def test_quick_run_reports_every_micro_benchmark():
+    report = run(samples=400, e2e=False)
+    assert set(report["results"]) == {
+        "core_step", "lfsr_next_bit", "process_e_byte", "calibration", "lp_speed_filter", "bounded_walk",
+        "stream_stats",
+    }
+    assert report["results"]["process_e_byte"]["packets_per_s"] > 0
+    assert BASELINE_PATH.exists()
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"results": {"x": {"p50_ns": 100.0, "bytes_per_s": 1000.0, "note": 3}}}
+    ok = {"results": {"x": {"p50_ns": 120.0, "bytes_per_s": 800.0, "note": 99}}}
+    slow = {"results": {"x": {"p50_ns": 200.0, "bytes_per_s": 500.0}}}
+    assert compare(ok, baseline, tolerance=0.3) == []
+    assert len(compare(slow, baseline, tolerance=0.3)) == 2
+
+
+def test_compare_enforces_walk_speedup_floor():
+    """BoundedWalkGen must stay >= 50x the bit-serial reference."""
+    walk = {"results": {"bounded_walk": {"speedup": 63.3}}}
+    assert compare(walk, walk) == []
+    slow = {"results": {"bounded_walk": {"speedup": 49.0}}}
+    assert compare(slow, walk, tolerance=1.0) == ["bounded_walk.speedup: 49.0 below the required 50.0x"]
+
+
+def test_compare_refuses_a_baseline_from_another_stack(tmp_path):
+    here = {"meta": run_meta()}
+    assert stack_mismatch(here, here) == []
+    other = {"meta": dict(here["meta"], numpy="0.0.0-other"), "results": {}}
+    assert stack_mismatch(here, other) == [f"numpy: baseline 0.0.0-other, installed {np.__version__}"]
+    assert stack_mismatch(here, {"results": {}})  # no meta: unknown stack
+
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(other))
+    assert main(["--no-e2e", "--compare", str(path)]) == 2  # refused before running
+
+
+def test_baseline_is_recorded_on_the_pinned_stack():
+    """--compare refuses other stacks, so the shipped baseline must match requirements.txt."""
+    pins = dict(
+        line.split("==", 1)
+        for line in (BASELINE_PATH.parents[1] / "requirements.txt").read_text().split()
+        if "==" in line
+    )
+    meta = json.loads(BASELINE_PATH.read_text())["meta"]
+    assert meta["numpy"] == pins["numpy"]
+    assert "scipy" not in _STACK_KEYS  # optional: not pinned, must not block --compare
+
+
+def test_compare_runs_against_the_shipped_baseline(tmp_path, capsys):
+    """On the test stack --compare really compares, including the speedup floor."""
+    out = tmp_path / "report.json"
+    code = main(["--no-e2e", "--samples", "4000", "--compare", str(BASELINE_PATH), "--out", str(out)])
+    assert "STACK MISMATCH" not in capsys.readouterr().err
+    assert code in (0, 1)  # 1 = timing regressions on a busy box, still a comparison
+    report = json.loads(out.read_text())
+    baseline = json.loads(BASELINE_PATH.read_text())
+    assert set(baseline["results"]) - {"end_to_end"} <= set(report["results"])
+    assert compare(report, baseline, tolerance=float("inf")) == []  # MIN_SPEEDUP floors hold
@@ -0,0 +1,84 @@
+"""Timestamp source selection: benchmark metrics and overrides."""
+
+import time
+
+import pytest
+
+import bot.pcqng_clocks as clocks
+from bot.pcqng_clocks import available_sources, benchmark_source, clock_report, select_source, selected_name
+
+
+def test_benchmark_reports_characteristics():
+    sources = available_sources()
+    assert "perf_counter" in sources
+    r = benchmark_source("perf_counter", sources["perf_counter"], overhead_calls=2000, paced_samples=8)
+    assert r["usable"] and r["overhead_ns"] > 0 and r["resolution_ns"] > 0
+    assert r["resolution_ns"] == r["getres_ns"]  # the clock's, not the call cost
+    assert r["delta_mean_ns"] > 0.5e6  # ~1 ms tick in ns
+    assert r["entropy_bits_est"] >= 0
+
+    # A frozen counter is never selected
+    frozen = benchmark_source("frozen", lambda: 42, overhead_calls=100, paced_samples=4)
+    assert not frozen["usable"]
+
+
+def test_near_ties_keep_preference_order():
+    results = [
+        {"name": n, "entropy_bits_est": e, "usable": True}
+        for n, e in [("monotonic_raw", 19.9), ("monotonic", 20.1), ("thread_cputime", 14.2), ("perf_counter", 20.0)]
+    ]
+    assert [r["name"] for r in clocks._rank(results)] == ["monotonic_raw", "monotonic", "perf_counter", "thread_cputime"]
+    results[0]["entropy_bits_est"] = 15.0
+    assert clocks._rank(results)[0]["name"] == "monotonic"
+
+
+def test_default_benchmarks_once(monkeypatch):
+    runs = []
+
+    def fake(readers, **kwargs):
+        runs.append(list(readers))
+        return [
+            {"name": n, "entropy_bits_est": 20.0 if n == "monotonic" else 10.0, "usable": True}
+            for n in readers
+        ]
+
+    monkeypatch.delenv(clocks.CLOCK_ENV, raising=False)
+    monkeypatch.setattr(clocks, "benchmark_sources", fake)
+    monkeypatch.setattr(clocks, "available_sources", lambda: {"monotonic": time.monotonic_ns, "perf_counter": time.perf_counter_ns})
+    clocks._selection.cache_clear()
+    try:
+        assert selected_name() == "monotonic"
+        report = clock_report()
+        assert report["selected"] == "monotonic" and report["reason"] == "benchmark"
+        assert selected_name() == "monotonic"
+        assert len(runs) == 1  # cached per process
+    finally:
+        clocks._selection.cache_clear()
+
+
+def test_report_never_benchmarks(monkeypatch):
+    """A process that has not picked a clock (shared-ring API worker) reports None."""
+    def fail(*args, **kwargs):
+        raise AssertionError("clock_report benchmarked")
+
+    monkeypatch.setattr(clocks, "benchmark_sources", fail)
+    monkeypatch.setattr(clocks, "_active", None)
+    clocks._selection.cache_clear()
+    try:
+        assert clock_report() is None
+    finally:
+        clocks._selection.cache_clear()
+
+
+def test_override_and_auto_selection():
+    assert selected_name("perf_counter") == "perf_counter"
+    report = clock_report()
+    assert report["selected"] == "perf_counter" and report["reason"] == "override"
+    assert select_source("perf_counter") is time.perf_counter_ns
+    with pytest.raises(ValueError):
+        select_source("sundial")
+
+    selected_name("auto")
+    auto = clock_report()
+    assert auto["selected"] in available_sources()
+    assert {c["name"] for c in auto["candidates"]} == set(available_sources())
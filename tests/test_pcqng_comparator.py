@@ -0,0 +1,117 @@
+"""Batched PrdComparator: parity with a per-trial port of GenPrdResult."""
+
+import numpy as np
+import pytest
+
+from bot.pcqng_comparator import (
+    PSI_CLAIRVOYANCE,
+    PSI_COHERENCE,
+    PSI_NOTARGETS,
+    PSI_PRECOGNITION,
+    PSI_PSYCHOKINESIS,
+    ArrayTargetSource,
+    PrdComparator,
+)
+
+
+class _ScalarTargets:
+    """ITargetGen with only the per-word calls."""
+
+    def __init__(self, words, precog):
+        self._w, self._p = iter(words.tolist()), iter(precog.tolist())
+
+    def get_next_target(self):
+        return next(self._w)
+
+    def get_next_precog_target(self):
+        return next(self._p)
+
+
+class _Reference:
+    """``PrdComparator`` line by line (targets only)."""
+
+    def __init__(self, src):
+        self.src, self.ring, self.idx = src, [0] * 1000, 0
+        ti, tw = 6, 0
+        for i in range(1000):
+            if ti == 6:
+                tw = src.get_next_target()
+            self.ring[i] = 2 * ((tw >> ti) & 1) - 1
+            ti = ti - 1 if ti else 6
+
+    def gen(self, count, mode):
+        out, ti, tw = [], 6, 0
+        for _ in range(count):
+            if mode in (PSI_NOTARGETS, PSI_PSYCHOKINESIS):
+                out.append(1)
+                if mode == PSI_PSYCHOKINESIS and ti == 6:
+                    self.src.get_next_target()
+            elif mode == PSI_PRECOGNITION:
+                if ti == 6:
+                    tw = self.src.get_next_precog_target()
+                out.append(2 * ((tw >> ti) & 1) - 1)
+            else:
+                out.append(self.ring[self.idx])
+                if ti == 6:
+                    tw = self.src.get_next_target()
+                self.ring[self.idx] = 2 * ((tw >> ti) & 1) - 1
+                self.idx = (self.idx + 1) % 1000
+            ti = ti - 1 if ti else 6
+        return out
+
+
+@pytest.fixture()
+def words():
+    rnd = np.random.default_rng(24)
+    return rnd.integers(0, 128, 20_000, dtype=np.uint8), rnd.integers(0, 128, 20_000, dtype=np.uint8)
+
+
+def test_targets_match_reference_across_modes_and_counts(words):
+    ref = _Reference(_ScalarTargets(*words))
+    batch = PrdComparator(ArrayTargetSource(*words))
+    scalar = PrdComparator(_ScalarTargets(*words))   # per-word fallback path
+    rnd = np.random.default_rng(5)
+    schedule = [(PSI_CLAIRVOYANCE, 3), (PSI_CLAIRVOYANCE, 1500), (PSI_PSYCHOKINESIS, 20), (PSI_PRECOGNITION, 9),
+                (PSI_CLAIRVOYANCE, 700), (PSI_NOTARGETS, 5), (PSI_CLAIRVOYANCE, 0), (PSI_PRECOGNITION, 4000)]
+    for mode, count in schedule:
+        psi = rnd.choice([-1.0, 1.0], count)
+        batch.set_psi_mode(mode)
+        scalar.set_psi_mode(mode)
+        want = ref.gen(count, mode)
+        assert batch.compare(psi).tolist() == want
+        assert scalar.compare(psi).tolist() == want
+
+
+def test_tallies_count_sign_agreement(words):
+    comp = PrdComparator(ArrayTargetSource(*words), psi_mode=PSI_PRECOGNITION)
+    psi = np.random.default_rng(6).normal(size=5000)
+    psi[:10] = 0.0                                   # not scored
+    target = comp.compare(psi)
+    tally = comp.tallies[PSI_PRECOGNITION]
+    assert tally.trials == 4990
+    assert tally.hits == int((np.sign(psi) == target).sum())
+    assert comp.tallies[PSI_CLAIRVOYANCE].trials == 0
+    stats = comp.stats()["tallies"]["precognition"]
+    assert 0.45 < stats["hit_rate"] < 0.55 and 0 < stats["p"] < 1
+
+
+class _Gen:
+    def __init__(self, values):
+        self._it = iter(values)
+
+    def generate(self):
+        return next(self._it)
+
+
+def test_gen_prd_result_layout_and_coherence(words):
+    rnd = np.random.default_rng(7)
+    bias, ac = rnd.normal(size=100), rnd.normal(size=100)
+    comp = PrdComparator(ArrayTargetSource(*words), _Gen(bias), PSI_COHERENCE, prd_ac=_Gen(ac))
+    psi, target = comp.gen_prd_result(100)
+    assert np.array_equal(psi, np.concatenate([bias, ac]))
+    assert np.array_equal(target, np.sign(ac))
+    assert comp.tallies[PSI_COHERENCE].hits == int((np.sign(bias) == np.sign(ac)).sum())
+    with pytest.raises(ValueError):
+        PrdComparator(ArrayTargetSource(*words), psi_mode=PSI_COHERENCE).compare(bias)
+    with pytest.raises(ValueError):
+        comp.set_psi_mode(7)
@@ -0,0 +1,86 @@
+"""Continuous PCQNG health tests: cutoffs, alarms, quarantine and release."""
+
+import numpy as np
+
+from bot.pcqng import PcqngRng
+from bot.pcqng_health import DEFAULT_HEALTH_MODE, HealthMonitor, PcqngHealth, critical_binomial
+from bot.pcqng_replay import TraceSource
+
+
+def test_apt_cutoffs_match_sp800_90b_table():
+    # SP 800-90B Table 2, W = 512, alpha = 2^-20
+    table = {0.5: 410, 1: 311, 2: 177, 4: 62, 8: 13}
+    for h, cutoff in table.items():
+        assert 1 + critical_binomial(512, 2.0 ** -h, 2.0 ** -20) == cutoff
+
+
+def test_uniform_bytes_pass_in_any_batching():
+    data = np.random.default_rng(7).integers(0, 128, 300_000, dtype=np.uint8)
+    whole, pieces = HealthMonitor.for_packets(), HealthMonitor.for_packets()
+    assert whole.feed(data)
+    for chunk in np.array_split(data, 997):
+        pieces.feed(chunk)
+    assert whole.alarms == pieces.alarms == {"rct": 0, "apt": 0, "bias": 0}
+    assert abs(whole.stats()["bias"] - pieces.stats()["bias"]) < 1e-9
+
+
+def test_stuck_run_across_batches_quarantines_then_recovers():
+    mon = HealthMonitor.for_ebits(recover_after=1000)
+    rnd = np.random.default_rng(1)
+    mon.feed(rnd.integers(90, 110, 2000, dtype=np.uint8))
+    assert mon.ok
+    # One run of 41 equal samples split over many small batches
+    for _ in range(41):
+        mon.feed(bytes([255]))
+    assert not mon.ok and mon.alarms["rct"] == 1
+    mon.feed(rnd.integers(90, 110, 999, dtype=np.uint8))
+    assert not mon.ok
+    mon.feed(rnd.integers(90, 110, 1, dtype=np.uint8))
+    assert mon.ok
+
+
+def _trace(deltas):
+    return np.cumsum(deltas).astype(np.int64)
+
+
+def test_rng_withholds_packets_from_stuck_source():
+    rnd = np.random.default_rng(5)
+    healthy = PcqngRng(timestamp_source=TraceSource(np.empty(0, np.int64)), health=PcqngHealth())
+    healthy.step_many(_trace(rnd.normal(5000, 1000, 6000).astype(np.int64)))
+    assert len(healthy.read_packets()) > 1000 and healthy.health.ok
+
+    stuck = PcqngRng(timestamp_source=TraceSource(np.empty(0, np.int64)), health=PcqngHealth())
+    stuck.step_many(_trace(np.full(3000, 5000)))
+    assert stuck.read_packets() == []
+    assert not stuck.health.ok and stuck.health.withheld_packets > 0
+
+    # monitor mode: alarms recorded, packets still released
+    observed = PcqngRng(timestamp_source=TraceSource(np.empty(0, np.int64)), health=PcqngHealth(enforce=False))
+    observed.step_many(_trace(np.full(3000, 5000)))
+    assert observed.read_packets() and not observed.health.ok
+
+
+def test_default_mode_quarantines_and_serves_real_jitter():
+    """~1 ms ticks with 60 µs jitter pass every test under the enforced default.
+
+    Only the LFSR start-up (its first packets still carry the seed's 0x2A /
+    0x55 alternation) is withheld; after that every batch is served.  A
+    stuck source on the same default is withheld throughout.
+    """
+    health = PcqngHealth.from_mode(DEFAULT_HEALTH_MODE)
+    assert health.enforce
+    rnd = np.random.default_rng(13)
+    trace = np.cumsum(rnd.normal(1_000_000, 60_000, 20_000).astype(np.int64))
+    rng = PcqngRng(timestamp_source=TraceSource(trace[:0]), health=health)
+    served = []
+    for chunk in np.array_split(trace, 20):          # ~1 s of ticks each
+        rng.step_many(chunk)
+        served.append(len(rng.read_packets()))
+    assert all(n > 0 for n in served[2:]), f"packets stopped flowing: {served}"
+    assert health.ok and health.ebits.alarms == {"rct": 0, "apt": 0, "bias": 0}
+    assert health.withheld_packets <= served[2]      # start-up batch at most
+    assert sum(served) > 3.5 * (len(trace) - 2000)   # 4 packets per NORMAL eBit
+
+    stuck = PcqngRng(timestamp_source=TraceSource(trace[:0]), health=PcqngHealth.from_mode(DEFAULT_HEALTH_MODE))
+    stuck.step_many(_trace(np.full(20_000, 1_000_000)))
+    assert stuck.read_packets() == [] and not stuck.health.ok
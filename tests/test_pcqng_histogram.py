@@ -0,0 +1,49 @@
+"""Rolling PCQNG byte histogram: bucket expiry and bias statistics."""
+
+import numpy as np
+
+from bot.pcqng_histogram import RollingHistogram
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.t = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_windows_expire_old_buckets():
+    clock = _Clock()
+    hist = RollingHistogram({"10s": (1.0, 10), "1m": (6.0, 10)}, clock=clock)
+    hist.add(bytes([5] * 100))
+    clock.t += 5
+    hist.add(bytes([7] * 50))
+
+    snap = hist.snapshot()
+    assert snap["10s"]["total"] == 150 and snap["10s"]["counts"][5] == 100
+
+    clock.t += 6  # first batch left the 10 s window, both still in 1 min
+    snap = hist.snapshot()
+    assert snap["10s"]["total"] == 50 and snap["10s"]["counts"][5] == 0
+    assert snap["1m"]["total"] == 150
+
+    clock.t += 3600  # everything aged out, lifetime keeps it
+    snap = hist.snapshot()
+    assert snap["10s"]["total"] == snap["1m"]["total"] == 0
+    assert snap["lifetime"]["total"] == hist.total == 150
+    assert sum(hist.lifetime_bins()) == 150 and hist.lifetime_bins()[1] == 150
+
+
+def test_fit_flags_bias():
+    rnd = np.random.default_rng(1)
+    fair = RollingHistogram()
+    fair.add(rnd.integers(0, 128, 200_000, dtype=np.uint8).tobytes())
+    stats = fair.snapshot()["1m"]
+    assert stats["chi2_p"] > 1e-3 and abs(stats["mean_drift_z"]) < 4
+
+    biased = RollingHistogram()
+    biased.add(np.minimum(rnd.integers(0, 140, 200_000), 127).astype(np.uint8).tobytes())
+    stats = biased.snapshot()["1m"]
+    assert stats["chi2_p"] < 1e-6 and stats["mean_drift_z"] > 10
+    assert stats["out_of_support"] == 0
@@ -0,0 +1,60 @@
+"""LpSpeedFilter table: bit-identical to LpFilter over 17-bit windows."""
+
+import numpy as np
+
+from bot.pcqng import _LpFilter
+from bot.pcqng_lpspeed import LpSpeedFilter
+
+COEF = 10.508332  # PsigPrdConfig.xml › BpAnnMajFilt17 FilterCoef
+
+
+def _scalar(bits, coef=COEF):
+    lp = _LpFilter()
+    lp.init(0.0)
+    for b in bits:
+        lp.feed(b * 2 - 1, coef)
+    return lp.value
+
+
+def test_table_matches_scalar_filter():
+    filt = LpSpeedFilter(COEF)
+    assert filt.table.dtype == np.float32 and len(filt.table) == 1 << 17
+    for word in np.random.default_rng(20).integers(0, 1 << 17, 500).tolist() + [0, (1 << 17) - 1]:
+        bits = [(word >> j) & 1 for j in range(16, -1, -1)]
+        assert filt.table[word] == np.float32(_scalar(bits))
+    assert filt.lookup(0x1FFFF | 0x20000) == filt.lookup(0x1FFFF)
+
+
+def test_batch_path_and_truncation_error():
+    filt = LpSpeedFilter(COEF)
+    bits = np.random.default_rng(21).integers(0, 2, 5000)
+    out = filt.filter_bits(bits)
+
+    # Each output is the scalar filter over the trailing 17 bits (zeros before start)
+    padded = [0] * 16 + bits.tolist()
+    for t in (0, 5, 16, 17, 1000, 4999):
+        assert out[t] == np.float32(_scalar(padded[t:t + 17]))
+
+    # …and within (1 - 1/L)^17 of the untruncated filter once warmed up
+    lp, exact = _LpFilter(), []
+    for b in bits.tolist():
+        exact.append(lp.feed(b * 2 - 1, COEF))
+    assert np.abs(np.asarray(exact)[16:] - out[16:]).max() <= (1 - 1 / COEF) ** 17 + 1e-6
+
+    # Chunked and multi-channel calls agree with one big call
+    history = filt.words(bits[:1234])[-1]
+    assert np.array_equal(filt.filter_bits(bits[1234:], history), out[1234:])
+    channels = bits[:4998].reshape(7, -1)
+    assert np.array_equal(filt.filter_bits(channels)[3], filt.filter_bits(channels[3]))
+
+
+def test_filter_amp_divides_in_double():
+    """LookUp[w] / filterAmplitude_: float entry promoted to double first."""
+    amp = 0.2236068
+    scaled = LpSpeedFilter(COEF, filter_amp=amp)
+    bits = np.random.default_rng(22).integers(0, 2, 300)
+    padded = [0] * 16 + bits.tolist()
+    want = [float(np.float32(_scalar(padded[t:t + 17]))) / amp for t in range(len(bits))]
+    got = scaled.filter_bits(bits)
+    assert got.dtype == np.float64 and got.tolist() == want
+    assert scaled.lookup(0x1FFFF) == float(np.float32(_scalar([1] * 17))) / amp
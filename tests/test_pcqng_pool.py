@@ -0,0 +1,134 @@
+"""PCQNG generator pool: loss-less interleaving and live multi-process smoke test."""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+import bot.pcqng_pool as pool_mod
+from bot.pcqng_pool import PcqngPool, interleave_packets
+
+
+def _deinterleave(packets):
+    """Inverse of interleave_packets (test helper)."""
+    n = len(packets)
+    arr = np.frombuffer(b"".join(packets), dtype=np.uint8).reshape(-1, 1)
+    bits = np.unpackbits(arr, axis=-1)[:, 1:].reshape(-1)
+    per_source = bits.reshape(-1, n).T.reshape(n, -1, 7)
+    padded = np.zeros(per_source.shape[:2] + (8,), dtype=np.uint8)
+    padded[..., 1:] = per_source
+    return [np.packbits(p, axis=-1).tobytes() for p in padded]
+
+
+def test_interleave_is_lossless_and_alternating():
+    rnd = np.random.default_rng(0)
+    for n in (1, 2, 3, 8):
+        packets = [rnd.integers(0, 128, 17, dtype=np.uint8).tobytes() for _ in range(n)]
+        merged = interleave_packets(packets)
+        assert len(merged) == n and all(len(p) == 17 for p in merged)
+        assert all(b < 128 for p in merged for b in p), "7-bit format lost"
+        assert _deinterleave(merged) == packets
+
+    # a1 b1 a2 b2 …: all-ones ⊕ all-zeros alternates 1010101 / 0101010
+    merged = interleave_packets([bytes([0x7F] * 17), bytes(17)])
+    assert merged[0][:2] == bytes([0b1010101, 0b0101010])
+
+
+def test_pool_produces_interleaved_packets():
+    """Two worker processes calibrate, report health and feed the merge."""
+    with PcqngPool(workers=2, stall_s=10.0) as pool:
+        got = []
+        deadline = time.time() + 20
+        while len(got) < 8 and time.time() < deadline:
+            pool.step()
+            got.extend(pool.read_packets())
+            time.sleep(0.02)
+        health = pool.health()
+
+    assert len(got) >= 8, "pool produced no packets"
+    assert all(len(p) == 17 for p in got)
+    assert len(got) % 2 == 0, "packets must be merged in whole groups"
+    assert all(h["alive"] and h["healthy"] and h["packets"] > 0 for h in health)
+
+
+class _BusyQueue:
+    """Parent queue that is full for the first few puts (or seconds)."""
+
+    def __init__(self, stop, full_puts=3, full_s=0.0):
+        self.stop, self.full_puts, self.items = stop, full_puts, []
+        self.full_until = time.monotonic() + full_s
+
+    def put(self, *args, **kwargs):  # pragma: no cover - must not be used
+        raise AssertionError("worker must not block on the parent queue")
+
+    def put_nowait(self, item):
+        if self.full_puts or time.monotonic() < self.full_until:
+            self.full_puts = max(0, self.full_puts - 1)
+            raise queue.Full
+        self.items.append(item)
+        if item[2] is not None:
+            self.stop.set()
+
+
+def test_worker_keeps_heartbeat_when_parent_is_behind(monkeypatch):
+    """A full queue neither stalls the sampler nor loses the heartbeat."""
+    monkeypatch.setattr(pool_mod, "_HEARTBEAT_S", 0.05)
+    stop = threading.Event()
+    q = _BusyQueue(stop)
+    worker = threading.Thread(target=pool_mod._worker_main, args=(0, None, q, stop))
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+    assert q.full_puts == 0 and q.items, "no message after the queue drained"
+    assert q.items[-1][2] is not None, "heartbeat status dropped on queue.Full"
+
+
+def test_worker_caps_pending_and_counts_drops(monkeypatch):
+    """A long-full parent queue sheds the oldest packets and reports it."""
+    monkeypatch.setattr(pool_mod, "_HEARTBEAT_S", 0.05)
+    monkeypatch.setattr(pool_mod, "_PENDING_PACKETS", 50)
+    stop = threading.Event()
+    q = _BusyQueue(stop, full_s=3.0)             # well past calibration
+    worker = threading.Thread(target=pool_mod._worker_main, args=(0, None, q, stop))
+    worker.start()
+    worker.join(timeout=20)
+    assert not worker.is_alive()
+    _, blob, status = q.items[-1]
+    assert len(blob) <= 50 * 17
+    assert status["dropped"] > 0
+
+
+def test_parent_backlog_overflow_is_counted():
+    pool = PcqngPool(workers=1, cpus=[0], backlog_packets=4)
+    pool._queue = queue.Queue()
+    pool._queue.put((0, bytes(17 * 10), {"dropped": 3}))
+    pool.step()
+    (report,) = pool.health()
+    assert report["backlog"] == 4
+    assert report["dropped_backlog"] == 6 and report["dropped_worker"] == 3
+
+
+def _pool_rate(workers, seconds=3.0):
+    """Merged packets/s once every worker is calibrated and flowing."""
+    with PcqngPool(workers=workers, stall_s=30.0) as pool:
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            pool.step()
+            pool.read_packets()
+            if all(h["packets"] for h in pool.health()):
+                break
+            time.sleep(0.02)
+        got, t0 = 0, time.monotonic()
+        while time.monotonic() - t0 < seconds:
+            time.sleep(0.05)
+            pool.step()
+            got += len(pool.read_packets())
+        return got / (time.monotonic() - t0)
+
+
+def test_throughput_scales_with_worker_count():
+    """Each worker adds its own 1 ms sampler: 3 workers ≈ 3x one worker."""
+    one, three = _pool_rate(1), _pool_rate(3)
+    assert one > 0
+    assert three > 2.0 * one, (one, three)
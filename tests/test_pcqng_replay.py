@@ -0,0 +1,179 @@
+"""Deterministic PCQNG replay tests.
+
+Recorded timestamp traces drive the unchanged PcqngCore/PcqngRng pipeline,
+so these checks run in well under a second and give identical packets on
+every host – unlike the real-time jitter tests in test_pcqng.py.
+"""
+
+import json
+
+import numpy as np
+import pytest
+
+from bot.pcqng import PcqngRng
+from bot.pcqng_replay import (
+    TRACE_DTYPE,
+    TraceSource,
+    load_trace,
+    record_trace,
+    replay_ebits,
+    replay_packets,
+)
+
+
+def _write_trace(path, n=8000, seed=3):
+    rnd = np.random.default_rng(seed)
+    deltas = rnd.normal(1_000_000, 25_000, n).astype(np.int64)
+    np.cumsum(deltas).astype(TRACE_DTYPE).tofile(path)
+    return path
+
+
+def test_replay_matches_scalar_step(tmp_path):
+    """Batch replay packets equal a PcqngRng stepped through TraceSource."""
+    path = _write_trace(tmp_path / "trace.i64")
+    trace = load_trace(path)
+    assert isinstance(trace, np.memmap)
+
+    rng = PcqngRng(timestamp_source=TraceSource(trace))
+    for _ in range(len(trace)):
+        rng.step()
+    expected = rng.read_packets()
+
+    replayed = [p for chunk in replay_packets(path, chunk_size=1000) for p in chunk]
+    assert len(expected) > 100
+    assert replayed == expected
+
+
+def test_replay_is_deterministic(tmp_path):
+    """Two replays of the same capture give identical eBits."""
+    path = _write_trace(tmp_path / "trace.i64", n=5000)
+    a = np.concatenate(list(replay_ebits(path)))
+    b = np.concatenate(list(replay_ebits(path, chunk_size=333)))
+    assert len(a) == 5000 - 1 - 3 - 1000
+    assert np.array_equal(a, b)
+
+
+def test_record_trace_roundtrip(tmp_path):
+    """record_trace writes int64 timestamps loadable by load_trace."""
+    ticks = iter(range(1000, 1100, 10))
+    path = record_trace(tmp_path / "cap.i64", 10, source=lambda: next(ticks), interval_s=0)
+    assert load_trace(path).tolist() == list(range(1000, 1100, 10))
+
+
+def test_trace_source_exhaustion():
+    src = TraceSource(np.arange(3, dtype=TRACE_DTYPE))
+    assert [src(), src(), src()] == [0, 1, 2]
+    try:
+        src()
+    except EOFError:
+        pass
+    else:
+        raise AssertionError("exhausted trace must raise EOFError")
+
+
+def test_trace_source_reads_memmap_lazily(tmp_path):
+    """The memmap is kept, not copied into Python ints up front."""
+    from bot.pcqng_replay import _SOURCE_CHUNK
+
+    path = tmp_path / "long.i64"
+    np.arange(2 * _SOURCE_CHUNK + 5, dtype=TRACE_DTYPE).tofile(path)
+    trace = load_trace(path)
+    src = TraceSource(path)
+    assert isinstance(src._trace, np.memmap) and src.remaining == len(trace)
+    got = [src() for _ in range(_SOURCE_CHUNK + 1)]
+    assert got == list(range(_SOURCE_CHUNK + 1))
+    assert len(src._chunk) <= _SOURCE_CHUNK
+    assert src.remaining == len(trace) - _SOURCE_CHUNK - 1
+    rest = [src() for _ in range(src.remaining)]
+    assert got + rest == trace.tolist() and src.remaining == 0
+
+
+def test_warm_start_resumes_calibrated_stream(tmp_path):
+    """A restored PcqngRng continues with the packets the original would emit."""
+    from bot.pcqng_warmstart import load_warm_start, save_warm_start
+
+    trace = load_trace(_write_trace(tmp_path / "trace.i64", n=4000))
+    split = 2500
+
+    original = PcqngRng(timestamp_source=TraceSource(trace[:0]))
+    original.step_many(trace[:split])
+    original.read_packets()
+    snap = tmp_path / "warm.json"
+    assert save_warm_start(original, snap)
+
+    restored = PcqngRng(timestamp_source=TraceSource(trace[:0]))
+    assert load_warm_start(restored, snap)
+    # The restored core re-anchors on the last timestamp the original saw
+    restored.step_many(trace[split - 1:])
+    original.step_many(trace[split:])
+    expected = original.read_packets()
+    assert len(expected) == 4 * (len(trace) - split)
+    assert restored.read_packets() == expected
+
+    # Stale or foreign snapshots fall back to full calibration
+    assert not load_warm_start(PcqngRng(), snap, max_age_s=-1)
+    record = json.loads(snap.read_text())
+    record["host"] = "elsewhere"
+    snap.write_text(json.dumps(record))
+    assert not load_warm_start(PcqngRng(), snap)
+    assert not load_warm_start(PcqngRng(), tmp_path / "missing.json")
+    assert save_warm_start(PcqngRng(), snap) is False  # still warming up
+
+
+def test_warm_start_files_are_private(tmp_path):
+    """Snapshots hold the LFSR register: written 0600, refused if others can write them."""
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    from bot.pcqng_warmstart import claim_slot, load_warm_start, save_warm_start
+
+    trace = load_trace(_write_trace(tmp_path / "trace.i64", n=2500))
+    gen = PcqngRng(timestamp_source=TraceSource(trace[:0]))
+    gen.step_many(trace)
+    snap = tmp_path / "warm.json"
+    assert save_warm_start(gen, snap)
+    assert snap.stat().st_mode & 0o777 == 0o600
+    snap.chmod(0o622)
+    assert not load_warm_start(PcqngRng(), snap)
+    snap.chmod(0o600)
+    assert load_warm_start(PcqngRng(), snap)
+    link = tmp_path / "link.json"
+    link.symlink_to(snap)
+    assert not load_warm_start(PcqngRng(), link)
+
+    # One slot per live process; a released slot is reused
+    base = tmp_path / "private" / "warm"
+    first = claim_slot(base)
+    assert (tmp_path / "private").stat().st_mode & 0o777 == 0o700
+    assert claim_slot(base) != first  # same process asking again gets a new one
+    code = "import sys; from bot.pcqng_warmstart import claim_slot; print(claim_slot(sys.argv[1]))"
+    other = subprocess.run(
+        [sys.executable, "-c", code, str(base)], capture_output=True, text=True, check=True, cwd=Path(__file__).parents[1],
+    ).stdout.strip()
+    assert other == str(base) + ".s2"
+
+
+def test_restore_before_first_calibration_then_step_many(tmp_path):
+    """A snapshot with a part-filled window resumes in batch and scalar alike."""
+    trace = load_trace(_write_trace(tmp_path / "trace.i64", n=3000))
+    warm = 1 + 3 + 1000 + 10                     # anchor, INIT, RAMP, 10 NORMAL
+    original = PcqngRng(timestamp_source=TraceSource(trace[:0]))
+    original.step_many(trace[:warm])
+    snap = original.snapshot()
+    assert len(snap["core"]["window"]) == snap["core"]["sample_since_cal"] == 10
+
+    batch = PcqngRng(timestamp_source=TraceSource(trace[:0]))
+    batch.restore(snap)
+    batch.step_many(trace[warm - 1:])
+    scalar = PcqngRng(timestamp_source=TraceSource(trace[warm - 1:]))
+    scalar.restore(snap)
+    for _ in range(len(trace) - warm + 1):
+        scalar.step()
+    assert batch.read_packets() == scalar.read_packets()
+    assert batch._core._q_divisor == scalar._core._q_divisor
+
+    # More samples since calibration than the window holds cannot happen
+    snap["core"]["sample_since_cal"] = 1000
+    with pytest.raises(ValueError):
+        PcqngRng(timestamp_source=TraceSource(trace[:0])).restore(snap)
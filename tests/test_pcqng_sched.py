@@ -0,0 +1,39 @@
+"""Sampler-thread scheduling: graceful reports, never exceptions."""
+
+import sys
+import threading
+
+import pytest
+
+from bot.pcqng_sched import apply_scheduling, measure_tick_quality, tune_sampling_thread
+
+
+def _in_thread(fn):
+    # Scheduling is per-thread on Linux; keep it off the pytest thread
+    out = {}
+    t = threading.Thread(target=lambda: out.update(report=fn()))
+    t.start()
+    t.join(30)
+    return out["report"]
+
+
+def test_off_and_invalid_modes():
+    assert apply_scheduling("off") == {"mode": "off"}
+    with pytest.raises(ValueError):
+        apply_scheduling("turbo")
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Linux scheduling API")
+def test_tune_reports_before_after_and_fallback():
+    report = _in_thread(lambda: tune_sampling_thread("auto", cpu=0, measure_ticks=30))
+    assert report["affinity"].get("applied") == [0] or "error" in report["affinity"]
+    # Either some policy applied, or every refused attempt is recorded
+    assert report["scheduling"]["applied"] or all("error" in a for a in report["attempts"])
+    for phase in ("before", "after"):
+        assert report[phase]["ticks"] == 30 and report[phase]["delta_mean"] > 0
+
+
+def test_measure_tick_quality_with_injected_reader():
+    ticks = iter(range(0, 10_000, 100))
+    stats = measure_tick_quality(10, reader=lambda: next(ticks), period_s=0.0005)
+    assert stats["delta_mean"] == 100 and stats["delta_std"] == 0
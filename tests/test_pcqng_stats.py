@@ -0,0 +1,63 @@
+"""Vectorised canonical statistics battery: calibration, defects, sources."""
+
+import numpy as np
+
+from bot.pcqng_archive import ArchiveReader, PcqngArchive
+from bot.pcqng_stats import CANON_SAMPLE_COUNTS, battery_from_archive, run_battery
+
+TESTS = ("bias", "runs", "serial", "spectral", "chi2")
+
+
+def test_uniform_sources_pass_at_nominal_rate():
+    rnd = np.random.default_rng(19)
+    report = run_battery(rnd.integers(0, 128, (200, 8192), dtype=np.uint8))
+    assert report["sources"] == 200
+    for name in TESTS:
+        p = np.asarray(report[name]["p"])
+        assert p.shape == (200,)
+        assert np.mean(p < 0.05) < 0.12, name  # nominal 5 %
+
+    single = run_battery(rnd.integers(0, 256, 200_000, dtype=np.uint8).tobytes(), kind="ebits")
+    assert single["samples"] == {"bias": 131_072, "runs": 65_536, "spectral": 131_072}
+    assert single["samples"]["runs"] == CANON_SAMPLE_COUNTS["run_length"]
+    assert all(single[name]["pass"] for name in TESTS)
+
+
+def test_defects_are_flagged():
+    rnd = np.random.default_rng(20)
+    biased = (rnd.random((4096, 7)) < 0.52).astype(np.uint8)
+    biased = np.packbits(np.pad(biased, ((0, 0), (1, 0))), axis=1)[:, 0]
+    assert not run_battery(biased)["bias"]["pass"]
+
+    walk = np.cumsum(rnd.normal(0, 1, 65_536))
+    walk = ((walk - walk.min()) / np.ptp(walk) * 127).astype(np.uint8)
+    report = run_battery(walk)
+    assert not report["serial"]["pass"] and report["serial"]["r"] > 0.9
+    assert not report["spectral"]["pass"] and report["spectral"]["slope"] < -1
+
+    stuck = np.tile(np.array([0x55, 0x2A], dtype=np.uint8), 4096)  # 1010… bits
+    report = run_battery(stuck)
+    assert not report["runs"]["pass"] and not report["chi2"]["pass"]
+
+
+def test_rows_are_independent():
+    rnd = np.random.default_rng(21)
+    good = rnd.integers(0, 128, 16_384, dtype=np.uint8)
+    rows = np.stack([good, np.zeros_like(good), good])
+    report = run_battery(rows)
+    assert report["bias"]["pass"] == [True, False, True]
+    assert report["bias"]["z"][0] == run_battery(good)["bias"]["z"]
+
+
+def test_archive_battery(tmp_path):
+    rnd = np.random.default_rng(22)
+    t0 = 1_750_000_000 * 10**9
+    arch = PcqngArchive(tmp_path, flush_s=3600)
+    for i in range(32):
+        packets = [rnd.integers(0, 128, 17, dtype=np.uint8).tobytes() for _ in range(64)]
+        arch.record(b"", packets, t_ns=t0 + i * 10**9)
+    arch.close()
+
+    report = battery_from_archive(tmp_path, "packets", t0 / 1e9, t0 / 1e9 + 32)
+    assert report["samples"]["bias"] == 32 * 64 * 17
+    assert report["bias"]["z"] == run_battery(ArchiveReader(tmp_path).read("packets", t0 / 1e9, t0 / 1e9 + 32))["bias"]["z"]
@@ -0,0 +1,99 @@
+"""Target buffer service: PcqngTargetGen parity, buffering and the precog path."""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from bot.pcqng import _LfsrCorrector
+from bot.pcqng_targets import TargetService, target_words
+
+
+def _reference(data):
+    """``GenerateTarget`` line by line (with the same group cap)."""
+    lfsr, out = _LfsrCorrector(), []
+    for e in data:
+        word = 0
+        for _ in range(7):
+            run_type, run_len, groups = 0, 0, 0
+            while run_len < 5 and groups < 256:
+                groups += 1
+                for b in range(7):
+                    bit = lfsr.next_bit((e >> (6 - b)) & 1)
+                    if bit == run_type:
+                        run_len += 1
+                    else:
+                        run_type, run_len = bit, 1
+            word = (word << 1) | (bit & 1)
+        out.append(word)
+    return out, lfsr._lfsr
+
+
+def test_target_words_match_reference():
+    # 0x7F first: the canonical seed then outputs 1010… and never ends a run
+    data = bytes([0x7F]) + np.random.default_rng(25).integers(0, 128, 60, dtype=np.uint8).tobytes()
+    words, state = target_words(data)
+    want, want_state = _reference(data)
+    assert words.tolist() == want and state == want_state
+    # Split calls continue from the returned register
+    head, mid = target_words(data[:20])
+    tail, _ = target_words(data[20:], mid)
+    assert np.concatenate([head, tail]).tolist() == want
+
+
+def _until(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "service did not catch up"
+        time.sleep(0.002)
+
+
+@pytest.fixture()
+def service():
+    svc = TargetService(depth=32, max_sessions=2, timeout_s=0.2)
+    yield svc
+    svc.stop()
+
+
+def test_burst_pops_prefilled_words(service):
+    data = np.random.default_rng(26).integers(0, 128, 100, dtype=np.uint8).tobytes()
+    sess = service.session("a")
+    with pytest.raises(TimeoutError):
+        sess.next_targets(1, timeout=0.05)           # nothing fed yet
+    assert service.stats()["timeouts"] == 1
+    service.feed(data)
+    _until(lambda: len(sess) == 32)
+    got = [sess.get_next_target() for _ in range(10)] + sess.next_targets(22).tolist()
+    assert got == target_words(data[:32])[0].tolist()
+    assert sess.waits == 1                           # only the empty read above
+    with pytest.raises(ValueError):
+        sess.next_targets(33)
+
+
+def test_precog_uses_only_later_bytes(service):
+    rnd = np.random.default_rng(27)
+    early, late = (rnd.integers(0, 128, 40, dtype=np.uint8).tobytes() for _ in range(2))
+    sess = service.session("p")
+    service.feed(early)
+    _until(lambda: len(sess) == 32)
+    result = []
+    worker = threading.Thread(target=lambda: result.extend(sess.next_precog_targets(3, timeout=5).tolist()))
+    worker.start()
+    _until(lambda: sess._precog_want == 3)
+    service.feed(late)
+    worker.join()
+    # Same register: 32 buffered words from `early`, then the first bytes of `late`
+    words, _ = target_words(early[:32] + late[:3])
+    assert result == words[32:].tolist()
+
+
+def test_sessions_are_independent_and_bounded(service):
+    a, b = service.session("a"), service.session("b")
+    service.feed(bytes(range(100)))
+    _until(lambda: len(a) == 32 and len(b) == 32)
+    assert a.next_targets(32).tolist() != b.next_targets(32).tolist()
+    b.set_target_buffer_size(8)
+    service.session("c")                             # evicts "a", the least recently used
+    assert service.stats()["sessions"] == 2
+    assert service.session("a") is not a
@@ -0,0 +1,66 @@
+"""MilliTimer deadline scheduling, driven by a fake clock for determinism."""
+
+from bot.pcqng_timer import MilliTimer
+
+
+class _FakeClock:
+    """Nanosecond clock; sleep() advances it by the request plus an overshoot."""
+
+    def __init__(self, overshoots_ns):
+        self.now = 0
+        self._overshoots = list(overshoots_ns)
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        extra = self._overshoots.pop(0) if self._overshoots else 0
+        self.now += int(seconds * 1e9) + extra
+
+
+def test_deadlines_do_not_drift():
+    """Per-tick overshoot must not accumulate into the cadence."""
+    clk = _FakeClock([50_000] * 1000)  # every wake 50 µs late
+    timer = MilliTimer(spin_s=0.0, clock=clk, sleep=clk.sleep)
+    for _ in range(1000):
+        assert timer.wait() == 50_000
+    # 1000 ticks on a 1 ms grid: last wake at 1000 ms + 50 µs, not 1050 ms
+    assert clk.now == 1_000_000_000 + 50_000
+    assert timer.missed_ticks == 0
+    assert timer.late_ticks == 0  # 50 µs < 10 % of period
+    assert abs(timer.rate_hz - 1000.0) < 1e-6
+
+
+def test_missed_and_late_ticks_counted():
+    clk = _FakeClock([0, 3_500_000, 200_000, 0])
+    timer = MilliTimer(spin_s=0.0, clock=clk, sleep=clk.sleep)
+    timer.wait()                      # on time, t = 1 ms
+    assert timer.wait() == 3_500_000  # 3.5 ms late → 3 pulses lost
+    assert timer.missed_ticks == 3
+    # grid re-anchored: next deadline is 6 ms, not a burst of catch-up ticks
+    timer.wait()
+    assert clk.now == 6_000_000 + 200_000
+    stats = timer.stats()
+    assert stats["ticks"] == 3 and stats["late_ticks"] == 2
+    assert stats["lateness_max_us"] == 3500.0
+
+
+def test_spin_phase_finishes_on_deadline():
+    """With a spin margin the sleep stops short and the spin hits the deadline."""
+    clk = _FakeClock([])
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        clk.now += int(seconds * 1e9)
+
+    ticks = iter(range(0, 10**9, 1000))  # clock advances 1 µs per read while spinning
+
+    def clock():
+        clk.now = max(clk.now, next(ticks))
+        return clk.now
+
+    timer = MilliTimer(spin_s=0.0002, clock=clock, sleep=sleep)
+    lateness = timer.wait()
+    assert abs(slept[0] - 0.0008) < 5e-6  # stopped ~200 µs short
+    assert 0 <= lateness <= 1000
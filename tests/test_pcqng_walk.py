@@ -0,0 +1,46 @@
+"""BoundedWalkGen: vectorised walk equals the bit-by-bit reference."""
+
+import numpy as np
+
+from bot.pcqng import PcqngRng
+from bot.pcqng_replay import TraceSource
+from bot.pcqng_walk import BoundedWalkGen, _walk_reference
+
+
+def _packets(n: int, seed: int = 21) -> bytes:
+    return np.random.default_rng(seed).integers(0, 128, n, dtype=np.uint8).tobytes()
+
+
+def test_matches_reference_whole_and_chunked():
+    data = _packets(50_001)
+    for hit_s in (1e-5, 1e-3, 0.1):
+        gen = BoundedWalkGen(avg_bound_hit_s=hit_s)
+        ref, pos = _walk_reference(data, gen.bound_steps)
+        assert gen.process(data).tolist() == ref and gen._pos == pos
+
+        chunked = BoundedWalkGen(avg_bound_hit_s=hit_s)
+        out = [chunked.process(data[i:i + 333]) for i in range(0, len(data), 333)]
+        assert np.concatenate(out).tolist() == ref
+    assert gen.bound_steps == 218 and gen.bits_read == len(data) * 7
+
+
+def test_ac_channel_walks_alternation_flipped_bits():
+    data = _packets(10_001, seed=22)
+    bits = np.unpackbits(np.frombuffer(data, np.uint8)[:, None], axis=1)[:, 1:].ravel()
+    flipped = np.packbits(np.pad((bits ^ (np.arange(len(bits)) & 1)).reshape(-1, 7), ((0, 0), (1, 0))), axis=1)
+    gen = BoundedWalkGen(bias_channel=False, avg_bound_hit_s=1e-4)
+    ref, _ = _walk_reference(flipped.tobytes(), gen.bound_steps)
+    out = [gen.process(data[i:i + 1001]) for i in range(0, len(data), 1001)]
+    assert np.concatenate(out).tolist() == ref
+
+    # A perfectly alternating stream is unbiased but fully anti-correlated
+    alternating = bytes([0b1010101, 0b0101010] * 5000)
+    assert BoundedWalkGen(avg_bound_hit_s=1e-3).process(alternating).size == 0
+    assert BoundedWalkGen(bias_channel=False, avg_bound_hit_s=1e-3).process(alternating).size > 0
+
+
+def test_generate_pulls_from_rng():
+    ts = np.cumsum(np.random.default_rng(24).normal(5_000, 1_000, 20_000).astype(np.int64))
+    gen = BoundedWalkGen(PcqngRng(timestamp_source=TraceSource(ts)), avg_bound_hit_s=1e-4, avg_buffer_size_s=1e-3)
+    outs = [gen.generate() for _ in range(50)]
+    assert set(outs) <= {-1.0, 1.0} and gen.stats()["hits"] >= 50
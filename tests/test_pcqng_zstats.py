@@ -0,0 +1,88 @@
+"""Array Stats / BpAnnStreamFilters: parity with the scalar C++ and exact normals."""
+
+import math
+
+import numpy as np
+import pytest
+
+from bot import pcqng_zstats as zs
+
+
+def _zp(z):
+    """``Stats::ZToP``, line by line."""
+    z = max(-8.0, min(8.0, z))
+    w = 1 if z >= 0 else -1
+    t = 1.0 + 0.2316419 * w * z
+    num = 0.31938153 + (1.330274429 + (-1.821255978 * t) + (1.781477937 * t * t) + (-0.356563782 * t * t * t)) / (t * t * t * t)
+    return 0.5 + w * (0.5 - num / (2.506628275 * math.exp(0.5 * z * z) * t))
+
+
+def _pz(p):
+    """``Stats::PToZ``, line by line."""
+    P = [-0.322232431088, -1.0, -0.342242088547, -0.0204231210245, -0.0000453642210148]
+    Q = [0.099348462606, 0.588581570495, 0.531103462366, 0.10353775285, 0.0038560700634]
+    pp = p if p < 0.5 else 1.0 - p
+    pp = 0.000001 if pp <= 0 else pp
+    y = math.sqrt(math.log(1.0 / (pp * pp)))
+    r = y + ((((y * P[4] + P[3]) * y + P[2]) * y + P[1]) * y + P[0]) / ((((y * Q[4] + Q[3]) * y + Q[2]) * y + Q[1]) * y + Q[0])
+    return -r if p < 0.5 else r
+
+
+def _assert_close_ulp(got, ref, maxulp=4):
+    """Within *maxulp* ulp of the result or of 1.0, whichever is coarser.
+
+    NumPy's vectorised exp/log need not be bit-equal to libm (1.26 is not),
+    and ``0.5 - x`` / ``y + r`` cancel near p = 0.5, so a few-ulp error in
+    exp/log shows up as many ulp of a result close to zero.
+    """
+    scale = np.spacing(np.maximum(1.0, np.abs(ref)))
+    assert np.all(np.abs(got - ref) <= maxulp * scale)
+
+
+def test_canonical_matches_scalar():
+    z = np.concatenate([np.linspace(-10, 10, 400), [0.0, -0.0]]).reshape(-1, 3)
+    _assert_close_ulp(zs.z_to_p(z), np.vectorize(_zp)(z))
+    assert np.array_equal(zs.convert_zs_to_ps(z), zs.z_to_p(z))
+    p = np.concatenate([np.linspace(0, 1, 1001), [-0.1, 1.1, 1e-9]])
+    _assert_close_ulp(zs.p_to_z(p), np.vectorize(_pz)(p))
+
+
+@pytest.mark.parametrize("fallback", [False, True])
+def test_exact_normal(monkeypatch, fallback):
+    if fallback:
+        monkeypatch.setattr(zs, "HAVE_SCIPY", False)
+    x = np.linspace(-6, 6, 241)
+    ref = np.array([math.erfc(v) for v in x])
+    assert np.allclose(zs.erfc(x), ref, rtol=2e-7, atol=0)
+    p = zs.z_to_p(x, exact=True)
+    assert np.allclose(p, [0.5 * math.erfc(-v / math.sqrt(2)) for v in x], rtol=2e-7, atol=0)
+    mid = (p > 1e-12) & (p < 1 - 1e-12)
+    assert np.allclose(zs.p_to_z(p[mid], exact=True), x[mid], rtol=0, atol=1e-6)
+    edge = zs.ndtri(np.array([0.0, 1.0, -0.5, 0.5]))
+    assert edge[0] == -np.inf and edge[1] == np.inf and np.isnan(edge[2]) and edge[3] == 0
+
+
+def test_stream_filters_match_per_vector():
+    rnd = np.random.default_rng(23)
+    m = rnd.uniform(size=(2000, 7))
+    out = zs.factorize(zs.s_normalize(zs.sort_ascending(m)))
+    for row, got in zip(m[:50], out[:50]):
+        s = sorted(row.tolist())
+        s = [(v - a) / d for v, a, d in zip(s, zs._SMEAN, zs._SDEV)]
+        want = [sum(s[j] * zs._EIGTAB[i][j] for j in range(7)) / math.sqrt(zs._EIGV[i]) for i in range(7)]
+        assert np.allclose(got, want, rtol=1e-12, atol=1e-12)
+    # Factorised order statistics of uniforms: roughly unit variance
+    assert np.allclose(out.std(axis=0), 1.0, atol=0.1)
+    with pytest.raises(ValueError):
+        zs.factorize(np.zeros((3, 6)))
+
+
+def test_stouffer():
+    z = np.random.default_rng(24).normal(size=(3000, 16))
+    assert np.allclose(zs.stouffer(z), z.sum(axis=1) / 4)
+    assert np.allclose(zs.stouffer(z, axis=0), z.sum(axis=0) / math.sqrt(3000))
+    assert zs.stouffer(z, axis=None) == pytest.approx(z.sum() / math.sqrt(z.size))
+    w = np.arange(1, 17, dtype=float)
+    assert np.allclose(zs.stouffer(z, weights=w), (z * w).sum(axis=1) / np.sqrt((w * w).sum()))
+    w0 = np.arange(1, 3001, dtype=float)
+    assert np.allclose(zs.stouffer(z, axis=0, weights=w0), (z * w0[:, None]).sum(axis=0) / np.sqrt((w0 * w0).sum()))